@@ -40,6 +40,18 @@ DATABASES = {
 #     }
 # }
 
+# Shard (see app.shards): when the SHARD environment variable is set to the
+#   path of a SQLite database, the metrics that loaddb and analyzesensitivity
+#   save are written to that database, to be merged into the default database
+#   by mergedb, such that concurrent tasks do not contend for the database.
+if os.environ.get('SHARD'):
+    DATABASES['shard'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['SHARD'],
+        'BULK': 50,
+    }
+DATABASE_ROUTERS = ['app.shards.ShardRouter']
+
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'America/New_York'
 USE_I18N = True
@@ -68,5 +80,27 @@ PARALLEL = {
     'SUBPROCESSES': 25
 }
 
+# Call graph cache
+CALL_GRAPH_CACHE = {
+    'DIRECTORY': '.cache/call_graph',   # Relative to the scratch root
+    'SIZE': 50 * 1024 ** 3              # Bytes
+}
+
+# PageRank (see app.pagerank.PageRank)
+PAGE_RANK = {
+    'TOLERANCE': 1.0e-6,
+    'MAX_ITERATIONS': 100,
+    # Path of the JSON lines file that a record of each solution is appended
+    #   to (see summarizepagerank). When None, solutions are not recorded.
+    'LOG': None
+}
+
+# gprof
+GPROF = {
+    # Number of gmon files summed (gprof -s) into each gprof file. When None,
+    #   a gprof file is generated for each gmon file.
+    'GROUP_SIZE': None
+}
+
 # Subjects currently enabled
 ENABLED_SUBJECTS = ['curl', 'ffmpeg', 'wireshark']
@@ -8,6 +8,7 @@ from django.template.loader import render_to_string
 
 from attacksurfacemeter.granularity import Granularity
 
+from app import errors
 from app.analysis import configuration, helpers
 from app.models import *
 
@@ -36,14 +37,18 @@ def run(granularity, database='default', fname=None):
             if len(releases) == 0:
                 continue
 
-            releases = Release.objects.filter(id__in=releases). \
-                order_by('branch_id')
+            releases = Release.objects.filter(id__in=releases)
 
             _subject = {'name': item, 'revisions': list(), 'tracking': list()}
 
             aggregate = releases.aggregate(Min('id'))
             minid = aggregate['id__min']
-            releases = list(releases.order_by('-id'))
+            if releases.filter(ordinal=0).exists():
+                raise errors.UnnumberedReleaseError(
+                    'Releases of {0} are not numbered. Run initdb to number '
+                    'the releases.'.format(item)
+                )
+            releases = list(releases.order_by('-ordinal'))
             index = 0
             while index < len(releases):
                 release = releases[index]
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+from app import helpers
+from app.compact import CompactCallGraph
+
+# Incremented whenever the structure of the cached objects changes so that
+#   entries created by earlier versions are never reused
+VERSION = 2
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class CallGraphCache(object):
+    """Content-addressed cache of call graphs.
+
+    Call graphs are cached in a single directory, each in the compact format
+    (see app.compact.CompactCallGraph) in a subdirectory named by a digest of
+    all inputs that the call graph was loaded from (see get_key()).
+    A change to any of the inputs changes the digest, and a stale call graph
+    is therefore never reused. The cache is bounded in size by evicting the
+    least recently used entries.
+    """
+
+    def __init__(self, directory, size=None):
+        """CallGraphCache constructor.
+
+        Parameters
+        ----------
+        directory : str
+            The path to the directory that the call graphs are cached in. The
+            directory is created if it does not exist.
+        size : int, optional
+            The maximum size, in bytes, of all call graphs in the cache. When
+            None, the size of the cache is unbounded.
+        """
+        self.directory = directory
+        self.size = size
+
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def get_key(paths, **parameters):
+        """Return the digest of a set of inputs that a call graph depends on.
+
+        Parameters
+        ----------
+        paths : list
+            A list of paths to the files, the content of which the call graph
+            depends on. Paths that do not exist are ignored.
+        parameters : dict
+            Any other values that the call graph depends on. The values must
+            be serializable to JSON.
+
+        Returns
+        -------
+        key : str
+            A hexadecimal digest that uniquely identifies the inputs.
+        """
+        digest = hashlib.sha1()
+        digest.update('version={0}\n'.format(VERSION).encode())
+
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            digest.update('path={0}\n'.format(path).encode())
+            with open(path, 'rb') as file_:
+                for chunk in iter(lambda: file_.read(CHUNK_SIZE), b''):
+                    digest.update(chunk)
+
+        for name in sorted(parameters):
+            digest.update('{0}={1}\n'.format(
+                name, json.dumps(parameters[name], sort_keys=True)
+            ).encode())
+
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return the call graph cached by key.
+
+        Parameters
+        ----------
+        key : str
+            The key returned by get_key().
+
+        Returns
+        -------
+        call_graph : app.compact.CompactCallGraph
+            The call graph cached by key, with its arrays memory-mapped, or
+            None if there is no such call graph in the cache.
+        """
+        call_graph = None
+
+        path = self._get_path(key)
+        try:
+            # The modification time of an entry is its last use
+            os.utime(path)
+            call_graph = CompactCallGraph.load(path)
+        except FileNotFoundError:
+            # The entry may also have been evicted by a concurrent process
+            pass
+
+        if call_graph is None:
+            self.misses += 1
+            helpers.debug('Call graph cache miss {0}'.format(key))
+        else:
+            self.hits += 1
+            helpers.debug('Call graph cache hit {0}'.format(key))
+
+        return call_graph
+
+    def put(self, key, call_graph):
+        """Cache a call graph.
+
+        The call graph is saved to a temporary directory that is atomically
+        renamed such that concurrent readers never see a partially saved
+        entry. Least recently used entries are evicted afterwards if the size
+        of the cache exceeds the bound.
+
+        Parameters
+        ----------
+        key : str
+            The key returned by get_key().
+        call_graph : app.compact.CompactCallGraph
+            The call graph to cache.
+
+        Returns
+        -------
+        call_graph : app.compact.CompactCallGraph
+            The cached call graph, with its arrays memory-mapped.
+        """
+        helpers.debug('Caching call graph {0}'.format(key))
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = tempfile.mkdtemp(dir=self.directory, suffix='.tmp')
+        try:
+            call_graph.save(path)
+            for name in os.listdir(path):
+                with open(os.path.join(path, name), 'rb') as file_:
+                    os.fsync(file_.fileno())
+            os.rename(path, self._get_path(key))
+        except OSError:
+            # A concurrent process may have cached the same call graph first
+            shutil.rmtree(path)
+            if not os.path.exists(self._get_path(key)):
+                raise
+
+        self.evict()
+
+        return CompactCallGraph.load(self._get_path(key))
+
+    def evict(self):
+        """Evict least recently used entries until the cache fits its bound.
+
+        Returns
+        -------
+        evicted : list
+            The keys of the entries that were evicted.
+        """
+        evicted = list()
+        if self.size is None or not os.path.exists(self.directory):
+            return evicted
+
+        entries = list()
+        for key in os.listdir(self.directory):
+            path = self._get_path(key)
+            if key.endswith('.tmp') or not os.path.isdir(path):
+                continue
+            try:
+                size = sum(
+                    os.path.getsize(os.path.join(path, name))
+                    for name in os.listdir(path)
+                )
+                entries.append((os.stat(path).st_mtime, size, key))
+            except FileNotFoundError:
+                # The entry may have been evicted by a concurrent process
+                continue
+        entries.sort()
+
+        total = sum(size for (_, size, _) in entries)
+        # The most recently used entry is retained even if it alone exceeds
+        #   the bound
+        for (_, size, key) in entries[:-1]:
+            if total <= self.size:
+                break
+            # Processes that have the arrays of the entry memory-mapped are
+            #   unaffected by the removal
+            shutil.rmtree(self._get_path(key), ignore_errors=True)
+            total -= size
+
+            helpers.debug('Evicted call graph {0}'.format(key))
+            evicted.append(key)
+
+        return evicted
+
+    def _get_path(self, key):
+        return os.path.join(self.directory, key)
@@ -0,0 +1,309 @@
+import json
+import os
+
+import networkx as nx
+import numpy
+
+from attacksurfacemeter.call import Call
+from attacksurfacemeter.call_graph import CallGraph
+from attacksurfacemeter.environments import Environments
+
+# Incremented whenever the layout of the files changes
+VERSION = 1
+
+# Bits of the node attribute bitset
+NODE_FLAGS = (
+    ('entry', 1), ('exit', 2), ('dangerous', 4), ('defense', 8),
+    ('tested', 16), ('vulnerable', 32),
+)
+
+# Bits of the edge attribute bitset
+EDGE_FLAGS = (('call', 1), ('return', 2), ('cflow', 4), ('gprof', 8))
+
+# Arrays of the format, each of which is saved to a .npy file of the same name
+ARRAYS = (
+    'names', 'signatures', 'flags', 'frequency', 'indptr', 'indices',
+    'edge_flags',
+)
+
+
+class CompactCallGraph(object):
+    """Compact, memory-mappable representation of a call graph.
+
+    A call graph is represented by the following arrays, each saved to a .npy
+    file in a directory such that it can be memory-mapped (and the pages
+    shared) by multiple processes.
+
+        names, signatures
+            Indices into the interned table of strings (saved to strings.json)
+            giving the function name and signature of each node.
+        flags
+            Bitset of the attributes of each node (see NODE_FLAGS).
+        frequency
+            The frequency of each node (0 when the attribute is not set).
+        indptr, indices
+            Adjacency of the call graph in compressed sparse row (CSR) format,
+            i.e. the successors of node i are indices[indptr[i]:indptr[i + 1]].
+        edge_flags
+            Bitset of the attributes of each edge, in the order of indices
+            (see EDGE_FLAGS). The call and return bits distinguish calls from
+            returns in the adjacency.
+
+    The attributes of the CallGraph that are not arrays (e.g. the number of
+    fragments) are saved to meta.json.
+
+    The arrays are read as is by consumers that need the structure of the
+    call graph alone, e.g. pagerank.PageRank, which the processes of a
+    sensitivity analysis share. Consumers that need a CallGraph (e.g. the
+    metrics collected by loaddb) construct one with to_call_graph(), which is
+    private to the process that constructs it.
+    """
+
+    def __init__(self, strings, arrays, meta):
+        self.strings = strings
+        self.meta = meta
+        for name in ARRAYS:
+            setattr(self, name, arrays[name])
+
+    @classmethod
+    def from_call_graph(cls, call_graph):
+        """Construct a CompactCallGraph from a CallGraph.
+
+        Parameters
+        ----------
+        call_graph : attacksurfacemeter.call_graph.CallGraph
+            The call graph to represent.
+
+        Returns
+        -------
+        compact_call_graph : CompactCallGraph
+            An instance of CompactCallGraph.
+        """
+        graph = call_graph.call_graph
+        nodes = graph.nodes()
+        index = {node: i for (i, node) in enumerate(nodes)}
+
+        strings = list()
+        interned = dict()
+
+        def intern(string):
+            if string not in interned:
+                interned[string] = len(strings)
+                strings.append(string)
+            return interned[string]
+
+        count = len(nodes)
+        arrays = {
+            'names': numpy.zeros(count, dtype=numpy.int32),
+            'signatures': numpy.zeros(count, dtype=numpy.int32),
+            'flags': numpy.zeros(count, dtype=numpy.uint8),
+            'frequency': numpy.zeros(count, dtype=numpy.int32),
+            'indptr': numpy.zeros(count + 1, dtype=numpy.int64),
+        }
+        indices = list()
+        edge_flags = list()
+
+        environment = Environments.C
+        for (i, node) in enumerate(nodes):
+            environment = node.environment
+
+            attrs = graph.node[node]
+            arrays['names'][i] = intern(node.function_name)
+            arrays['signatures'][i] = intern(node.function_signature)
+            arrays['flags'][i] = _get_flags(attrs, NODE_FLAGS)
+            arrays['frequency'][i] = attrs.get('frequency', 0)
+
+            for (successor, attrs) in graph.succ[node].items():
+                indices.append(index[successor])
+                edge_flags.append(_get_flags(attrs, EDGE_FLAGS))
+            arrays['indptr'][i + 1] = len(indices)
+
+        arrays['indices'] = numpy.array(indices, dtype=numpy.int32)
+        arrays['edge_flags'] = numpy.array(edge_flags, dtype=numpy.uint8)
+
+        meta = {
+            'version': VERSION,
+            'source': call_graph.source,
+            'granularity': call_graph.granularity,
+            'environment': environment,
+            'num_fragments': call_graph.num_fragments,
+            'monolithicity': call_graph.monolithicity,
+            'load_errors': call_graph.load_errors,
+        }
+
+        return cls(strings, arrays, meta)
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """Load a CompactCallGraph saved to a directory.
+
+        Parameters
+        ----------
+        directory : str
+            The path to the directory that the call graph was saved to.
+        mmap_mode : str, optional
+            The mode that the arrays are memory-mapped in. See numpy.load for
+            available choices. When None, the arrays are read into memory.
+
+        Returns
+        -------
+        compact_call_graph : CompactCallGraph
+            An instance of CompactCallGraph.
+        """
+        with open(os.path.join(directory, 'meta.json'), 'r') as file_:
+            meta = json.load(file_)
+        if meta['version'] != VERSION:
+            raise Exception(
+                'Unsupported compact call graph version {0}'.format(
+                    meta['version']
+                )
+            )
+
+        with open(os.path.join(directory, 'strings.json'), 'r') as file_:
+            strings = json.load(file_)
+
+        arrays = {
+            name: numpy.load(
+                os.path.join(directory, '{0}.npy'.format(name)),
+                mmap_mode=mmap_mode
+            )
+            for name in ARRAYS
+        }
+
+        return cls(strings, arrays, meta)
+
+    def save(self, directory):
+        """Save the call graph to a directory.
+
+        Parameters
+        ----------
+        directory : str
+            The path to the directory to save the call graph to. The directory
+            is created if it does not exist.
+        """
+        os.makedirs(directory, exist_ok=True)
+
+        for name in ARRAYS:
+            numpy.save(
+                os.path.join(directory, '{0}.npy'.format(name)),
+                getattr(self, name)
+            )
+
+        with open(os.path.join(directory, 'strings.json'), 'w') as file_:
+            json.dump(self.strings, file_)
+
+        # meta.json is written last such that its presence indicates that the
+        #   call graph was completely saved
+        with open(os.path.join(directory, 'meta.json'), 'w') as file_:
+            json.dump(self.meta, file_)
+
+    def get_nodes(self):
+        """Return the nodes of the call graph.
+
+        Returns
+        -------
+        nodes : list
+            A list of Call objects, in the order of the arrays.
+        """
+        granularity = self.meta['granularity']
+        environment = self.meta['environment']
+        return [
+            Call(
+                self.strings[name], self.strings[signature], environment,
+                granularity
+            )
+            for (name, signature) in zip(self.names, self.signatures)
+        ]
+
+    def get_node_mask(self, attribute):
+        """Return a boolean mask of the nodes that have an attribute set.
+
+        Parameters
+        ----------
+        attribute : str
+            The name of the attribute, which must be one of NODE_FLAGS.
+
+        Returns
+        -------
+        mask : numpy.ndarray
+            A boolean array, in the order of the nodes.
+        """
+        return (self.flags & dict(NODE_FLAGS)[attribute]) != 0
+
+    def get_edge_mask(self, attribute):
+        """Return a boolean mask of the edges that have an attribute set.
+
+        Parameters
+        ----------
+        attribute : str
+            The name of the attribute, which must be one of EDGE_FLAGS.
+
+        Returns
+        -------
+        mask : numpy.ndarray
+            A boolean array, in the order of indices.
+        """
+        return (self.edge_flags & dict(EDGE_FLAGS)[attribute]) != 0
+
+    def get_callers(self):
+        """Return the index of the caller of each edge, i.e. the row of each
+        edge in the CSR adjacency.
+
+        Returns
+        -------
+        callers : numpy.ndarray
+            An array of node indices, in the order of indices.
+        """
+        return numpy.repeat(
+            numpy.arange(len(self.flags), dtype=numpy.int64),
+            numpy.diff(self.indptr)
+        )
+
+    def to_call_graph(self):
+        """Construct a CallGraph from the compact representation.
+
+        Returns
+        -------
+        call_graph : attacksurfacemeter.call_graph.CallGraph
+            An instance of CallGraph, identical to the one the compact
+            representation was constructed from, except for any attributes
+            assigned to nodes and edges after the call graph was loaded.
+        """
+        granularity = self.meta['granularity']
+        nodes = self.get_nodes()
+
+        graph = nx.DiGraph()
+        for (i, node) in enumerate(nodes):
+            attrs = _get_attrs(self.flags[i], NODE_FLAGS)
+            if self.frequency[i]:
+                attrs['frequency'] = int(self.frequency[i])
+            graph.add_node(node, **attrs)
+
+        for (i, node) in enumerate(nodes):
+            (begin, end) = (self.indptr[i], self.indptr[i + 1])
+            for (j, flags) in zip(
+                    self.indices[begin:end], self.edge_flags[begin:end]):
+                graph.add_edge(node, nodes[j], **_get_attrs(flags, EDGE_FLAGS))
+
+        call_graph = CallGraph(
+            self.meta['source'], graph, self.meta['load_errors'],
+            granularity=granularity
+        )
+        call_graph.num_fragments = self.meta['num_fragments']
+        call_graph.monolithicity = self.meta['monolithicity']
+
+        return call_graph
+
+
+def _get_flags(attrs, flags):
+    value = 0
+    for (attribute, bit) in flags:
+        if attribute in attrs:
+            value |= bit
+    return value
+
+
+def _get_attrs(value, flags):
+    # Attributes are flags, i.e. their presence is what matters, and are
+    #   restored with a None value just as the loaders assign them
+    return {attribute: None for (attribute, bit) in flags if value & bit}
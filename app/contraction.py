@@ -0,0 +1,91 @@
+import networkx as nx
+
+from attacksurfacemeter.call import Call
+from attacksurfacemeter.granularity import Granularity
+
+# Node attributes that are flags set on a file when set on any of its
+#   functions
+FLAGS = ['entry', 'exit', 'dangerous', 'tested']
+
+
+def contract(call_graph, defenses=None, vulnerabilities=None):
+    """Contract a function-granularity call graph by source file.
+
+    Every function is replaced by the file it is defined in, and every call
+    (or return) between two functions by one between their files, which is
+    the call graph that the loaders construct at file granularity. Functions
+    that are not associated with a file are dropped, just as the loaders drop
+    nodes with an empty identity.
+
+    The entry, exit, dangerous, and tested attributes of a file are the union
+    of those of its functions. The defense and vulnerable attributes are
+    assigned by file, as the loaders do. The frequency of a file is the
+    largest frequency of its functions, which is a lower bound on the
+    frequency that the gprof loader assigns at file granularity since the
+    latter counts the gprof files in which any of the functions is called.
+
+    Parameters
+    ----------
+    call_graph : attacksurfacemeter.call_graph.CallGraph
+        The call graph, at function granularity, to contract. The call graph
+        should not have been fragmentized since fragments of the file
+        granularity call graph are not necessarily fragments of the function
+        granularity call graph.
+    defenses : list, optional
+        A list of Call, at file granularity, of the designed defenses.
+    vulnerabilities : list, optional
+        A list of Call, at file granularity, of the vulnerable files.
+
+    Returns
+    -------
+    graph : networkx.DiGraph
+        The call graph, at file granularity, with nodes that are instances of
+        Call.
+    """
+    defenses = set(defenses or list())
+    vulnerabilities = set(vulnerabilities or list())
+
+    source = call_graph.call_graph
+    graph = nx.DiGraph()
+
+    files = dict()
+    for (node, attrs) in call_graph.nodes:
+        if not node.function_signature:
+            continue
+
+        file_ = files.get(node.function_signature)
+        if file_ is None:
+            file_ = Call(
+                '', node.function_signature, node.environment,
+                Granularity.FILE
+            )
+            files[node.function_signature] = file_
+
+            _attrs = dict()
+            if file_ in defenses:
+                _attrs['defense'] = None
+            if file_ in vulnerabilities:
+                _attrs['vulnerable'] = None
+            graph.add_node(file_, **_attrs)
+
+        _attrs = graph.node[file_]
+        for attribute in FLAGS:
+            if attribute in attrs:
+                _attrs[attribute] = None
+        if 'frequency' in attrs:
+            _attrs['frequency'] = max(
+                _attrs.get('frequency', 0), attrs['frequency']
+            )
+
+    for (caller, callee, attrs) in source.edges(data=True):
+        caller = files.get(caller.function_signature)
+        callee = files.get(callee.function_signature)
+        if caller is None or callee is None:
+            continue
+
+        if graph.has_edge(caller, callee):
+            graph.edge[caller][callee].update(attrs)
+        else:
+            graph.add_edge(caller, callee, **attrs)
+
+    return graph
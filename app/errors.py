@@ -20,3 +20,19 @@ class UnknownSubjectError(Exception):
 
     def __str__(self):
         return repr(self.value)
+
+
+class StaleCallGraphError(Exception):
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        return repr(self.value)
+
+
+class UnnumberedReleaseError(Exception):
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        return repr(self.value)
@@ -0,0 +1,162 @@
+import json
+
+# Axes of a parameter set, in the order of the elements of the tuple that
+#   represents it (see utilities.analyze_sensitivity)
+AXES = [
+    'damping', 'entry', 'exit', 'other', 'call', 'return', 'dangerous',
+    'vulnerable'
+]
+
+
+class ParameterGrid(object):
+    """Grid of parameter sets for the sensitivity analysis.
+
+    The grid is the Cartesian product of the values of each axis, enumerated
+    with the last axis varying fastest. A parameter set is decoded from its
+    index in the grid arithmetically, treating the index as a mixed radix
+    number with a digit for each axis, rather than by enumerating the grid.
+    """
+
+    def __init__(self, axes):
+        """ParameterGrid constructor.
+
+        Parameters
+        ----------
+        axes : dict
+            A dictionary keyed by the name of each axis in AXES with the list
+            of values of the axis as the value.
+        """
+        if sorted(axes) != sorted(AXES):
+            raise Exception(
+                'A grid must have exactly the axes {0}'.format(
+                    ', '.join(AXES)
+                )
+            )
+
+        self.axes = [(name, list(axes[name])) for name in AXES]
+        for (name, values) in self.axes:
+            if not values:
+                raise Exception('Axis {0} has no values'.format(name))
+
+        self._index = [
+            {value: i for (i, value) in enumerate(values)}
+            for (_, values) in self.axes
+        ]
+
+    @classmethod
+    def default(cls):
+        """Return the grid of helpers.generate_parameters.
+
+        Returns
+        -------
+        grid : ParameterGrid
+            The grid in which the damping varies from 0.1 to 0.9, the
+            personalization of entry and exit points from 10 to 10^6, the
+            weights of calls and returns from 10 to 10^4, and the weights of
+            dangerous and vulnerable callees from 10 to 10^3.
+        """
+        return cls({
+            'damping': [round(0.1 * i, 2) for i in range(1, 10)],
+            'entry': [10 ** power for power in range(1, 7)],
+            'exit': [10 ** power for power in range(1, 7)],
+            'other': [1],
+            'call': [10 ** power for power in range(1, 5)],
+            'return': [10 ** power for power in range(1, 5)],
+            'dangerous': [10 ** power for power in range(1, 4)],
+            'vulnerable': [10 ** power for power in range(1, 4)],
+        })
+
+    @classmethod
+    def from_file(cls, path):
+        """Load a grid from a JSON file.
+
+        Parameters
+        ----------
+        path : str
+            The path to a JSON file containing an object with the list of
+            values of each axis in AXES keyed by the name of the axis.
+
+        Returns
+        -------
+        grid : ParameterGrid
+            The grid specified in the file.
+        """
+        with open(path, 'r') as file_:
+            return cls(json.load(file_))
+
+    def __len__(self):
+        length = 1
+        for (_, values) in self.axes:
+            length *= len(values)
+        return length
+
+    def __getitem__(self, index):
+        """Decode a parameter set from its index in the grid.
+
+        Parameters
+        ----------
+        index : int
+            The zero-based index of the parameter set. A negative index
+            counts from the end of the grid.
+
+        Returns
+        -------
+        parameters : tuple
+            The parameter set, with an element for each axis in AXES.
+        """
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError('{0} is outside of the grid'.format(index))
+
+        parameters = list()
+        for (_, values) in reversed(self.axes):
+            (index, digit) = divmod(index, len(values))
+            parameters.append(values[digit])
+
+        return tuple(reversed(parameters))
+
+    def index(self, parameters):
+        """Encode a parameter set to its index in the grid.
+
+        Parameters
+        ----------
+        parameters : tuple
+            The parameter set, with an element for each axis in AXES.
+
+        Returns
+        -------
+        index : int
+            The zero-based index of the parameter set or None if it is not
+            in the grid.
+        """
+        index = 0
+        for ((_, values), _index, value) in zip(
+                self.axes, self._index, parameters):
+            if value not in _index:
+                return None
+            index = index * len(values) + _index[value]
+        return index
+
+    def iterate(self, begin=0, end=None):
+        """Lazily enumerate a slice of the grid.
+
+        Parameters
+        ----------
+        begin : int, optional
+            The index of the first parameter set of the slice.
+        end : int, optional
+            The index of the parameter set following the last of the slice.
+            Default is None, in which case the slice extends to the end of
+            the grid.
+
+        Yields
+        ------
+        parameters : tuple
+            A tuple of the index of the parameter set and the parameter set.
+        """
+        length = len(self)
+        end = length if end is None else min(end, length)
+        for index in range(max(begin, 0), end):
+            yield (index, self[index])
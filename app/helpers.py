@@ -2,11 +2,10 @@ import csv
 import os
 import sys
 
-import numpy
-
 from django.conf import settings
 
 from app import constants, errors
+from app.grid import ParameterGrid
 
 
 def get_version_components(string):
@@ -32,36 +31,14 @@ def get_absolute_path(dir_name):
 
 
 def generate_parameters(filepath):
-    parameters_collection = list()
-
-    other = 1   # Personalization value for all non-entry/exit functions
-
-    # Damping factor from 10% to 90% with 10% increments
-    for damping in numpy.arange(0.1, 1.0, 0.1):
-        # Personalization from 10 to 1000000 increasing exponentially
-        for power in range(1, 7):
-            entry = 10 ** power
-            for power in range(1, 7):
-                exit = 10 ** power
-                # Edge weights from 10 to 10000 increasing exponentially
-                for power in range(1, 5):
-                    call = 10 ** power
-                    for power in range(1, 5):
-                        retrn = 10 ** power
-                        for power in range(1, 4):
-                            dangerous = 10 ** power
-                            for power in range(1, 4):
-                                vulnerable = 10 ** power
-
-                                parameters_collection.append((
-                                    round(damping, 2),
-                                    entry, exit, other,
-                                    call, retrn, dangerous, vulnerable
-                                ))
-
+    # Damping factor from 10% to 90% with 10% increments, personalization
+    #   from 10 to 1000000 and edge weights from 10 to 10000 increasing
+    #   exponentially (see app.grid.ParameterGrid.default())
     with open(filepath, 'w') as file_:
         writer = csv.writer(file_)
-        writer.writerows(parameters_collection)
+        writer.writerows(
+            parameters for (_, parameters) in ParameterGrid.default().iterate()
+        )
 
 
 def debug(message, line=False):
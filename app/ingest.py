@@ -0,0 +1,219 @@
+import csv
+import io
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from app.helpers import debug
+
+# Number of rows in each statement (or COPY) of the fast backends
+CHUNK = 10000
+
+# Representation of a null value in the CSV streamed to COPY, which
+#   distinguishes a null value from an empty string
+NULL = '\\N'
+
+
+class Backend(object):
+    """Ingest backend that saves rows with Django bulk_create.
+
+    A backend saves rows, each a tuple of the values of the fields of a model,
+    rather than model instances such that the fast backends do not construct
+    an instance for each row. The values must be of a type that the database
+    adapter accepts as is, i.e. bool, int, float, str, or None, with the
+    primary key as the value of a foreign key.
+    """
+
+    def __init__(self, size=None, using=DEFAULT_DB_ALIAS):
+        """Backend constructor.
+
+        Parameters
+        ----------
+        size : int, optional
+            The number of rows in each batch. Default is None, in which case
+            the size is BULK of the database in settings for this backend and
+            CHUNK for the fast backends.
+        using : str, optional
+            The alias of the database to save rows to.
+        """
+        self.size = size
+        self.using = using
+        self.connection = connections[using]
+
+    def save(self, model, fields, rows, count=None):
+        """Save rows of a model to the database in a single transaction.
+
+        Parameters
+        ----------
+        model : django.db.models.Model
+            The model that the rows are instances of.
+        fields : list
+            The names of the fields of the model, in the order of the values
+            of each row. The remaining concrete fields, other than the
+            primary key, are saved with their default values.
+        rows : iterable
+            An iterable of tuples of the values of the fields.
+        count : int, optional
+            The number of rows, which is used to report progress.
+
+        Returns
+        -------
+        count : int
+            The number of rows saved.
+        """
+        fields = [model._meta.get_field(field) for field in fields]
+        (fields, rows) = _add_defaults(model, fields, rows)
+        saved = 0
+        with transaction.atomic(using=self.using):
+            for batch in _get_batches(rows, self._get_size()):
+                self._save(model, fields, batch)
+                saved += len(batch)
+                debug('Saved {0}/{1} rows'.format(saved, count or '?'),
+                      line=True)
+        if saved:
+            debug('')
+        return saved
+
+    def _get_size(self):
+        return self.size or settings.DATABASES[self.using]['BULK']
+
+    def _save(self, model, fields, batch):
+        names = [field.attname for field in fields]
+        model.objects.using(self.using).bulk_create(
+            [model(**dict(zip(names, row))) for row in batch]
+        )
+
+    def _get_sql(self, model, fields):
+        quote = self.connection.ops.quote_name
+        return (
+            quote(model._meta.db_table),
+            ', '.join(quote(field.column) for field in fields)
+        )
+
+
+class SqliteBackend(Backend):
+    """Ingest backend that saves rows with raw multi-row INSERT statements in a
+    single transaction with the write-ahead log enabled and synchronization
+    relaxed.
+
+    Each statement inserts as many rows as the limit on the number of
+    parameters of a statement allows, which is faster than executemany of a
+    single-row statement.
+
+    The journal mode and the synchronization of the database are restored
+    when the rows have been saved. They are left as they are when the rows
+    are saved in an enclosing transaction, in which they cannot be changed.
+    """
+
+    PRAGMAS = {'journal_mode': 'WAL', 'synchronous': 'NORMAL'}
+
+    def save(self, model, fields, rows, count=None):
+        pragmas = dict()
+        if not self.connection.in_atomic_block:
+            pragmas = self._set_pragmas(self.PRAGMAS)
+        try:
+            return super(SqliteBackend, self).save(model, fields, rows, count)
+        finally:
+            self._set_pragmas(pragmas)
+
+    def _get_size(self):
+        return self.size or CHUNK
+
+    def _save(self, model, fields, batch):
+        (table, columns) = self._get_sql(model, fields)
+        row = '({0})'.format(', '.join(['%s'] * len(fields)))
+        size = self.connection.ops.bulk_batch_size(fields, batch)
+        with self.connection.cursor() as cursor:
+            for index in range(0, len(batch), size):
+                rows = batch[index:index + size]
+                sql = 'INSERT INTO {0} ({1}) VALUES {2}'.format(
+                    table, columns, ', '.join([row] * len(rows))
+                )
+                cursor.execute(sql, [value for row_ in rows for value in row_])
+
+    def _set_pragmas(self, pragmas):
+        # Returns the previous value of each pragma set
+        previous = dict()
+        with self.connection.cursor() as cursor:
+            for (name, value) in pragmas.items():
+                cursor.execute('PRAGMA {0}'.format(name))
+                previous[name] = cursor.fetchone()[0]
+                cursor.execute('PRAGMA {0} = {1}'.format(name, value))
+        return previous
+
+
+class CopyBackend(Backend):
+    """Ingest backend that streams rows to PostgreSQL COPY as CSV."""
+
+    def _get_size(self):
+        return self.size or CHUNK
+
+    def _save(self, model, fields, batch):
+        buffer_ = io.StringIO()
+        writer = csv.writer(buffer_)
+        for row in batch:
+            writer.writerow([
+                NULL if value is None else value for value in row
+            ])
+        buffer_.seek(0)
+
+        (table, columns) = self._get_sql(model, fields)
+        sql = "COPY {0} ({1}) FROM STDIN WITH (FORMAT csv, NULL '{2}')".format(
+            table, columns, NULL
+        )
+        with self.connection.cursor() as cursor:
+            cursor.copy_expert(sql, buffer_)
+
+
+BACKENDS = {
+    'sqlite': SqliteBackend,
+    'postgresql': CopyBackend,
+}
+
+
+def get_backend(vendor=None, using=DEFAULT_DB_ALIAS):
+    """Return the ingest backend for a database.
+
+    Parameters
+    ----------
+    vendor : str, optional
+        The vendor of the database, e.g. 'sqlite' or 'postgresql'. Default is
+        None, in which case the vendor of the database is used.
+    using : str, optional
+        The alias of the database to save rows to, e.g. that of the shard that
+        the model is routed to (see app.shards).
+
+    Returns
+    -------
+    backend : Backend
+        The fast backend for the vendor, if there is one, or the backend that
+        saves rows with bulk_create.
+    """
+    vendor = vendor or connections[using].vendor
+    return BACKENDS.get(vendor, Backend)(using=using)
+
+
+def _add_defaults(model, fields, rows):
+    # Appends the fields missing from fields and their default values to each
+    #   row, since the backends that insert rows with SQL bypass the defaults
+    #   of the model and the columns of the table have none
+    missing = [
+        field for field in model._meta.concrete_fields
+        if not field.primary_key and field not in fields
+    ]
+    if not missing:
+        return (fields, rows)
+
+    defaults = tuple(field.get_default() for field in missing)
+    return (fields + missing, (tuple(row) + defaults for row in rows))
+
+
+def _get_batches(rows, size):
+    batch = list()
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = list()
+    if batch:
+        yield batch
@@ -3,9 +3,11 @@ import os
 from optparse import make_option, OptionValueError
 from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
+from django.db import router
 
-from app import constants, helpers, subjects, utilities
+from app import constants, helpers, schema, shards, subjects, utilities
 from app.errors import InvalidVersionError
+from app.grid import ParameterGrid
 from app.models import *
 from attacksurfacemeter.call import Call
 from attacksurfacemeter.environments import Environments
@@ -55,11 +57,67 @@ class Command(BaseCommand):
             )
         ),
         make_option(
-            '-f', type='str', action='callback', callback=check_path,
-            dest='parameters_filepath',
+            '-b', type='int', action='store', dest='begin',
             help=(
-                'Path to the file containing the list of parameters to use '
-                'during sensitivity analysis.'
+                'Index of the first parameter set in a range of parameter '
+                'sets to use when computing the metric.'
+            )
+        ),
+        make_option(
+            '-e', type='int', action='store', dest='end',
+            help=(
+                'Index of the parameter set following the last in a range of '
+                'parameter sets to use when computing the metric. Default is '
+                'None, in which case the range extends to the last parameter '
+                'set. When none of -i, -b, and -e is specified, all '
+                'parameter sets are used.'
+            )
+        ),
+        make_option(
+            '-p', type='int', dest='processes',
+            default=settings.PARALLEL['SUBPROCESSES'],
+            help=(
+                'Number of processes to spawn when analyzing a range of '
+                'parameter sets.'
+            )
+        ),
+        make_option(
+            '-G', type='str', action='callback', callback=check_path,
+            dest='grid_filepath',
+            help=(
+                'Path to the JSON file specifying the grid of parameters to '
+                'use during sensitivity analysis (see '
+                'app.grid.ParameterGrid.from_file). Default is None, in which '
+                'case the grid of the parameters generated by '
+                'helpers.generate_parameters is used.'
+            )
+        ),
+        make_option(
+            '-B', type='int', action='store', dest='budget',
+            help=(
+                'Search the grid of parameters (see -G) adaptively, from a '
+                'coarse lattice to the neighbors of the most significant '
+                'parameter sets, analyzing at most the specified number of '
+                'parameter sets (see app.search.CoarseToFineSearch). Cannot '
+                'be combined with -i, -b, or -e.'
+            )
+        ),
+        make_option(
+            '-S', type='int', action='store', dest='shortlist',
+            help=(
+                'Screen the parameter sets with page ranks estimated by '
+                'random walks and analyze only the specified number of the '
+                'most significant parameter sets with solved page ranks (see '
+                'app.pagerank.PageRank.estimate). Default is None, in which '
+                'case every parameter set is analyzed with solved page '
+                'ranks.'
+            )
+        ),
+        make_option(
+            '-R', action='store_true', dest='resume', default=False,
+            help=(
+                'Resume an interrupted analysis, skipping the parameter sets '
+                'in the range that have been analyzed for the release.'
             )
         ),
     )
@@ -73,21 +131,50 @@ class Command(BaseCommand):
         subject = options['subject']
         release = options['release']
         index = options['index']
-        parameters_filepath = options['parameters_filepath']
+        begin = options['begin']
+        end = options['end']
+        processes = options['processes']
+        grid_filepath = options['grid_filepath']
+        budget = options['budget']
+        shortlist = options['shortlist']
+        resume = options['resume']
 
         if subject not in settings.ENABLED_SUBJECTS:
             raise CommandError('Subject {0} is not enabled'.format(subject))
+        if index is not None and (begin is not None or end is not None):
+            raise CommandError('-i cannot be combined with -b or -e')
+        if budget is not None:
+            if any(option is not None for option in (index, begin, end)):
+                raise CommandError('-B cannot be combined with -i, -b, or -e')
+            if budget < 1:
+                raise CommandError('-B must be a positive number')
+            if shortlist is not None:
+                raise CommandError('-B cannot be combined with -S')
+        if shortlist is not None and shortlist < 1:
+            raise CommandError('-S must be a positive number')
+
+        grid = ParameterGrid.default()
+        if grid_filepath:
+            grid = ParameterGrid.from_file(grid_filepath)
 
         parameters = None
-        with open(parameters_filepath) as file_:
-            for (i, line) in enumerate(file_):
-                if index == i:
-                    line = line.strip('\n')
-                    parameters = tuple(float(p) for p in line.split(','))
-                    break
-
-        if parameters is None:
-            raise CommandError('{0} is an invalid index'.format(i))
+        if budget is None:
+            if index is not None:
+                (begin, end) = (index, index + 1)
+            parameters = list(grid.iterate(begin=begin or 0, end=end))
+
+            if not parameters:
+                raise CommandError('No parameter sets in the specified range')
+
+        # Results are saved to the shard, if one is configured
+        shards.create()
+        # Parameter sets that have been saved are ignored only when the
+        #   database that results are saved to has the unique constraint
+        using = router.db_for_write(Sensitivity)
+        if schema.add_sensitivity_unique(using):
+            print('Added the unique constraint of sensitivity to {0}'.format(
+                using
+            ))
 
         subject = Subject.objects.get(name=subject)
         releases = Release.objects.filter(subject=subject)
@@ -95,5 +182,11 @@ class Command(BaseCommand):
         ma, mi, pa = helpers.get_version_components(release)
         release = releases.get(major=ma, minor=mi, patch=pa)
 
-        subject.initialize(release)
-        utilities.analyze_sensitivity(subject, parameters)
+        subject.initialize(release, 'function')
+        if budget is not None:
+            utilities.search_sensitivity(subject, grid, budget, processes)
+        else:
+            utilities.analyze_sensitivity(
+                subject, parameters, processes, resume=resume,
+                shortlist=shortlist
+            )
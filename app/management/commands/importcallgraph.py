@@ -0,0 +1,109 @@
+import os
+
+from optparse import make_option, OptionValueError
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from app import constants, helpers, subjects
+from app.errors import InvalidVersionError, StaleCallGraphError
+from app.models import *
+
+
+def check_release(option, opt_str, value, parser, *args, **kwargs):
+    setattr(parser.values, option.dest, value)
+    if value:
+        try:
+            ma, mi, pa = helpers.get_version_components(value)
+            releases = Release.objects.filter(major=ma, minor=mi, patch=pa)
+
+            if not releases.exists():
+                raise OptionValueError(
+                    'Release %s does not exist in the database.' % value
+                )
+        except InvalidVersionError:
+            raise OptionValueError(
+                'Invalid release number specified. %s must be formatted as '
+                '0.0.0' % opt_str
+            )
+
+
+class Command(BaseCommand):
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '-s', choices=list(constants.SUBJECTS.keys()), dest='subject',
+            help='Name of the subject to import the call graphs of.'
+        ),
+        make_option(
+            '-r', type='str', action='callback', callback=check_release,
+            dest='release',
+            help=(
+                'Release number of the subject to import the call graph of, '
+                'e.g. 2.6.0. Default is None, in which case the call graphs '
+                'of all releases of the subject are imported.'
+            )
+        ),
+        make_option(
+            '-g', dest='granularity', choices=['function', 'file'],
+            help='The granularity of the call graph to import.'
+        ),
+        make_option(
+            '-f', type='str', action='store', dest='path',
+            help=(
+                'Path to the pickled call graph to import. Default is None, '
+                'in which case call_graph.<granularity>.pickle in the scratch '
+                'directory of the release is imported.'
+            )
+        ),
+        make_option(
+            '-F', action='store_true', dest='force', default=False,
+            help=(
+                'Import a pickled call graph even if it is older than the '
+                'cflow, gprof, or defenses files of the release, which the '
+                'imported call graph is cached by regardless of the files it '
+                'was loaded from.'
+            )
+        ),
+    )
+
+    help = (
+        'Imports call graphs pickled by earlier versions of loaddb into the '
+        'call graph cache.'
+    )
+
+    def handle(self, *args, **options):
+        subject = options['subject']
+        release = options['release']
+        granularity = options['granularity']
+        path = options['path']
+        force = options['force']
+
+        if subject not in settings.ENABLED_SUBJECTS:
+            raise CommandError('Subject {0} is not enabled'.format(subject))
+        if path and not release:
+            raise CommandError('Release number must be specified with -f')
+
+        subject = Subject.objects.get(name=subject)
+        releases = Release.objects.filter(subject=subject)
+        if release:
+            ma, mi, pa = helpers.get_version_components(release)
+            releases = releases.filter(major=ma, minor=mi, patch=pa)
+
+        for release in releases:
+            _subject = subjects.SubjectCreator.from_subject(subject)
+            _subject.initialize(release, granularity)
+
+            _path = path or _subject.legacy_pickle_path
+            if not os.path.exists(_path):
+                helpers.debug('{0} does not exist'.format(_path))
+                continue
+            if not _subject.is_prepared:
+                raise CommandError('{0} not prepared.'.format(release))
+
+            try:
+                _subject.import_call_graph(_path, force=force)
+            except StaleCallGraphError as error:
+                raise CommandError(
+                    '{0}. Specify -F to import it regardless.'.format(
+                        error.value
+                    )
+                )
@@ -8,7 +8,7 @@ from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.db import transaction
 
-from app import constants, helpers
+from app import constants, helpers, schema
 from app.models import *
 from app.subjects import SubjectCreator
 
@@ -18,13 +18,19 @@ class Command(BaseCommand):
 
     def handle(self, *args, **options):
         try:
+            # Databases created before the ordinal of releases was added
+            #   lack the column, which _number_releases() assigns
+            if schema.add_release_ordinal():
+                print('Added the ordinal of releases')
             with transaction.atomic():
                 subjects = self._load_subjects()
                 self._load_branches(subjects)
                 self._load_releases(subjects)
+                self._number_releases()
                 self._load_cves(subjects)
                 self._map_cve_to_release(subjects)
                 self._load_vulnerability_fix_overrides(subjects)
+            clear_vulnerability_fixes()
         except Exception as e:
             sys.stderr.write(
                 'ERROR: initdb failed. All database changes aborted.\n'
@@ -95,6 +101,14 @@ class Command(BaseCommand):
                     )
                     release.save()
 
+    def _number_releases(self):
+        for subject in Subject.objects.all():
+            count = Release.objects.number(subject)
+            if count:
+                print('Numbered {} releases of {}'.format(
+                    count, subject.name
+                ))
+
     def _load_cves(self, subjects):
         for subject in subjects:
             cves_file = helpers.get_absolute_path(
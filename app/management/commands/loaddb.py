@@ -2,7 +2,7 @@ from optparse import make_option, OptionValueError
 from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
 
-from app import constants, helpers, subjects, utilities
+from app import constants, helpers, shards, subjects, utilities
 from app.errors import InvalidVersionError
 from app.models import *
 
@@ -47,7 +47,12 @@ class Command(BaseCommand):
         ),
         make_option(
             '-g', dest='granularity', choices=['function', 'file'],
-            help='The granularity of the call graph to load into the database.'
+            help=(
+                'The granularity of the call graph to load into the database. '
+                'Default is None, in which case the function granularity call '
+                'graph is loaded and the file granularity call graph is '
+                'contracted from it, loading both in a single run.'
+            )
         )
     )
 
@@ -65,6 +70,9 @@ class Command(BaseCommand):
         if subject not in settings.ENABLED_SUBJECTS:
             raise CommandError('Subject {0} is not enabled'.format(subject))
 
+        # Metrics are saved to the shard, if one is configured
+        shards.create()
+
         subject = Subject.objects.get(name=subject)
         releases = Release.objects.filter(subject=subject, is_loaded=False)
         subject = subjects.SubjectCreator.from_subject(subject)
@@ -72,11 +80,20 @@ class Command(BaseCommand):
         if release:
             ma, mi, pa = helpers.get_version_components(release)
             release = releases.get(major=ma, minor=mi, patch=pa)
-            is_rerun = ReleaseStatistics.objects.filter(
-                    release=release, granularity=granularity
-                ).exists()
-            if is_rerun:
-                raise CommandError('{0} already loaded.'.format(release))
+            # The release may have been loaded to the default database or,
+            #   by an earlier run of this task, to the shard
+            for using in shards.get_databases(ReleaseStatistics):
+                statistics = ReleaseStatistics.objects.using(using).filter(
+                    release=release
+                )
+                if granularity:
+                    statistics = statistics.filter(granularity=granularity)
+                if statistics.exists():
+                    raise CommandError('{0} already loaded.'.format(release))
 
-        subject.initialize(release, granularity)
-        utilities.load(subject, processes)
+        if granularity:
+            subject.initialize(release, granularity)
+            utilities.load(subject, processes)
+        else:
+            subject.initialize(release, 'function')
+            utilities.load(subject, processes, contract=True)
@@ -0,0 +1,36 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app import schema, shards
+
+
+class Command(BaseCommand):
+    args = '<shard shard ...>'
+    help = (
+        'Merge the metrics and the sensitivity analyses saved to shards (see '
+        'the SHARD environment variable in settings) into the database.'
+    )
+
+    def handle(self, *args, **options):
+        if not args:
+            raise CommandError('At least one shard must be specified')
+        for path in args:
+            if not os.path.isfile(path):
+                raise CommandError('{0} is not a valid path'.format(path))
+        if shards.is_enabled():
+            raise CommandError('Shards cannot be merged while SHARD is set')
+
+        # Sensitivity rows of parameter sets that the database has are
+        #   ignored only when the database has the unique constraint
+        if schema.add_sensitivity_unique():
+            print('Added the unique constraint of sensitivity')
+
+        for path in args:
+            counts = shards.merge(path)
+            print('{0}: {1}'.format(
+                path, ', '.join(
+                    '{0}={1}'.format(table, count)
+                    for (table, count) in sorted(counts.items())
+                )
+            ))
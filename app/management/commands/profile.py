@@ -48,6 +48,36 @@ class Command(BaseCommand):
                 'of all gmon.out files available for a particular release.'
             )
         ),
+        make_option(
+            '-a', action='store_true', dest='all', default=False,
+            help=(
+                'Generate gprof.txt files for all gmon.out files available '
+                'for a particular release, skipping those that are up to '
+                'date.'
+            )
+        ),
+        make_option(
+            '-p', type='int', dest='processes',
+            default=settings.PARALLEL['SUBPROCESSES'],
+            help='Number of processes to spawn when -a is specified.',
+        ),
+        make_option(
+            '-n', type='int', dest='group_size',
+            default=settings.GPROF['GROUP_SIZE'],
+            help=(
+                'Number of gmon.out files to sum into each gprof.txt file '
+                'when -a is specified. Defaults to GPROF[\'GROUP_SIZE\'] in '
+                'settings, which is also what loaddb loads.'
+            )
+        ),
+        make_option(
+            '-b', action='store_true', dest='compare', default=False,
+            help=(
+                'Compare the call graph loaded from the gprof.txt files of '
+                'individual gmon.out files with that loaded from the '
+                'gprof.txt files of summed gmon.out files. Requires -n.'
+            )
+        ),
     )
     help = (
         'Generates gprof.txt file for a corresponding gmon.out file.'
@@ -57,7 +87,15 @@ class Command(BaseCommand):
         subject = options['subject']
         release = options['release']
         index = options['index']
+        all_ = options['all']
+        processes = options['processes']
+        group_size = options['group_size']
+        compare = options['compare']
 
+        if index is None and not all_ and not compare:
+            raise CommandError('One of -i, -a, and -b must be specified')
+        if compare and not group_size:
+            raise CommandError('-b requires -n')
         if subject not in settings.ENABLED_SUBJECTS:
             raise CommandError('Subject {0} is not enabled'.format(subject))
 
@@ -68,4 +106,24 @@ class Command(BaseCommand):
             )
         subject = subjects.SubjectCreator.from_subject(subject)
         subject.initialize(release)
-        subject.gprof(index)
+        if all_:
+            subject.gmon_group_size = group_size
+            if utilities.profile(subject, processes):
+                raise CommandError('gprof failed for some gmon.out files')
+        elif index is not None:
+            # The gprof file of an individual gmon file is written to the
+            #   directory of individual gprof files, whatever the group size
+            subject.gmon_group_size = None
+            subject.gprof(index)
+
+        if compare:
+            comparison = utilities.compare_profiles(
+                subject, group_size, processes
+            )
+            for key in ['individual', 'summed', 'differences']:
+                print('{0}: {1}'.format(
+                    key, ', '.join(
+                        '{0}={1}'.format(name, value)
+                        for (name, value) in sorted(comparison[key].items())
+                    )
+                ))
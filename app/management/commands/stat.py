@@ -142,6 +142,10 @@ def stat(**options):
     cflow_call_graph = None
     gprof_call_graph = None
 
+    # The call graphs are built from the files given rather than loaded
+    #   through a subject, since the files need not belong to a release, so
+    #   the cache of compact call graphs (see Subject.load_call_graph) does
+    #   not apply. The statistics need a CallGraph regardless.
     begin = datetime.datetime.now()
     if cflow_path:
         fragmentize = False
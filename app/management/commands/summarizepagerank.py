@@ -0,0 +1,80 @@
+import os
+
+from optparse import make_option, OptionValueError
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from app import pagerank
+
+
+def check_path(option, opt_str, value, parser, *args, **kwargs):
+    setattr(parser.values, option.dest, value)
+    if value and not os.path.exists(value):
+        raise OptionValueError('{0} is not a valid path'.format(value))
+
+
+class Command(BaseCommand):
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '-f', type='str', action='callback', callback=check_path,
+            dest='log', default=settings.PAGE_RANK['LOG'],
+            help=(
+                'Path to the JSON lines file of the records of PageRank '
+                'solutions. Defaults to PAGE_RANK[\'LOG\'] in settings.'
+            )
+        ),
+        make_option(
+            '-n', type='int', dest='slowest', default=10,
+            help='Number of the slowest solutions to report.'
+        ),
+    )
+    help = (
+        'Summarize the convergence and the cost of the PageRank solutions '
+        'recorded in a log, reporting slow and non-converging '
+        'configurations.'
+    )
+
+    def handle(self, *args, **options):
+        log = options['log']
+        slowest = options['slowest']
+
+        if not log:
+            raise CommandError('-f must be specified when PAGE_RANK[\'LOG\'] '
+                               'is not set')
+        if not os.path.exists(log):
+            raise CommandError('{0} does not exist'.format(log))
+
+        summary = pagerank.summarize(pagerank.read_log(log), slowest=slowest)
+
+        print('Records: {0}'.format(', '.join(
+            '{0}={1}'.format(method, count)
+            for (method, count) in sorted(summary['methods'].items())
+        )))
+
+        print('')
+        print('{0:>8} {1:>10} {2:>9} {3:>10} {4:>10} {5:>10} {6:>10}'.format(
+            'Damping', 'Solutions', 'Failures', 'Mean iter', 'Max iter',
+            'Mean s', 'Max s'
+        ))
+        for row in summary['dampings']:
+            print(
+                '{damping:>8} {solutions:>10} {failures:>9} '
+                '{mean_iterations:>10.1f} {max_iterations:>10} '
+                '{mean_seconds:>10.4f} {max_seconds:>10.4f}'.format(**row)
+            )
+
+        print('')
+        print('Non-converging configurations: {0}'.format(
+            len(summary['failures'])
+        ))
+        for (configuration, count) in summary['failures']:
+            print('  {0} x {1}'.format(count, configuration))
+
+        print('')
+        print('Slowest solutions:')
+        for record in summary['slowest']:
+            print(
+                '  {seconds:.4f}s {method} {iterations} iterations, '
+                'residual {residual}, {nodes} nodes, {edges} edges, '
+                'damping {damping}, weights {weights}'.format(**record)
+            )
@@ -6,6 +6,9 @@ from app import constants, helpers, subjects, utilities
 from app.errors import InvalidVersionError
 from app.models import *
 
+# Fields that can be updated
+FIELDS = ['page_rank', 'sloc']
+
 
 def check_release(option, opt_str, value, parser, *args, **kwargs):
     setattr(parser.values, option.dest, value)
@@ -41,7 +44,11 @@ class Command(BaseCommand):
         ),
         make_option(
             '-f', type='str', action='store', dest='field',
-            help='Name of the database field to update.'
+            help=(
+                'Name of the database field to update, or a comma-separated '
+                'list of names of fields to update in one run. One or more '
+                'of {0}.'.format(', '.join(FIELDS))
+            )
         ),
         make_option(
             '-g', dest='granularity', choices=['function', 'file'],
@@ -79,10 +86,12 @@ class Command(BaseCommand):
         if not subject_exists:
             raise CommandError('{0} not loaded.'.format(release))
 
+        fields = [name.strip() for name in field.split(',')]
+        for name in fields:
+            if name not in FIELDS:
+                raise CommandError(
+                    'Updating {0} is not supported'.format(name)
+                )
+
         subject.initialize(release, granularity)
-        if 'page_rank' in field:
-            utilities.update_pagerank(subject)
-        elif 'sloc' in field:
-            utilities.update_sloc(subject)
-        else:
-            raise CommandError('Updating {0} is not supported'.format(field))
+        utilities.update(subject, fields)
@@ -1,6 +1,7 @@
 from django.db import models
+from django.db.models.signals import post_delete, post_save
 
-from app import constants
+from app import constants, errors
 
 
 class Subject(models.Model):
@@ -44,6 +45,71 @@ class Branch(models.Model):
         db_table = 'branch'
 
 
+class ReleaseManager(models.Manager):
+    def before(self, release):
+        """Return the releases of the subject of a release that precede the
+        release chronologically, i.e. that have a lower ordinal.
+        """
+        _check_numbered(release)
+        return self.filter(
+            subject_id=release.subject_id, ordinal__lt=release.ordinal
+        )
+
+    def after(self, release):
+        """Return the releases of the subject of a release that succeed the
+        release chronologically, i.e. that have a higher ordinal.
+        """
+        _check_numbered(release)
+        return self.filter(
+            subject_id=release.subject_id, ordinal__gt=release.ordinal
+        )
+
+    def between(self, first, last):
+        """Return the releases from one release to another, both inclusive,
+        in chronological order.
+        """
+        if first.subject_id != last.subject_id:
+            raise Exception('Cannot compare releases of different subjects')
+        _check_numbered(first)
+        _check_numbered(last)
+
+        return self.filter(
+            subject_id=first.subject_id,
+            ordinal__range=(first.ordinal, last.ordinal)
+        ).order_by('ordinal')
+
+    def number(self, subject):
+        """Assign the ordinal of each release of a subject, i.e. the position
+        of the release, from one, in the order of the date and the version
+        of the releases.
+
+        Returns
+        -------
+        count : int
+            The number of releases that the ordinal changed for.
+        """
+        count = 0
+        releases = self.filter(subject=subject).order_by(
+            'date', 'major', 'minor', 'patch'
+        ).values_list('id', 'ordinal')
+        for (ordinal, (id_, current)) in enumerate(releases, start=1):
+            if ordinal != current:
+                self.filter(id=id_).update(ordinal=ordinal)
+                count += 1
+        return count
+
+
+# The ordinal of a release is zero until the releases of the subject are
+#   numbered, e.g. when the release was created after initdb or the database
+#   predates the ordinal, in which case comparing ordinals is meaningless
+def _check_numbered(release):
+    if release.ordinal == 0:
+        raise errors.UnnumberedReleaseError(
+            'Release {0} is not numbered. Run initdb to number the '
+            'releases.'.format(release.pk)
+        )
+
+
 class Release(models.Model):
     subject = models.ForeignKey(Subject)
     branch = models.ForeignKey(Branch)
@@ -55,19 +121,22 @@ class Release(models.Model):
     patch = models.PositiveIntegerField(default=0, blank=True)
     reference = models.CharField(max_length=50)
 
+    # Position of the release in the chronological order of the releases of
+    #   the subject, which initdb assigns (see ReleaseManager.number())
+    ordinal = models.PositiveIntegerField(default=0)
+
     is_loaded = models.BooleanField(default=False)
 
+    objects = ReleaseManager()
+
     @property
     def past_vulnerability_fixes(self):
         if not hasattr(self, '_past_fixes'):
             self._past_fixes = set()
 
-            for release in Release.objects.filter(subject=self.subject):
-                if release <= self:
-                    for cve_release in release.cverelease_set.all():
-                        self._past_fixes.update(set(
-                                cve_release.vulnerabilityfix_set.all()
-                            ))
+            for (key, fixes) in _get_fixes(self.subject_id):
+                if _precedes(key, self.key) or key == self.key:
+                    self._past_fixes.update(fixes)
 
         return self._past_fixes
 
@@ -76,15 +145,16 @@ class Release(models.Model):
         if not hasattr(self, '_future_fixes'):
             self._future_fixes = set()
 
-            for release in Release.objects.filter(subject=self.subject):
-                if release > self:
-                    for cve_release in release.cverelease_set.all():
-                        self._future_fixes.update(set(
-                                cve_release.vulnerabilityfix_set.all()
-                            ))
+            for (key, fixes) in _get_fixes(self.subject_id):
+                if _succeeds(key, self.key):
+                    self._future_fixes.update(fixes)
 
         return self._future_fixes
 
+    @property
+    def key(self):
+        return (self.date, self.major, self.minor, self.patch)
+
     @property
     def version(self):
         return '{0}.{1}.{2}'.format(self.major, self.minor, self.patch)
@@ -152,6 +222,7 @@ class Release(models.Model):
 
     class Meta:
         unique_together = ('subject', 'major', 'minor', 'patch')
+        index_together = ('subject', 'ordinal')
         app_label = 'app'
         db_table = 'release'
 
@@ -349,5 +420,67 @@ class Sensitivity(models.Model):
         return str(self)
 
     class Meta:
+        unique_together = (
+            'release', 'damping', 'personalization_entry',
+            'personalization_exit', 'personalization_other', 'weight_call',
+            'weight_return', 'weight_dangerous', 'weight_defense',
+            'weight_tested', 'weight_vulnerable'
+        )
         app_label = 'app'
         db_table = 'sensitivity'
+
+
+# Vulnerability fixes of each subject, keyed by the primary key of the
+#   subject, as a list of (key, fixes) tuples with one tuple for each
+#   release that has vulnerability fixes (see _get_fixes())
+_FIXES = dict()
+
+
+def clear_vulnerability_fixes():
+    """Clear the vulnerability fixes of the subjects resolved in this process.
+
+    The vulnerability fixes are cleared whenever a vulnerability fix or a
+    mapping of a vulnerability to a release is saved or deleted. Writes that
+    send no signals, i.e. bulk_create(), update(), and delete() of a
+    queryset and raw SQL, as well as changes to the date or the version of
+    a release, must be followed by a call to this function.
+    """
+    _FIXES.clear()
+
+
+def _clear_vulnerability_fixes(sender, **kwargs):
+    clear_vulnerability_fixes()
+
+
+def _get_fixes(subject_id):
+    # Fetches the vulnerability fixes of all releases of a subject in a single
+    #   query, the first time the fixes of the subject are resolved in the
+    #   process, and groups them by the key of the release
+    if subject_id not in _FIXES:
+        fixes = dict()
+        queryset = VulnerabilityFix.objects.filter(
+            cve_release__release__subject_id=subject_id
+        ).select_related('cve_release__release')
+        for fix in queryset:
+            release = fix.cve_release.release
+            fixes.setdefault(release.key, set()).add(fix)
+        _FIXES[subject_id] = list(fixes.items())
+    return _FIXES[subject_id]
+
+
+def _precedes(key, other):
+    # Equivalent to Release.__lt__ on the keys of two releases
+    return key[0] < other[0] and key[1:] < other[1:]
+
+
+def _succeeds(key, other):
+    # Equivalent to Release.__gt__ on the keys of two releases
+    return (
+        key[0] > other[0] and key[1:3] == other[1:3] and key[3] > other[3]
+    )
+
+
+post_save.connect(_clear_vulnerability_fixes, sender=CveRelease)
+post_delete.connect(_clear_vulnerability_fixes, sender=CveRelease)
+post_save.connect(_clear_vulnerability_fixes, sender=VulnerabilityFix)
+post_delete.connect(_clear_vulnerability_fixes, sender=VulnerabilityFix)
@@ -0,0 +1,727 @@
+import collections
+import datetime
+import json
+import os
+import time
+
+import numpy
+import scipy.sparse
+
+from app.compact import CompactCallGraph
+
+# Defaults identical to those of networkx.pagerank
+TOLERANCE = 1.0e-6
+MAX_ITERATIONS = 100
+
+# Classes of edges, each a column of PageRank.classes, in the order of the
+#   coefficients returned by _get_coefficients(). An edge is a call or a
+#   return, and is further classified by the attributes of its callee, just
+#   as CallGraph.assign_weights weighs it.
+CLASSES = ['call', 'return', 'dangerous', 'defense', 'tested', 'vulnerable']
+
+# Defaults of the Monte Carlo estimate of the page rank (see
+#   PageRank.estimate())
+WALKS = 100000
+BATCHES = 10
+
+
+class PageRank(object):
+    """Sparse matrix implementation of the personalized PageRank of a call
+    graph.
+
+    The structure of the call graph is converted to a sparse matrix once, when
+    the instance is constructed, and the page rank is computed by power
+    iteration over the matrix. The algorithm, including the treatment of
+    dangling nodes and the criterion for convergence, is identical to that of
+    networkx.pagerank, which CallGraph.get_page_rank uses, and the page ranks
+    are therefore identical within the tolerance.
+
+    Each solution is retained and, unless a warm start is disabled, used as
+    the starting vector of the next solution, which converges in fewer
+    iterations when the parameters differ little from the previous ones (e.g.
+    consecutive parameter sets in a sensitivity analysis).
+
+    Personalized PageRank is linear in the personalization vector up to
+    normalization, i.e. the page rank for the personalization
+    entry * E + exit * X + other * O, where E, X, and O are the indicators of
+    entry points, exit points, and the remaining nodes, is the normalized
+    linear combination of three basis vectors that depend on the damping
+    and the weights alone (see solve_basis() and combine()). The page ranks
+    for any number of personalizations therefore cost three solutions.
+
+    Edges are classified once, when the instance is constructed, such that
+    the weights of all edges for a set of weights (see assign_weights()) are
+    the product of a sparse matrix of edge classes and a vector of six
+    coefficients rather than a pass over the edges of the call graph.
+
+    The page rank may also be estimated, rather than solved for, by simulating
+    random walks with restart (see estimate()), which is cheaper than a
+    solution on large call graphs when an approximation suffices, e.g. to
+    screen parameter sets before solving for the promising ones.
+
+    When a log is specified, a record of the cost and the convergence of each
+    solution (and estimate) is appended to it as a line of JSON (see
+    read_log() and summarize()).
+    """
+
+    def __init__(self, call_graph, tolerance=TOLERANCE,
+                 max_iterations=MAX_ITERATIONS, log=None, context=None):
+        """PageRank constructor.
+
+        Parameters
+        ----------
+        call_graph : attacksurfacemeter.call_graph.CallGraph or
+                     app.compact.CompactCallGraph
+            The call graph to compute the page rank of nodes in. The structure
+            of a compact call graph is read from its arrays, which may be
+            memory-mapped, without constructing a CallGraph. The weights of
+            the edges of a compact call graph can only be set with
+            set_weights() or assign_weights().
+        tolerance : float, optional
+            The tolerance of the power iteration. The iteration has converged
+            when the L1 norm of the difference between successive vectors is
+            less than the number of nodes times the tolerance.
+        max_iterations : int, optional
+            The maximum number of iterations of the power iteration.
+        log : str, optional
+            The path to the JSON lines file to append a record of each
+            solution to. Default is None, in which case solutions are not
+            recorded.
+        context : dict, optional
+            Fields to include in every record, e.g. the release that the
+            call graph is of.
+        """
+        begin = time.time()
+
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        self.log = log
+        self.context = context or dict()
+
+        if isinstance(call_graph, CompactCallGraph):
+            self.call_graph = None
+            self.nodes = call_graph.get_nodes()
+            # Edges are in the order of the adjacency of the compact call graph
+            self.edges = None
+            self.rows = call_graph.get_callers()
+            self.columns = numpy.asarray(call_graph.indices, dtype=numpy.int64)
+            self.entry = call_graph.get_node_mask('entry')
+            self.exit = call_graph.get_node_mask('exit')
+            self.classes = _get_compact_classes(call_graph, self.columns)
+        else:
+            self.call_graph = call_graph
+            graph = call_graph.call_graph
+
+            self.nodes = list(graph.nodes())
+            index = {node: i for (i, node) in enumerate(self.nodes)}
+
+            # Edges in a fixed order that the weights are enumerated in
+            self.edges = list(graph.edges())
+            self.rows = numpy.array(
+                [index[caller] for (caller, _) in self.edges],
+                dtype=numpy.int64
+            )
+            self.columns = numpy.array(
+                [index[callee] for (_, callee) in self.edges],
+                dtype=numpy.int64
+            )
+
+            entry_points = [index[node] for node in call_graph.entry_points]
+            self.entry = numpy.zeros(len(self.nodes), dtype=bool)
+            self.entry[entry_points] = True
+            exit_points = [index[node] for node in call_graph.exit_points]
+            self.exit = numpy.zeros(len(self.nodes), dtype=bool)
+            self.exit[exit_points] = True
+
+            self.classes = _get_classes(graph, self.edges)
+
+        # The structure of the transition matrix is fixed. The position of
+        #   the value of each edge in the data of the matrix is found by
+        #   constructing the matrix with the (1-based) index of each edge.
+        count = len(self.nodes)
+        self.matrix = scipy.sparse.csr_matrix(
+            (
+                numpy.arange(1, len(self.rows) + 1, dtype=numpy.float64),
+                (self.columns, self.rows)
+            ),
+            shape=(count, count)
+        )
+        self._order = self.matrix.data.astype(numpy.int64) - 1
+
+        # Edges ordered by caller, and the offset of the out-edges of each
+        #   node in that order, for sampling the successor of a node
+        self._successors = numpy.argsort(self.rows, kind='mergesort')
+        self._offsets = numpy.concatenate((
+            [0], numpy.cumsum(numpy.bincount(self.rows, minlength=count))
+        ))
+        self._cumulative = None
+
+        self.dangling = None
+        self.solution = None
+        self.basis_solutions = None
+
+        # The weights last assigned, the time taken to construct the matrix,
+        #   and that taken to last set its weights, which are recorded with
+        #   each solution
+        self.weights = None
+        self.build_seconds = None
+        self.weight_seconds = None
+
+        if self.call_graph is None:
+            # A compact call graph has no weights, i.e. each edge weighs 1
+            self.set_weights(numpy.ones(len(self.rows)))
+        else:
+            self.update_weights()
+        self.build_seconds = time.time() - begin
+
+    def update_weights(self, weight='weight'):
+        """Update the transition matrix from the weights of the edges.
+
+        Must be invoked after the weights of the edges of the call graph are
+        (re)assigned, e.g. by CallGraph.assign_weights.
+
+        Parameters
+        ----------
+        weight : str, optional
+            The name of the edge attribute that holds the weight of the edge.
+            An edge without the attribute has a weight of 1.
+        """
+        if self.call_graph is None:
+            raise Exception(
+                'The weights of a compact call graph must be set with '
+                'set_weights() or assign_weights()'
+            )
+
+        graph = self.call_graph.call_graph
+        weights = numpy.array(
+            [
+                graph.edge[caller][callee].get(weight, 1)
+                for (caller, callee) in self.edges
+            ],
+            dtype=numpy.float64
+        )
+        self.set_weights(weights)
+        self.weights = None
+
+    def set_weights(self, weights):
+        """Set the transition matrix from an array of edge weights.
+
+        Parameters
+        ----------
+        weights : numpy.ndarray
+            The weight of each edge, in the order of edges.
+        """
+        begin = time.time()
+        count = len(self.nodes)
+
+        out_weights = numpy.bincount(
+            self.rows, weights=weights, minlength=count
+        )
+        self.dangling = out_weights == 0
+
+        # Transition probabilities are transposed (i.e. callee by caller) such
+        #   that an iteration is a product of the matrix and a column vector
+        scale = numpy.zeros(count)
+        scale[~self.dangling] = 1.0 / out_weights[~self.dangling]
+        probabilities = weights * scale[self.rows]
+        self.matrix.data = probabilities[self._order]
+
+        # The cumulative transition probability of the out-edges of each node,
+        #   offset by the index of the node, such that the out-edges of node
+        #   i span (i, i + 1] and the successor of node i for a uniform
+        #   random number u is found by a binary search for i + u
+        rows = self.rows[self._successors]
+        cumulative = numpy.cumsum(probabilities[self._successors])
+        starts = numpy.concatenate(([0.0], cumulative))[self._offsets[:-1]]
+        self._cumulative = cumulative - starts[rows] + rows
+
+        self.weight_seconds = time.time() - begin
+
+    def get_weights(self, weights):
+        """Return the weight of each edge for a set of weights.
+
+        Parameters
+        ----------
+        weights : dict
+            A dictionary of weights in the format accepted by
+            CallGraph.assign_weights, i.e. with the weights of calls and
+            returns in 'base' and the optional weights 'dangerous',
+            'defense', 'tested', and 'vulnerable'.
+
+        Returns
+        -------
+        weights : numpy.ndarray
+            The weight of each edge, in the order of edges, identical to the
+            weight that CallGraph.assign_weights assigns to the edge.
+        """
+        return self.classes.dot(_get_coefficients(weights))
+
+    def assign_weights(self, weights):
+        """Set the transition matrix from a set of weights.
+
+        Unlike CallGraph.assign_weights, the edges of the call graph are not
+        modified.
+
+        Parameters
+        ----------
+        weights : dict
+            A dictionary of weights (see get_weights()).
+        """
+        self.set_weights(self.get_weights(weights))
+        self.weights = weights
+
+    def get_personalization(self, entry, exit, other):
+        """Return the personalization vector, in the order of nodes.
+
+        The personalization of a node that is both an entry point and an exit
+        point is entry + exit, as in CallGraph.get_page_rank.
+
+        Parameters
+        ----------
+        entry : float
+            The personalization of an entry point.
+        exit : float
+            The personalization of an exit point.
+        other : float
+            The personalization of a node that is neither an entry point nor
+            an exit point.
+
+        Returns
+        -------
+        personalization : numpy.ndarray
+            The personalization of each node, not normalized.
+        """
+        personalization = numpy.full(len(self.nodes), other, dtype=float)
+        personalization[self.entry] = entry
+        personalization[self.exit] = exit
+        personalization[self.entry & self.exit] = entry + exit
+        return personalization
+
+    def solve(self, damping, personalization, warm=True, start=None,
+              record=None):
+        """Compute the page rank of nodes by power iteration.
+
+        Parameters
+        ----------
+        damping : float
+            The damping parameter used in the PageRank algorithm.
+        personalization : numpy.ndarray
+            The personalization of each node, in the order of nodes. The
+            vector is normalized to sum to 1.
+        warm : bool, optional
+            When True, the power iteration starts from the previous solution,
+            if any, rather than the uniform vector.
+        start : numpy.ndarray, optional
+            The vector that the power iteration starts from, overriding warm.
+        record : dict, optional
+            Fields to include in the record of the solution, e.g. the
+            parameters that the personalization was computed from.
+
+        Returns
+        -------
+        page_rank : numpy.ndarray
+            The page rank of each node, in the order of nodes.
+        """
+        count = len(self.nodes)
+        if count == 0:
+            return numpy.zeros(0)
+
+        p = personalization / personalization.sum()
+
+        x = numpy.full(count, 1.0 / count)
+        if start is not None:
+            x = start
+        elif warm and self.solution is not None:
+            x = self.solution
+
+        begin = time.time()
+        residual = None
+        for iteration in range(1, self.max_iterations + 1):
+            xlast = x
+            dangling = xlast[self.dangling].sum()
+            x = (
+                damping * (self.matrix.dot(xlast) + dangling * p) +
+                (1.0 - damping) * p
+            )
+            residual = numpy.absolute(x - xlast).sum()
+            if residual < count * self.tolerance:
+                self._record(
+                    'solve', damping, record, iterations=iteration,
+                    residual=residual, converged=True,
+                    seconds=time.time() - begin
+                )
+                self.solution = x
+                return x
+
+        self._record(
+            'solve', damping, record, iterations=self.max_iterations,
+            residual=residual, converged=False, seconds=time.time() - begin
+        )
+        raise Exception(
+            'PageRank failed to converge in {0} iterations'.format(
+                self.max_iterations
+            )
+        )
+
+    def solve_basis(self, damping, warm=True):
+        """Compute the basis vectors of the page rank for a damping.
+
+        The page rank x solved for the personalization p (normalized to sum to
+        1) satisfies (I - damping * M) x = c * p, where M is the transition
+        matrix and c = damping * (sum of x over dangling nodes) +
+        (1 - damping). Hence (I - damping * M)^-1 p, which is linear in p, is
+        x / c. A basis vector is that vector for the (unnormalized) indicator
+        of the entry points, the exit points, or the remaining nodes.
+
+        Parameters
+        ----------
+        damping : float
+            The damping parameter used in the PageRank algorithm.
+        warm : bool, optional
+            When True, the power iteration for each basis vector starts from
+            the previous solution for the same basis vector, if any.
+
+        Returns
+        -------
+        basis : numpy.ndarray
+            A matrix, with a row for each node and a column for each of
+            entry, exit, and other, to pass to combine(). The column of an
+            empty indicator is zero.
+        """
+        count = len(self.nodes)
+
+        indicators = [self.entry, self.exit, ~(self.entry | self.exit)]
+        names = ['entry', 'exit', 'other']
+        if self.basis_solutions is None:
+            self.basis_solutions = [None] * len(indicators)
+
+        basis = numpy.zeros((count, len(indicators)))
+        for (i, indicator) in enumerate(indicators):
+            size = indicator.sum()
+            if size == 0:
+                continue
+
+            start = self.basis_solutions[i] if warm else None
+            x = self.solve(
+                damping, indicator.astype(float), warm=False, start=start,
+                record={'basis': names[i]}
+            )
+            self.basis_solutions[i] = x
+
+            c = damping * x[self.dangling].sum() + (1.0 - damping)
+            basis[:, i] = x * size / c
+
+        return basis
+
+    def combine(self, basis, entry, exit, other):
+        """Compute the page rank of nodes from basis vectors.
+
+        Parameters
+        ----------
+        basis : numpy.ndarray
+            The basis vectors returned by solve_basis().
+        entry : float
+            The personalization of an entry point.
+        exit : float
+            The personalization of an exit point.
+        other : float
+            The personalization of a node that is neither an entry point nor
+            an exit point.
+
+        Returns
+        -------
+        page_rank : numpy.ndarray
+            The page rank of each node, in the order of nodes, identical
+            (within the tolerance) to that returned by solve() for the
+            damping that the basis vectors were solved for and the
+            personalization get_personalization(entry, exit, other).
+        """
+        x = basis.dot(numpy.array([entry, exit, other], dtype=float))
+        return x / x.sum()
+
+    def estimate(self, damping, personalization, walks=WALKS,
+                 batches=BATCHES, random_state=None, record=None):
+        """Estimate the page rank of nodes by random walks with restart.
+
+        A walk starts at a node sampled from the personalization and, at each
+        step, ends with probability 1 - damping or else moves to a successor
+        of the current node, sampled in proportion to the weight of the
+        edge, or to a node sampled from the personalization if the current
+        node is dangling. The page rank of a node is estimated by the
+        fraction of all visits that are visits to the node. Walks are
+        simulated in batches of walks that advance together, and the
+        standard error of the estimate is that of the mean of the estimates
+        of the batches.
+
+        Parameters
+        ----------
+        damping : float
+            The damping parameter used in the PageRank algorithm.
+        personalization : numpy.ndarray
+            The personalization of each node, in the order of nodes.
+        walks : int, optional
+            The number of walks to simulate. The error of the estimate
+            decreases with the square root of the number of walks.
+        batches : int, optional
+            The number of batches to divide the walks into.
+        random_state : int or numpy.random.RandomState, optional
+            The seed or the state of the random number generator. Default is
+            None, in which case the generator is seeded from the operating
+            system, e.g. such that the processes of a pool do not simulate
+            identical walks.
+        record : dict, optional
+            Fields to include in the record of the estimate (see solve()).
+
+        Returns
+        -------
+        page_rank : numpy.ndarray
+            The estimated page rank of each node, in the order of nodes.
+        error : numpy.ndarray
+            The standard error of the estimate of each node, in the order of
+            nodes, or NaN when the walks are simulated in a single batch.
+        """
+        count = len(self.nodes)
+        if count == 0:
+            return (numpy.zeros(0), numpy.zeros(0))
+
+        if not isinstance(random_state, numpy.random.RandomState):
+            random_state = numpy.random.RandomState(random_state)
+
+        begin = time.time()
+        restart = numpy.cumsum(personalization, dtype=numpy.float64)
+        size = max(1, walks // batches)
+
+        steps = 0
+        estimates = numpy.empty((batches, count))
+        for batch in range(batches):
+            visits = numpy.zeros(count)
+            position = _sample(restart, random_state.random_sample(size))
+            while position.size:
+                steps += 1
+                visits += numpy.bincount(position, minlength=count)
+
+                position = position[
+                    random_state.random_sample(position.size) < damping
+                ]
+                u = random_state.random_sample(position.size)
+                dangling = self.dangling[position]
+                position[dangling] = _sample(restart, u[dangling])
+                position[~dangling] = self._get_successors(
+                    position[~dangling], u[~dangling]
+                )
+            estimates[batch] = visits / visits.sum()
+
+        page_rank = estimates.mean(axis=0)
+        error = numpy.full(count, numpy.nan)
+        if batches > 1:
+            error = estimates.std(axis=0, ddof=1) / numpy.sqrt(batches)
+
+        self._record(
+            'estimate', damping, dict(record or dict(), walks=walks),
+            iterations=steps, residual=float(error.max()), converged=True,
+            seconds=time.time() - begin
+        )
+        return (page_rank, error)
+
+    def _get_successors(self, nodes, u):
+        positions = numpy.searchsorted(self._cumulative, nodes + u, 'right')
+        positions = numpy.clip(
+            positions, self._offsets[nodes], self._offsets[nodes + 1] - 1
+        )
+        return self.columns[self._successors[positions]]
+
+    def get_page_rank(self, damping=0.85, entry=10000, exit=10000, other=1,
+                      warm=True, record=None):
+        """Compute the page rank of nodes in the call graph.
+
+        The parameters, and the return value, are those of
+        CallGraph.get_page_rank, except for warm and record (see solve()).
+
+        Returns
+        -------
+        page_rank : dict
+            A dictionary keyed by node with the page rank as the value.
+        """
+        page_rank = self.solve(
+            damping, self.get_personalization(entry, exit, other), warm=warm,
+            record=dict(
+                record or dict(), entry=entry, exit=exit, other=other
+            )
+        )
+        return dict(zip(self.nodes, page_rank.tolist()))
+
+    def _record(self, method, damping, record, **fields):
+        if self.log is None:
+            return
+
+        record_ = dict(self.context)
+        record_.update({
+            'created_at': datetime.datetime.now().isoformat(),
+            'process': os.getpid(),
+            'method': method,
+            'nodes': len(self.nodes),
+            'edges': len(self.rows),
+            'damping': damping,
+            'weights': self.weights,
+            'tolerance': self.tolerance,
+            'max_iterations': self.max_iterations,
+            'build_seconds': self.build_seconds,
+            'weight_seconds': self.weight_seconds,
+        })
+        record_.update(record or dict())
+        record_.update(fields)
+        if record_['residual'] is not None:
+            record_['residual'] = float(record_['residual'])
+
+        # A record is appended with a single write such that the records of
+        #   the processes of a pool sharing the log are not interleaved
+        with open(self.log, 'a') as file_:
+            file_.write(json.dumps(record_) + '\n')
+
+
+def read_log(path):
+    """Read the records of solutions from a log.
+
+    Parameters
+    ----------
+    path : str
+        The path to the JSON lines file that PageRank appended the records
+        to.
+
+    Returns
+    -------
+    records : list
+        A list of dictionaries, one for each record in the log, skipping any
+        line that is not valid JSON (e.g. one truncated by an interrupted
+        process).
+    """
+    records = list()
+    with open(path, 'r') as file_:
+        for line in file_:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records
+
+
+def summarize(records, slowest=10):
+    """Summarize the convergence and the cost of solutions.
+
+    Parameters
+    ----------
+    records : list
+        A list of records of solutions, e.g. as returned by read_log().
+    slowest : int, optional
+        The number of the slowest solutions to report.
+
+    Returns
+    -------
+    summary : dict
+        A dictionary with the number of records by method ('methods'), the
+        statistics of solutions by damping ('dampings'), the configurations
+        that failed to converge with the number of failures of each
+        ('failures'), and the slowest solutions ('slowest').
+    """
+    methods = collections.Counter(record['method'] for record in records)
+
+    solutions = collections.defaultdict(list)
+    for record in records:
+        if record['method'] == 'solve':
+            solutions[record['damping']].append(record)
+
+    dampings = list()
+    for (damping, records_) in sorted(solutions.items()):
+        iterations = [record['iterations'] for record in records_]
+        seconds = [record['seconds'] for record in records_]
+        dampings.append({
+            'damping': damping,
+            'solutions': len(records_),
+            'failures': sum(
+                1 for record in records_ if not record['converged']
+            ),
+            'mean_iterations': numpy.mean(iterations),
+            'max_iterations': max(iterations),
+            'mean_seconds': numpy.mean(seconds),
+            'max_seconds': max(seconds),
+        })
+
+    failures = collections.Counter(
+        _get_configuration(record)
+        for record in records if not record['converged']
+    )
+
+    return {
+        'methods': dict(methods),
+        'dampings': dampings,
+        'failures': failures.most_common(),
+        'slowest': sorted(
+            records, key=lambda record: record['seconds'], reverse=True
+        )[:slowest],
+    }
+
+
+def _get_configuration(record):
+    # The configuration that a solution is of, as a hashable string
+    fields = [
+        'release', 'granularity', 'damping', 'weights', 'entry', 'exit',
+        'other', 'basis'
+    ]
+    return json.dumps(
+        {field: record[field] for field in fields if field in record},
+        sort_keys=True
+    )
+
+
+def _sample(cumulative, u):
+    # Indices sampled from a distribution given by its (unnormalized)
+    #   cumulative sum for uniform random numbers u
+    indices = numpy.searchsorted(cumulative, u * cumulative[-1], 'right')
+    return numpy.minimum(indices, len(cumulative) - 1)
+
+
+def _get_classes(graph, edges):
+    rows = list()
+    columns = list()
+    for (i, (caller, callee)) in enumerate(edges):
+        attrs = graph.edge[caller][callee]
+        if 'call' in attrs:
+            rows.append(i)
+            columns.append(0)
+        elif 'return' in attrs:
+            rows.append(i)
+            columns.append(1)
+
+        callee_attrs = graph.node[callee]
+        for (j, attribute) in enumerate(CLASSES[2:], start=2):
+            if attribute in callee_attrs:
+                rows.append(i)
+                columns.append(j)
+
+    return scipy.sparse.csr_matrix(
+        (numpy.ones(len(rows)), (rows, columns)),
+        shape=(len(edges), len(CLASSES))
+    )
+
+
+def _get_compact_classes(call_graph, callees):
+    # Equivalent to _get_classes() on the arrays of a compact call graph, in
+    #   the order of its adjacency
+    calls = call_graph.get_edge_mask('call')
+    columns = [
+        calls, ~calls & call_graph.get_edge_mask('return')
+    ] + [
+        call_graph.get_node_mask(attribute)[callees]
+        for attribute in CLASSES[2:]
+    ]
+    return scipy.sparse.csr_matrix(
+        numpy.column_stack(columns).astype(numpy.float64)
+    )
+
+
+def _get_coefficients(weights):
+    return numpy.array(
+        [weights['base']['call'], weights['base']['return']] +
+        [weights.get(attribute, 0) for attribute in CLASSES[2:]],
+        dtype=numpy.float64
+    )
@@ -0,0 +1,109 @@
+import collections
+
+import numpy
+
+
+ATTRIBUTES = ['entry', 'exit', 'defense', 'dangerous']
+
+
+def get_proximity(call_graph, attribute):
+    """Compute the proximity of every node to nodes identified by attribute.
+
+    The proximity of a node is the mean of the lengths of the shortest paths
+    from the node to each of the nodes identified by attribute that the node
+    has a path to. Rather than searching forward from every node in the call
+    graph, a breadth-first search is run backward (i.e. over predecessors)
+    from every node identified by attribute, accumulating the path lengths
+    and the number of reachable targets per node.
+
+    Parameters
+    ----------
+    call_graph : attacksurfacemeter.call_graph.CallGraph
+        The call graph to compute the proximity in.
+    attribute : str
+        The name of the attribute that identifies the target nodes.
+
+    Returns
+    -------
+    proximity : dict
+        A dictionary keyed by node with the proximity as the value. The value
+        is 0.0 for a node that has the attribute itself and None for a node
+        that has no path to any of the target nodes. The values are identical
+        to the mean of the lengths returned by
+        CallGraph.get_shortest_path_length(node, attribute).
+    """
+    graph = call_graph.call_graph
+
+    nodes = graph.nodes()
+    index = {node: i for (i, node) in enumerate(nodes)}
+
+    sums = numpy.zeros(len(nodes), dtype=numpy.int64)
+    counts = numpy.zeros(len(nodes), dtype=numpy.int64)
+
+    targets = call_graph.get_nodes(attribute)
+    for target in targets:
+        (indices, lengths) = _reverse_bfs(graph, target, index)
+        sums[indices] += lengths
+        counts[indices] += 1
+
+    proximity = dict()
+    for (node, i) in index.items():
+        if counts[i] > 0:
+            proximity[node] = int(sums[i]) / int(counts[i])
+        else:
+            proximity[node] = None
+
+    for target in targets:
+        proximity[target] = 0.0
+
+    return proximity
+
+
+def get_proximities(call_graph, attributes=ATTRIBUTES):
+    """Compute the proximity of every node to each of a set of attributes.
+
+    Parameters
+    ----------
+    call_graph : attacksurfacemeter.call_graph.CallGraph
+        The call graph to compute the proximities in.
+    attributes : list, optional
+        The names of the attributes that identify the target nodes.
+
+    Returns
+    -------
+    proximities : dict
+        A dictionary keyed by attribute with the dictionary returned by
+        get_proximity() as the value.
+    """
+    return {
+        attribute: get_proximity(call_graph, attribute)
+        for attribute in attributes
+    }
+
+
+def _reverse_bfs(graph, source, index):
+    lengths = {source: 0}
+
+    queue = collections.deque([source])
+    while queue:
+        node = queue.popleft()
+        length = lengths[node] + 1
+        for predecessor in graph.pred[node]:
+            if predecessor not in lengths:
+                lengths[predecessor] = length
+                queue.append(predecessor)
+
+    # The source is excluded since a path from a node to itself is only
+    #   considered when the node is a target, in which case the proximity is
+    #   overridden to 0.0
+    del lengths[source]
+
+    indices = numpy.fromiter(
+        (index[node] for node in lengths), dtype=numpy.int64,
+        count=len(lengths)
+    )
+    lengths = numpy.fromiter(
+        lengths.values(), dtype=numpy.int64, count=len(lengths)
+    )
+
+    return (indices, lengths)
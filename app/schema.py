@@ -0,0 +1,113 @@
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from app.helpers import debug
+from app.models import Release, Sensitivity
+
+# The app has no migrations, so migrate creates the tables of models that a
+#   database does not have but neither adds the columns of fields added to
+#   a model nor the indexes of constraints added to a model. The functions
+#   below upgrade the tables of databases created before the change.
+
+
+def add_release_ordinal(using=DEFAULT_DB_ALIAS):
+    """Add the ordinal column of the release table, and the index of the
+    subject and the ordinal, to a database that does not have them.
+
+    The ordinal of the releases is zero until the releases are numbered
+    (see ReleaseManager.number).
+
+    Parameters
+    ----------
+    using : str
+        Alias of the database to upgrade.
+
+    Returns
+    -------
+    added : bool
+        True if the column was added and False if the database had it.
+    """
+    connection = connections[using]
+    field = Release._meta.get_field('ordinal')
+    if field.column in _get_columns(connection, Release._meta.db_table):
+        return False
+
+    with connection.schema_editor() as editor:
+        editor.add_field(Release, field)
+        # SQLite remakes the table, along with the index, to add a column
+        columns = ['subject_id', field.column]
+        if not _has_index(connection, Release._meta.db_table, columns):
+            editor.alter_index_together(
+                Release, set(), Release._meta.index_together
+            )
+    return True
+
+
+def add_sensitivity_unique(using=DEFAULT_DB_ALIAS):
+    """Add the unique constraint of the release and the parameters of the
+    sensitivity table to a database that does not have it.
+
+    Saving the sensitivity of a parameter set that has been saved is ignored
+    only when the constraint exists (see utilities.analyze_sensitivity and
+    shards.merge). The duplicate rows of parameter sets saved before the
+    constraint existed are deleted, keeping the row saved first.
+
+    Parameters
+    ----------
+    using : str
+        Alias of the database to upgrade.
+
+    Returns
+    -------
+    added : bool
+        True if the constraint was added and False if the database had it.
+    """
+    connection = connections[using]
+    table = Sensitivity._meta.db_table
+    (unique,) = Sensitivity._meta.unique_together
+    columns = [Sensitivity._meta.get_field(field).column for field in unique]
+    if _has_index(connection, table, columns, unique=True):
+        return False
+
+    quote = connection.ops.quote_name
+    pk = quote(Sensitivity._meta.pk.column)
+    # The derived table is needed by MySQL, which cannot select from the
+    #   table that it deletes from
+    sql = (
+        'DELETE FROM {table} WHERE {pk} NOT IN (SELECT {pk} FROM (SELECT '
+        'MIN({pk}) AS {pk} FROM {table} GROUP BY {columns}) AS kept)'
+    ).format(
+        table=quote(table), pk=pk,
+        columns=', '.join(quote(column) for column in columns)
+    )
+    with transaction.atomic(using=using):
+        with connection.cursor() as cursor:
+            cursor.execute(sql)
+            debug('Deleted {0} duplicate sensitivity rows'.format(
+                cursor.rowcount
+            ))
+    with connection.schema_editor() as editor:
+        editor.alter_unique_together(
+            Sensitivity, set(), Sensitivity._meta.unique_together
+        )
+    return True
+
+
+def _get_columns(connection, table):
+    with connection.cursor() as cursor:
+        return [
+            column.name
+            for column in connection.introspection.get_table_description(
+                cursor, table
+            )
+        ]
+
+
+def _has_index(connection, table, columns, unique=False):
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    for constraint in constraints.values():
+        if constraint['columns'] != columns:
+            continue
+        if constraint['unique'] or (not unique and constraint['index']):
+            return True
+    return False
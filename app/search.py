@@ -0,0 +1,171 @@
+import numpy
+
+# Number of values of each axis in the coarse lattice that the search starts
+#   from, i.e. the first and the last value of each axis
+POINTS = 2
+
+# Number of the best parameter sets that are refined around in each round
+WIDTH = 4
+
+
+class CoarseToFineSearch(object):
+    """Adaptive search of a ParameterGrid for the parameter sets with the
+    smallest p-value and the largest magnitude of Cohen's d.
+
+    The search evaluates a coarse lattice of the grid and then, in rounds,
+    the neighbors of the best parameter sets evaluated, i.e. the parameter
+    sets that are a stride away from one of them along a single axis. When
+    every neighbor of the best parameter sets has been evaluated, the stride
+    of each axis is halved. The search ends when the neighbors at a stride of
+    one have been evaluated or when the budget of evaluations is exhausted.
+
+    The search is driven by the caller, which evaluates the parameter sets
+    returned by propose() and passes the results to update(), such that the
+    parameter sets of a round are evaluated in parallel and saved just as
+    those of a grid.
+    """
+
+    def __init__(self, grid, budget, points=POINTS, width=WIDTH):
+        """CoarseToFineSearch constructor.
+
+        Parameters
+        ----------
+        grid : app.grid.ParameterGrid
+            The grid to search.
+        budget : int
+            The maximum number of parameter sets to evaluate.
+        points : int, optional
+            The number of values of each axis in the coarse lattice, which
+            are evenly spaced from the first to the last value of the axis.
+        width : int, optional
+            The number of the best parameter sets evaluated that are refined
+            around in each round.
+        """
+        self.grid = grid
+        self.budget = budget
+        self.width = width
+
+        self.shape = tuple(len(values) for (_, values) in grid.axes)
+        self.strides = [
+            max(1, int(numpy.ceil((size - 1) / max(points - 1, 1))))
+            for size in self.shape
+        ]
+        self.lattice = [
+            sorted(set(range(0, size, stride)) | {size - 1})
+            for (size, stride) in zip(self.shape, self.strides)
+        ]
+
+        # Results of the parameter sets evaluated, keyed by index
+        self.results = dict()
+        self._proposed = set()
+        self._started = False
+
+    @property
+    def remaining(self):
+        return self.budget - len(self._proposed)
+
+    @property
+    def best(self):
+        """The results of the best parameter sets evaluated.
+
+        Returns
+        -------
+        best : list
+            A list of tuples of the index of a parameter set, the parameter
+            set, the p-value, and Cohen's d, in decreasing order of
+            significance, of at most width parameter sets.
+        """
+        results = sorted(self.results.values(), key=get_score)
+        return results[:self.width]
+
+    def propose(self):
+        """Return the parameter sets to evaluate in the next round.
+
+        Returns
+        -------
+        parameters : list
+            A list of tuples of the index of a parameter set and the
+            parameter set. The list is empty when the search has ended.
+        """
+        if self.remaining <= 0:
+            return list()
+
+        if not self._started:
+            self._started = True
+            indices = numpy.ravel_multi_index(
+                numpy.meshgrid(*self.lattice, indexing='ij'), self.shape
+            ).ravel().tolist()
+            return self._propose(indices)
+
+        while True:
+            indices = list()
+            for (index, _, _, _) in self.best:
+                indices.extend(self._get_neighbors(index))
+            indices = [
+                index for index in _unique(indices)
+                if index not in self._proposed
+            ]
+            if indices:
+                return self._propose(indices)
+            if all(stride == 1 for stride in self.strides):
+                return list()
+            self.strides = [(stride + 1) // 2 for stride in self.strides]
+
+    def update(self, results):
+        """Record the results of evaluated parameter sets.
+
+        Parameters
+        ----------
+        results : iterable
+            An iterable of tuples of the index of a parameter set, the
+            parameter set, the p-value, and Cohen's d.
+        """
+        for (index, parameters, p, d) in results:
+            self.results[index] = (index, parameters, p, d)
+
+    def _propose(self, indices):
+        indices = indices[:self.remaining]
+        self._proposed.update(indices)
+        return [(index, self.grid[index]) for index in indices]
+
+    def _get_neighbors(self, index):
+        coordinates = numpy.unravel_index(index, self.shape)
+        for (axis, stride) in enumerate(self.strides):
+            for step in (-stride, stride):
+                neighbor = list(coordinates)
+                neighbor[axis] += step
+                if 0 <= neighbor[axis] < self.shape[axis]:
+                    yield int(numpy.ravel_multi_index(neighbor, self.shape))
+
+
+def get_score(result):
+    """Return the key that orders the results of parameter sets from the
+    most to the least significant.
+
+    The smallest p-value is the most significant, with ties (e.g. p-values
+    that are zero to machine precision) broken by the largest magnitude of
+    Cohen's d. A NaN p-value is the least significant.
+
+    Parameters
+    ----------
+    result : tuple
+        A tuple of the index of a parameter set, the parameter set, the
+        p-value, and Cohen's d.
+
+    Returns
+    -------
+    score : tuple
+        A key that sorts the most significant result first.
+    """
+    (index, _, p, d) = result
+    p = numpy.inf if numpy.isnan(p) else p
+    d = 0.0 if numpy.isnan(d) else d
+    return (p, -abs(d), index)
+
+
+def _unique(items):
+    seen = set()
+    for item in items:
+        if item not in seen:
+            seen.add(item)
+            yield item
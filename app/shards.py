@@ -0,0 +1,174 @@
+from django.conf import settings
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from app.models import (
+    File, Function, Release, ReleaseStatistics, Sensitivity
+)
+
+# Alias of the shard database in DATABASES, which is configured when the
+#   SHARD environment variable is set (see settings)
+SHARD = 'shard'
+
+# Names of the models that are read from and written to the shard
+SHARDED = [
+    model._meta.model_name
+    for model in (Function, File, ReleaseStatistics, Sensitivity)
+]
+
+
+class ShardRouter(object):
+    """Database router that routes the models that a loaddb or an
+    analyzesensitivity task writes to the shard, when one is configured.
+
+    The remaining models (e.g. Subject and Release) are read from the default
+    database, such that tasks running concurrently, each with its own shard,
+    do not serialize on the lock of the default database. The shards are
+    merged into the default database by mergedb (see merge()).
+    """
+
+    def _get_database(self, model):
+        if SHARD in settings.DATABASES and model._meta.model_name in SHARDED:
+            return SHARD
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._get_database(model)
+
+    def db_for_write(self, model, **hints):
+        return self._get_database(model)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Instances in the shard refer to releases in the default database
+        return True
+
+
+def is_enabled():
+    return SHARD in settings.DATABASES
+
+
+def get_databases(model):
+    """Return the aliases of the databases that rows of a model may have been
+    saved to, i.e. the default database, which the shards of earlier tasks
+    have been merged into, and the shard, if one is configured and the model
+    is routed to it.
+    """
+    databases = [DEFAULT_DB_ALIAS]
+    if is_enabled() and model._meta.model_name in SHARDED:
+        databases.append(SHARD)
+    return databases
+
+
+def create():
+    """Create the schema of the default database in the shard, if a shard is
+    configured and the schema has not been created.
+    """
+    if is_enabled():
+        call_command(
+            'migrate', database=SHARD, interactive=False, verbosity=0
+        )
+
+
+def merge(path):
+    """Merge a shard into the default database.
+
+    The shard is attached to the default database, which must be a SQLite
+    database, and the rows of the sharded models are copied in a single
+    transaction, each assigned a new primary key. The functions (or files) of
+    a release are copied only along with the release statistics of the
+    release at the granularity, which loaddb saves last, and only when the
+    default database has no release statistics of the release at the
+    granularity. Sensitivity rows of parameter sets that the default database
+    has are ignored. Releases that have release statistics at both
+    granularities are marked as loaded.
+
+    Parameters
+    ----------
+    path : str
+        The path to the SQLite database of the shard.
+
+    Returns
+    -------
+    counts : dict
+        A dictionary keyed by the name of a table with the number of rows
+        copied to the table as the value.
+    """
+    connection = connections[DEFAULT_DB_ALIAS]
+    if connection.vendor != 'sqlite':
+        raise Exception('Shards can only be merged into a SQLite database')
+
+    quote = connection.ops.quote_name
+    statistics = quote(ReleaseStatistics._meta.db_table)
+    release = quote(Release._meta.db_table)
+
+    counts = dict()
+    cursor = connection.cursor()
+    # A database cannot be attached in a transaction
+    cursor.execute('ATTACH DATABASE %s AS shard', [path])
+    try:
+        with transaction.atomic():
+            for (model, granularity) in [
+                    (Function, 'function'), (File, 'file')]:
+                counts[model._meta.db_table] = _copy(
+                    connection, cursor, model, (
+                        'release_id IN ('
+                        'SELECT release_id FROM shard.{0} '
+                        'WHERE granularity = %s AND release_id NOT IN ('
+                        'SELECT release_id FROM main.{0} '
+                        'WHERE granularity = %s))'
+                    ).format(statistics),
+                    [granularity, granularity]
+                )
+
+            counts[ReleaseStatistics._meta.db_table] = _copy(
+                connection, cursor, ReleaseStatistics, (
+                    'NOT EXISTS ('
+                    'SELECT 1 FROM main.{0} AS m '
+                    'WHERE m.release_id = shard.{0}.release_id '
+                    'AND m.granularity = shard.{0}.granularity)'
+                ).format(statistics)
+            )
+
+            # Sensitivity is unique on the release and the parameters
+            counts[Sensitivity._meta.db_table] = _copy(
+                connection, cursor, Sensitivity, ignore=True
+            )
+
+            cursor.execute(
+                'UPDATE main.{0} SET is_loaded = 1 WHERE id IN ('
+                'SELECT release_id FROM main.{1} GROUP BY release_id '
+                'HAVING COUNT(*) = 2)'.format(release, statistics)
+            )
+    finally:
+        cursor.execute('DETACH DATABASE shard')
+
+    return counts
+
+
+def _copy(connection, cursor, model, where=None, params=None, ignore=False):
+    # Copies the rows of a model from the shard that satisfy a condition,
+    #   leaving the primary key to be assigned, and returns the number of
+    #   rows copied. Rows of releases that are not in the default database
+    #   (e.g. of a shard of another database) are not copied.
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    columns = ', '.join(
+        quote(field.column) for field in model._meta.concrete_fields
+        if not field.primary_key
+    )
+
+    conditions = ['release_id IN (SELECT id FROM main.{0})'.format(
+        quote(Release._meta.db_table)
+    )]
+    if where:
+        conditions.append(where)
+
+    cursor.execute(
+        '{0} INTO main.{1} ({2}) SELECT {2} FROM shard.{1} '
+        'WHERE {3}'.format(
+            'INSERT OR IGNORE' if ignore else 'INSERT', table, columns,
+            ' AND '.join(conditions)
+        ),
+        params or list()
+    )
+    return cursor.rowcount
@@ -0,0 +1,104 @@
+import sqlite3
+
+FUNC_SLOC_QUERY = '''
+    SELECT name, file, sloc FROM function
+'''
+FILE_SLOC_QUERY = '''
+    SELECT name, sloc FROM file
+'''
+
+# Placeholder for a key that does not match exactly one row in the SLOC
+#   database
+_NOT_UNIQUE = object()
+
+
+class SlocIndex(object):
+    """In-memory index of the SLOC database of a release.
+
+    The function and file tables of the SLOC database are read once, when the
+    index is constructed, into dictionaries keyed by (name, file) and name.
+    Lookups follow the semantics of querying the database by key and using
+    the result only when exactly one row matches, i.e. a key that matches more
+    than one row is treated as a miss.
+
+    The index is never modified after construction and is therefore safe to
+    share (e.g. by fork inheritance) with multiple processes.
+    """
+
+    def __init__(self, path):
+        """SlocIndex constructor.
+
+        Parameters
+        ----------
+        path : str
+            The path to the SQLite database containing the SLOC of the
+            functions and files in a release.
+        """
+        self._functions = dict()
+        self._function_names = dict()
+        self._files = dict()
+
+        connection = sqlite3.connect(path)
+        try:
+            cursor = connection.cursor()
+
+            cursor.execute(FUNC_SLOC_QUERY)
+            for (name, file_, sloc) in cursor:
+                self._add(self._functions, (name, file_), sloc)
+                self._add(self._function_names, name, sloc)
+
+            cursor.execute(FILE_SLOC_QUERY)
+            for (name, sloc) in cursor:
+                self._add(self._files, name, sloc)
+        finally:
+            connection.close()
+
+    def get_function_sloc(self, name, file_):
+        """Return the SLOC of a function.
+
+        The function is looked up by its name and the file it is defined in
+        and, when that fails, by its name alone.
+
+        Parameters
+        ----------
+        name : str
+            The name of the function.
+        file_ : str
+            The path of the file that the function is defined in.
+
+        Returns
+        -------
+        sloc : int
+            The SLOC of the function or None if the function could not be
+            uniquely identified.
+        """
+        sloc = self._get(self._functions, (name, file_))
+        if sloc is _NOT_UNIQUE:
+            sloc = self._get(self._function_names, name)
+        return None if sloc is _NOT_UNIQUE else sloc
+
+    def get_file_sloc(self, name):
+        """Return the SLOC of a file.
+
+        Parameters
+        ----------
+        name : str
+            The path of the file.
+
+        Returns
+        -------
+        sloc : int
+            The SLOC of the file or None if the file could not be uniquely
+            identified.
+        """
+        sloc = self._get(self._files, name)
+        return None if sloc is _NOT_UNIQUE else sloc
+
+    def _add(self, index, key, sloc):
+        if key in index:
+            index[key] = _NOT_UNIQUE
+        else:
+            index[key] = sloc
+
+    def _get(self, index, key):
+        return index.get(key, _NOT_UNIQUE)
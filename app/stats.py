@@ -1,6 +1,7 @@
 import math
 
 import numpy
+import scipy.stats
 
 
 def cohensd(treatment, control, pooled=True):
@@ -37,3 +38,118 @@ def cohensd(treatment, control, pooled=True):
         sd = numpy.std(numpy.concatenate((treatment, control)), ddof=1)
 
     return ((treatment.mean() - control.mean()) / sd)
+
+
+def batch_ranksums(scores, treatment):
+    """Compute the Wilcoxon rank-sum statistic for many samples at once.
+
+    Each column of scores is a sample of metric values, of which the rows
+    identified by treatment are the treatment group and the remaining rows
+    the control group. The statistic and the p-value of each column are
+    identical to those returned by scipy.stats.ranksums for that column.
+
+    Parameters
+    ----------
+    scores : numpy.ndarray
+        A two-dimensional array with a row for each observation and a column
+        for each sample.
+    treatment : numpy.ndarray
+        A boolean array, with an element for each row of scores, that is True
+        for the observations in the treatment group.
+
+    Returns
+    -------
+    z : numpy.ndarray
+        The test statistic of each column.
+    p : numpy.ndarray
+        The two-sided p-value of each column.
+    """
+    n1 = numpy.count_nonzero(treatment)
+    n2 = len(treatment) - n1
+
+    ranks = rankdata(scores)
+    s = ranks[treatment].sum(axis=0)
+    expected = n1 * (n1 + n2 + 1) / 2.0
+    z = (s - expected) / math.sqrt(n1 * n2 * (n1 + n2 + 1) / 12.0)
+    p = 2 * scipy.stats.norm.sf(numpy.absolute(z))
+
+    return (z, p)
+
+
+def batch_cohensd(scores, treatment, pooled=True):
+    """Compute Cohen's d effect size measure for many samples at once.
+
+    Parameters
+    ----------
+    scores : numpy.ndarray
+        A two-dimensional array with a row for each observation and a column
+        for each sample.
+    treatment : numpy.ndarray
+        A boolean array, with an element for each row of scores, that is True
+        for the observations in the treatment group.
+    pooled : bool, optional
+        See cohensd.
+
+    Returns
+    -------
+    d : numpy.ndarray
+        The Cohen's d effect size measure of each column, identical to that
+        returned by cohensd for that column.
+    """
+    _treatment = scores[treatment]
+    control = scores[~treatment]
+
+    if pooled:
+        n1 = len(_treatment)
+        n2 = len(control)
+
+        sd1 = numpy.std(_treatment, axis=0, ddof=1)
+        sd2 = numpy.std(control, axis=0, ddof=1)
+
+        sd = numpy.sqrt(
+                ((n1 - 1) * sd1 ** 2 + (n2 - 1) * sd2 ** 2) / (n1 + n2 - 2)
+            )
+    else:
+        sd = numpy.std(scores, axis=0, ddof=1)
+
+    return ((_treatment.mean(axis=0) - control.mean(axis=0)) / sd)
+
+
+def rankdata(scores):
+    """Rank the values in each column of an array.
+
+    Tied values are assigned the average of the ranks that they span, as by
+    scipy.stats.rankdata.
+
+    Parameters
+    ----------
+    scores : numpy.ndarray
+        A two-dimensional array.
+
+    Returns
+    -------
+    ranks : numpy.ndarray
+        An array, of the shape of scores, of the (1-based) rank of each value
+        in its column.
+    """
+    (n, k) = scores.shape
+    rows = numpy.arange(n).reshape(n, 1)
+    columns = numpy.arange(k)
+
+    order = numpy.argsort(scores, axis=0, kind='mergesort')
+    sorted_ = scores[order, columns]
+
+    # A run of tied values spans the positions from its first to its last
+    first = numpy.ones((n, k), dtype=bool)
+    first[1:] = sorted_[1:] != sorted_[:-1]
+    last = numpy.ones((n, k), dtype=bool)
+    last[:-1] = first[1:]
+
+    begin = numpy.maximum.accumulate(numpy.where(first, rows, 0), axis=0)
+    end = numpy.minimum.accumulate(
+        numpy.where(last, rows, n)[::-1], axis=0
+    )[::-1]
+
+    ranks = numpy.empty((n, k))
+    ranks[order, columns] = (begin + end) / 2.0 + 1
+    return ranks
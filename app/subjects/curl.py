@@ -5,6 +5,16 @@ from app.subjects import subject
 
 
 class cURL(subject.Subject):
+    # Examples:
+    #   /home/rady/curl/src/src/../lib/rawstr.c > ./lib/help.c
+    #   /home/rady/curl/src/src/lib/rawstr.c > ./lib/help.c
+    #   /home/rady/curl/src/lib/utils.c     > ./lib/utils.c
+    GPROF_PATH_RULES = [('{0}/src/..', '.'), ('{0}/src', '.'), ('{0}', '.')]
+    GPROF_BINARY = 'src/.libs/curl'
+    # Profile of an execution without arguments, which gprof processes with
+    #   -z to include the functions that were never called
+    GMON_UNSUMMED = ['basegmon.out']
+
     def __init__(self, name, remote, scratch_root):
         super().__init__(name, remote, scratch_root)
 
@@ -35,36 +45,10 @@ class cURL(subject.Subject):
             'information from {1}'.format(self.name, gmon_path)
         )
         if 'basegmon.out' in gmon_path:
-            cmd = 'gprof -q -b -l -c -z -L src/.libs/curl {0}'
+            cmd = 'gprof -q -b -l -c -z -L {0} {1}'
         else:
-            cmd = 'gprof -q -b -l -c -L src/.libs/curl {0}'
-
-        cmd = cmd.format(gmon_path, gprof_path)
-
-        with open(gprof_path, 'w+') as _gprof_file:
-            returncode = self.execute(cmd, stdout=_gprof_file)
-
-        # gprof's -L is printing absolute path instead of relative path.
-        #   Fixing the paths using sed.
-        # Examples:
-        #   /home/rady/curl/src/src/../lib/rawstr.c > ./lib/help.c
-        #   /home/rady/curl/src/src/lib/rawstr.c > ./lib/help.c
-        #   /home/rady/curl/src/lib/utils.c     > ./lib/utils.c
+            cmd = 'gprof -q -b -l -c -L {0} {1}'
 
-        self.execute(
-            "sed -i 's;{0}\/src\/\.\.;.;g' {1}".format(
-                self.source_dir.replace('/', '\/'), gprof_path
-            )
-        )
-        self.execute(
-            "sed -i 's;{0}\/src;.;g' {1}".format(
-                self.source_dir.replace('/', '\/'), gprof_path
-            )
-        )
-        self.execute(
-            "sed -i 's;{0};.;g' {1}".format(
-                self.source_dir.replace('/', '\/'), gprof_path
-            )
-        )
+        cmd = cmd.format(self.GPROF_BINARY, gmon_path)
 
-        return returncode
+        return self.execute_gprof(cmd, gprof_path)
@@ -5,6 +5,13 @@ from app.subjects import subject
 
 
 class FFmpeg(subject.Subject):
+    # Examples:
+    #   /home/rady/ffmpeg/./libavutil/internal.h > ./libavutil/internal.h
+    #   /home/rady/ffmpeg//libavfilter/common.h  > ./libavfilter/common.h
+    #   /home/rady/ffmpeg/libavcodec/utils.c     > ./libavcodec/utils.c
+    GPROF_PATH_RULES = [('{0}/.', '.'), ('{0}//', './'), ('{0}', '.')]
+    GPROF_BINARY = 'ffmpeg_g'
+
     def __init__(self, name, remote, scratch_root):
         super().__init__(name, remote, scratch_root)
 
@@ -31,33 +38,7 @@ class FFmpeg(subject.Subject):
             'Generating call graph for {0} using gprof with profile '
             'information from {1}'.format(self.name, gmon_path)
         )
-        cmd = 'gprof -q -b -l -c -L ffmpeg_g {0}'
-        cmd = cmd.format(gmon_path)
-
-        with open(gprof_path, 'w+') as _gprof_file:
-            returncode = self.execute(cmd, stdout=_gprof_file)
-
-        # gprof's -L is printing absolute path instead of relative path.
-        #   Fixing the paths using sed.
-        # Examples:
-        #   /home/rady/ffmpeg/./libavutil/internal.h > ./libavutil/internal.h
-        #   /home/rady/ffmpeg//libavfilter/common.h  > ./libavfilter/common.h
-        #   /home/rady/ffmpeg/libavcodec/utils.c     > ./libavcodec/utils.c
-
-        self.execute(
-            "sed -i 's;{0}\/\.;.;g' {1}".format(
-                self.source_dir.replace('/', '\/'), gprof_path
-            )
-        )
-        self.execute(
-            "sed -i 's;{0}\/\/;./;g' {1}".format(
-                self.source_dir.replace('/', '\/'), gprof_path
-            )
-        )
-        self.execute(
-            "sed -i 's;{0};.;g' {1}".format(
-                self.source_dir.replace('/', '\/'), gprof_path
-            )
-        )
+        cmd = 'gprof -q -b -l -c -L {0} {1}'
+        cmd = cmd.format(self.GPROF_BINARY, gmon_path)
 
-        return returncode
+        return self.execute_gprof(cmd, gprof_path)
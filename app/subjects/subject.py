@@ -1,14 +1,17 @@
+import copy
 import csv
+import hashlib
 import json
 import os
 import pickle
 import re
 import shutil
 import subprocess as sp
-import sqlite3
+import tempfile
 from urllib import parse
 
 import requests
+from django.conf import settings
 from attacksurfacemeter.call import Call
 from attacksurfacemeter.call_graph import CallGraph
 from attacksurfacemeter.environments import Environments
@@ -16,27 +19,34 @@ from attacksurfacemeter.granularity import Granularity
 from attacksurfacemeter.loaders.cflow_loader import CflowLoader
 from attacksurfacemeter.loaders.gprof_loader import GprofLoader
 from attacksurfacemeter.loaders.multigprof_loader import MultigprofLoader
-from app import constants, errors, helpers
+from app import (
+    constants, contraction, errors, helpers, pagerank, proximity
+)
+from app.cache import CallGraphCache
+from app.compact import CompactCallGraph
 from app.gitapi import Repo
-
-FUNC_SLOC_QUERY_PRIMARY = '''
-    SELECT name, file, sloc FROM function WHERE name = ? AND file = ?
-'''
-FUNC_SLOC_QUERY_SECONDARY = '''
-    SELECT name, file, sloc FROM function WHERE name = ?
-'''
-FILE_SLOC_QUERY = '''
-    SELECT name, sloc FROM file WHERE name = ?
-'''
+from app.sloc import SlocIndex
 
 
 class Subject(object):
+    # gprof's -L prints absolute paths instead of relative paths. Each rule is
+    #   a (prefix, replacement) pair that is applied, in order, to every line
+    #   of the gprof output to make the paths relative to the source
+    #   directory. {0} in prefix is substituted with the source directory.
+    GPROF_PATH_RULES = [('{0}', '.')]
+    # Path, relative to the source directory, of the binary that the gmon
+    #   files were produced by
+    GPROF_BINARY = None
+    # Names of gmon files that gprof must process on their own, i.e. that are
+    #   never summed with other gmon files (see get_gmon_groups())
+    GMON_UNSUMMED = []
+
     def __init__(self, name, remote, scratch_root):
         self.name = name
         self.remote = remote
 
-        scratch_root = os.path.expanduser(scratch_root)
-        self.scratch_dir = os.path.join(scratch_root, self.name)
+        self.scratch_root = os.path.expanduser(scratch_root)
+        self.scratch_dir = os.path.join(self.scratch_root, self.name)
 
         self.assets_url = '{0}/{1}'.format(
                 constants.ASSETS_ROOT_URL, self.name
@@ -44,15 +54,28 @@ class Subject(object):
 
         self.release = None
         self.repo = None
-        self.sloc_dbconn = None
+        self.sloc_index = None
         self.designed_defenses = None
         self.were_vuln = None
         self.become_vuln = None
         self.call_graph = None
+        self.compact_call_graph = None
+        # The call graph, before it was fragmentized, that call_graph was
+        #   loaded from when it is to be contracted (see contract())
+        self._unfragmented_call_graph = None
+        self.call_graph_cache = CallGraphCache(
+                os.path.join(
+                    self.scratch_root,
+                    settings.CALL_GRAPH_CACHE['DIRECTORY']
+                ),
+                size=settings.CALL_GRAPH_CACHE['SIZE']
+            )
         self.granularity = None
+        self.gmon_group_size = settings.GPROF['GROUP_SIZE']
 
         self.is_initialized = False
         self.is_prepared = False
+        self.is_contracted = False
 
     def clone(self):
         if not self._clone_exists:
@@ -95,17 +118,131 @@ class Subject(object):
         self.debug(
                 'Generating call graph for {0} using gprof'.format(self.name)
             )
-        gmon_file_name = self.gmons_name[index]
-        gmon_file_path = os.path.join(self.gmons_dir, gmon_file_name)
-        gprof_file_path = os.path.join(
-                self.gprofs_dir, '{0}.txt'.format(gmon_file_name)
+        return self.gprof_gmon(self.gmons_name[index])
+
+    def gprof_gmon(self, gmon_file_name):
+        (gmon_file_path, gprof_file_path) = self.get_gprof_paths(
+                gmon_file_name
             )
         return self.__gprof__(gmon_file_path, gprof_file_path)
 
+    def gprof_group(self, name, gmon_files_name):
+        if gmon_files_name == [name]:
+            return self.gprof_gmon(name)
+
+        sum_file_path = os.path.join(self.gmon_sums_dir, name)
+        return_code = self.sum_gmons(gmon_files_name, sum_file_path)
+        if return_code == 0:
+            return_code = self.__gprof__(
+                sum_file_path, self.get_gprof_path(name)
+            )
+        return return_code
+
+    def sum_gmons(self, gmon_files_name, sum_file_path):
+        self.debug('Summing {0} gmon files to {1}'.format(
+            len(gmon_files_name), sum_file_path
+        ))
+        os.makedirs(os.path.dirname(sum_file_path), exist_ok=True)
+
+        # gprof -s always writes gmon.sum to the current directory, which is
+        #   therefore a temporary directory unique to the group
+        cwd = tempfile.mkdtemp(dir=os.path.dirname(sum_file_path))
+        try:
+            cmd = 'gprof -s {0} {1}'.format(
+                os.path.join(self.source_dir, self.GPROF_BINARY),
+                ' '.join(
+                    os.path.join(self.gmons_dir, gmon_file_name)
+                    for gmon_file_name in gmon_files_name
+                )
+            )
+            return_code = self.execute(cmd, cwd=cwd)
+            if return_code == 0:
+                os.replace(os.path.join(cwd, 'gmon.sum'), sum_file_path)
+        finally:
+            shutil.rmtree(cwd)
+
+        return return_code
+
+    def get_gmon_groups(self):
+        # gmon files are summed in groups of gmon_group_size, in the order of
+        #   their name, before gprof is run. Summing preserves the arcs of the
+        #   call graph (and thereby the tested attribute) but a node's
+        #   frequency then counts the groups rather than the gmon files that
+        #   it was called in. The name of a group includes a digest of the
+        #   names of its gmon files such that a group the gmon files of which
+        #   change (e.g. when a gmon file is added) is summed again.
+        gmons_name = self.gmons_name
+        if not self.gmon_group_size:
+            return [(name, [name]) for name in gmons_name]
+
+        groups = [
+            (name, [name]) for name in gmons_name
+            if name in self.GMON_UNSUMMED
+        ]
+        gmons_name = [
+            name for name in gmons_name if name not in self.GMON_UNSUMMED
+        ]
+        for (index, begin) in enumerate(
+                range(0, len(gmons_name), self.gmon_group_size)):
+            group = gmons_name[begin:begin + self.gmon_group_size]
+            digest = hashlib.sha1('\n'.join(group).encode()).hexdigest()
+            groups.append(('sum.{0:05d}.{1}.out'.format(index, digest[:12]),
+                           group))
+        return groups
+
+    def remove_stale_gprofs(self, groups=None):
+        # Removes the summed gmon files, and their gprof files, of groups that
+        #   are not among the current groups of gmon files, e.g. the sums of
+        #   groups that a gmon file has since been added to or removed from,
+        #   such that they are not loaded along with the current ones. The
+        #   gprof files of individual gmon files are left as they are.
+        #   Returns the number of gprof files removed.
+        if not self.gmon_group_size:
+            return 0
+        if groups is None:
+            groups = self.get_gmon_groups()
+        names = {name for (name, _) in groups}
+
+        count = 0
+        if os.path.isdir(self.gprofs_dir):
+            for gprof_file_name in os.listdir(self.gprofs_dir):
+                (name, extension) = os.path.splitext(gprof_file_name)
+                if (extension == '.txt' and name.startswith('sum.') and
+                        name not in names):
+                    os.remove(os.path.join(self.gprofs_dir, gprof_file_name))
+                    count += 1
+        if os.path.isdir(self.gmon_sums_dir):
+            for name in os.listdir(self.gmon_sums_dir):
+                path = os.path.join(self.gmon_sums_dir, name)
+                if (name.startswith('sum.') and name not in names and
+                        os.path.isfile(path)):
+                    os.remove(path)
+        return count
+
+    def is_gprof_current(self, gmon_file_name):
+        return self.is_gprof_group_current(gmon_file_name, [gmon_file_name])
+
+    def is_gprof_group_current(self, name, gmon_files_name):
+        gprof_file_path = self.get_gprof_path(name)
+        return (
+            os.path.exists(gprof_file_path) and
+            os.path.getmtime(gprof_file_path) >= max(
+                os.path.getmtime(os.path.join(self.gmons_dir, gmon_file_name))
+                for gmon_file_name in gmon_files_name
+            )
+        )
+
+    def get_gprof_paths(self, gmon_file_name):
+        gmon_file_path = os.path.join(self.gmons_dir, gmon_file_name)
+        return (gmon_file_path, self.get_gprof_path(gmon_file_name))
+
+    def get_gprof_path(self, name):
+        return os.path.join(self.gprofs_dir, '{0}.txt'.format(name))
+
     def __gprof__(self, gmon_file_path, gprof_file_path):
         raise NotImplementedError
 
-    def initialize(self, release, granularity):
+    def initialize(self, release, granularity=None):
         self.scratch_dir = os.path.join(
                 self.scratch_dir,
                 'b{0}'.format(release.branch.version),
@@ -176,7 +313,10 @@ class Subject(object):
         self.load_sloc()
         self.load_defenses()
 
-    def load_call_graph(self, processes=1):
+    def load_call_graph(self, processes=1, contract=False, compact=False):
+        # When compact is True and the call graph is cached, only the compact
+        #   call graph is loaded (and call_graph is left as None) for
+        #   consumers that read its arrays (see get_page_rank_solver())
         self.debug('Loading call graph')
 
         if not self.is_initialized:
@@ -185,47 +325,134 @@ class Subject(object):
         if not self.is_prepared:
             raise Exception('Subject not prepared. Invoke prepare().')
 
-        self._unpickle_call_graph()
-        if not self.call_graph:
-            cflow_loader = None
-            gprof_loader = None
-            if self._cflow_exists:
-                cflow_loader = CflowLoader(
-                    self.cflow_path, reverse=True,
-                    defenses=self.designed_defenses,
-                    vulnerabilities=self.were_vuln
-                )
-            if self._gprofs_exist:
-                gprof_loader = MultigprofLoader(
-                    self.gprofs_path, processes=processes,
-                    reverse=False,
-                    defenses=self.designed_defenses,
-                    vulnerabilities=self.were_vuln
-                )
+        if self.designed_defenses is None:
+            self.load_defenses()
 
-            if cflow_loader and gprof_loader:
-                self.call_graph = CallGraph.from_merge(
-                    CallGraph.from_loader(
-                        cflow_loader, granularity=self.granularity
-                    ),
-                    CallGraph.from_loader(
-                        gprof_loader, granularity=self.granularity
-                    ),
-                    fragmentize=True
-                )
-                print('')
-            elif cflow_loader:
-                self.call_graph = CallGraph.from_loader(
-                    cflow_loader, fragmentize=True,
-                    granularity=self.granularity
-                )
-            elif gprof_loader:
-                self.call_graph = CallGraph.from_loader(
-                    gprof_loader, fragmentize=True,
-                    granularity=self.granularity
+        # gprof files of stale groups of gmon files must not be loaded, nor
+        #   identify the call graph in the cache
+        if os.path.isdir(self.gmons_dir):
+            self.remove_stale_gprofs()
+
+        key = self._get_call_graph_key()
+        compact_call_graph = self.call_graph_cache.get(key)
+        if compact_call_graph is not None:
+            if not compact:
+                self.call_graph = compact_call_graph.to_call_graph()
+        else:
+            call_graph = self._load_call_graph(processes)
+            self.call_graph = CallGraph(
+                call_graph.source, call_graph.call_graph,
+                call_graph.load_errors, fragmentize=True,
+                granularity=self.granularity
+            )
+            if contract:
+                # Retained for contract()
+                self._unfragmented_call_graph = call_graph
+
+            compact_call_graph = self.call_graph_cache.put(
+                key, CompactCallGraph.from_call_graph(self.call_graph)
+            )
+
+        self.compact_call_graph = compact_call_graph
+
+    def contract(self, processes=1):
+        # Returns a copy of the subject at file granularity, the call graph of
+        #   which is contracted from the function granularity call graph of
+        #   this subject (see app.contraction.contract()) rather than loaded
+        #   again from the cflow and gprof files
+        if self.granularity != Granularity.FUNC:
+            raise Exception('Subject not initialized at function granularity.')
+        if self.call_graph is None:
+            raise Exception('Call graph not loaded. Invoke load_call_graph().')
+
+        self.debug('Contracting call graph by file')
+
+        subject = copy.copy(self)
+        subject.granularity = Granularity.FILE
+        subject.is_contracted = True
+        subject.call_graph = None
+        subject.compact_call_graph = None
+        subject._unfragmented_call_graph = None
+
+        if self.designed_defenses is not None:
+            subject.designed_defenses = _get_files(self.designed_defenses)
+        subject.were_vuln = _get_files(self.were_vuln)
+        subject.become_vuln = _get_files(self.become_vuln)
+
+        key = subject._get_call_graph_key()
+        compact_call_graph = self.call_graph_cache.get(key)
+        if compact_call_graph is not None:
+            subject.call_graph = compact_call_graph.to_call_graph()
+        else:
+            call_graph = self._unfragmented_call_graph
+            if call_graph is None:
+                call_graph = self._load_call_graph(processes)
+
+            subject.call_graph = CallGraph(
+                call_graph.source,
+                contraction.contract(
+                    call_graph, defenses=subject.designed_defenses,
+                    vulnerabilities=subject.were_vuln
+                ),
+                call_graph.load_errors, fragmentize=True,
+                granularity=subject.granularity
+            )
+
+            compact_call_graph = self.call_graph_cache.put(
+                key, CompactCallGraph.from_call_graph(subject.call_graph)
+            )
+        subject.compact_call_graph = compact_call_graph
+
+        # The call graph is contracted at most once
+        self._unfragmented_call_graph = None
+
+        return subject
+
+    def import_call_graph(self, path=None, force=False):
+        # The pickled call graph is cached by the key of the current cflow,
+        #   gprof, and defenses files, which it cannot be verified to have
+        #   been loaded from. A pickle that is older than any of these files
+        #   was loaded from other files and is not imported unless forced,
+        #   since it would be a cache hit for call graphs loaded from the
+        #   current files.
+        if path is None:
+            path = self.legacy_pickle_path
+        self.debug('Importing call graph from {0}'.format(path))
+
+        if not (self.is_initialized and self.is_prepared):
+            raise Exception('Subject is not prepared. Invoke prepare().')
+
+        if self.designed_defenses is None:
+            self.load_defenses()
+
+        paths = [self.cflow_path, self._defenses_path]
+        paths += self.gprofs_path or list()
+        mtime = os.path.getmtime(path)
+        newer = [
+            path_ for path_ in paths
+            if os.path.exists(path_) and os.path.getmtime(path_) > mtime
+        ]
+        if newer:
+            if not force:
+                raise errors.StaleCallGraphError(
+                    '{0} is older than {1} of the files it is cached '
+                    'by'.format(path, len(newer))
                 )
+            self.debug('WARNING: {0} is older than {1} of the files it is '
+                       'cached by'.format(path, len(newer)))
+
+        with open(path, 'rb') as file_:
+            call_graph = pickle.load(file_)
+        if getattr(call_graph, 'granularity', None) not in (
+                None, self.granularity):
+            raise Exception('{0} is a call graph at {1} granularity'.format(
+                path, call_graph.granularity
+            ))
 
-            self._pickle_call_graph()
+        self.call_graph_cache.put(
+            self._get_call_graph_key(),
+            CompactCallGraph.from_call_graph(call_graph)
+        )
 
     def assign_page_rank(self, name='page_rank'):
         if not (self.is_initialized and self.is_prepared):
@@ -234,28 +461,47 @@ class Subject(object):
         parameters = self._get_parameters()
         self.debug('Parameters: {0}'.format(parameters))
 
-        self.call_graph.assign_weights(parameters['weights'])
-        self.call_graph.assign_page_rank(
-            name=name, damping=parameters['damping'],
+        solver = self.get_page_rank_solver()
+        solver.assign_weights(parameters['weights'])
+        page_rank = solver.get_page_rank(
+            damping=parameters['damping'],
             entry=parameters['personalization']['entry'],
             exit=parameters['personalization']['exit'],
             other=parameters['personalization']['other'],
         )
+        for (node, attrs) in self.call_graph.nodes:
+            attrs[name] = page_rank[node]
+
+    def get_page_rank_solver(self):
+        # The solver reads the arrays of the compact call graph, which the
+        #   processes that inherit the solver share, when the call graph
+        #   itself was not loaded
+        call_graph = self.call_graph
+        if call_graph is None:
+            call_graph = self.compact_call_graph
+        if call_graph is None:
+            raise Exception('Call graph not loaded. Invoke load_call_graph().')
+
+        return pagerank.PageRank(
+            call_graph,
+            tolerance=settings.PAGE_RANK['TOLERANCE'],
+            max_iterations=settings.PAGE_RANK['MAX_ITERATIONS'],
+            log=settings.PAGE_RANK['LOG'],
+            context={
+                'release': str(self.release), 'granularity': self.granularity
+            }
+        )
 
-    def _pickle_call_graph(self):
-        self.debug(
-                'Pickling call graph to {0}'.format(self._pickle_path)
-            )
-        with open(self._pickle_path, 'wb') as file_:
-            pickle.dump(self.call_graph, file_)
+    def assign_proximity(self):
+        if self.call_graph is None:
+            raise Exception('Call graph not loaded. Invoke load_call_graph().')
 
-    def _unpickle_call_graph(self):
-        self.debug(
-                'Unpickling call graph from {0}'.format(self._pickle_path)
-            )
-        if self._pickle_exists:
-            with open(self._pickle_path, 'rb') as file_:
-                self.call_graph = pickle.load(file_)
+        proximities = proximity.get_proximities(self.call_graph)
+        for (attribute, values) in proximities.items():
+            self.debug('Assigning proximity to {0}'.format(attribute))
+            name = 'proximity_to_{0}'.format(attribute)
+            for (node, attrs) in self.call_graph.nodes:
+                attrs[name] = values[node]
 
     def get_absolute_path(self, name):
         return os.path.join(self.source_dir, name)
@@ -263,27 +509,14 @@ class Subject(object):
     def load_sloc(self):
         self.debug('Loading function SLOC')
         self._download_sloc_file()
-        self.sloc_dbconn = sqlite3.connect(self._sloc_path)
+        self.sloc_index = SlocIndex(self._sloc_path)
 
     def get_sloc(self, name, file_):
         result = None
-        with sqlite3.connect(self._sloc_path) as connection:
-            _cursor = connection.cursor()
-            if self.granularity == Granularity.FUNC:
-                _cursor.execute(FUNC_SLOC_QUERY_PRIMARY, (name, file_))
-                _rows = _cursor.fetchall()
-                if len(_rows) == 1:
-                    result = _rows[0][2]
-                else:
-                    _cursor.execute(FUNC_SLOC_QUERY_SECONDARY, (name,))
-                    _rows = _cursor.fetchall()
-                    if len(_rows) == 1:
-                        result = _rows[0][2]
-            elif self.granularity == Granularity.FILE:
-                _cursor.execute(FILE_SLOC_QUERY, (file_,))
-                _rows = _cursor.fetchall()
-                if len(_rows) == 1:
-                    result = _rows[0][1]
+        if self.granularity == Granularity.FUNC:
+            result = self.sloc_index.get_function_sloc(name, file_)
+        elif self.granularity == Granularity.FILE:
+            result = self.sloc_index.get_file_sloc(file_)
 
         return result
 
@@ -345,6 +578,31 @@ class Subject(object):
 
         return process.wait()
 
+    def execute_gprof(self, cmd, gprof_path):
+        stderr = sp.DEVNULL
+        # Debugging override
+        if 'DEBUG' in os.environ:
+            stderr = None
+
+        self.debug(cmd)
+
+        rules = [
+            (prefix.format(self.source_dir).encode(), replacement.encode())
+            for (prefix, replacement) in self.GPROF_PATH_RULES
+        ]
+
+        process = sp.Popen(
+            cmd, stdout=sp.PIPE, stderr=stderr, cwd=self.source_dir,
+            shell=True
+        )
+        with open(gprof_path, 'wb') as _gprof_file:
+            for line in process.stdout:
+                for (prefix, replacement) in rules:
+                    line = line.replace(prefix, replacement)
+                _gprof_file.write(line)
+
+        return process.wait()
+
     def debug(self, message, line=False):
         helpers.debug(message, line)
 
@@ -358,8 +616,18 @@ class Subject(object):
 
     @property
     def gprofs_dir(self):
+        if self.gmon_group_size:
+            return os.path.join(
+                self.scratch_dir, 'gprof.sum{0}'.format(self.gmon_group_size)
+            )
         return os.path.join(self.scratch_dir, 'gprof')
 
+    @property
+    def gmon_sums_dir(self):
+        return os.path.join(
+            self.scratch_dir, 'gmon.sum{0}'.format(self.gmon_group_size)
+        )
+
     @property
     def gprofs_path(self):
         gprof_files = None
@@ -372,13 +640,19 @@ class Subject(object):
             gprof_files.sort()
         return gprof_files
 
+    @property
+    def legacy_pickle_path(self):
+        return os.path.join(
+            self.scratch_dir, 'call_graph.{}.pickle'.format(self.granularity)
+        )
+
     @property
     def gmons_dir(self):
         return os.path.join(self.source_dir, 'gmon')
 
     @property
     def gmons_name(self):
-        return os.listdir(self.gmons_dir)
+        return sorted(os.listdir(self.gmons_dir))
 
     # Private Members
 
@@ -387,6 +661,76 @@ class Subject(object):
     def _clean_up(self):
         raise NotImplementedError
 
+    def _load_call_graph(self, processes):
+        call_graph = None
+
+        cflow_loader = None
+        gprof_loader = None
+        if self._cflow_exists:
+            cflow_loader = CflowLoader(
+                self.cflow_path, reverse=True,
+                defenses=self.designed_defenses,
+                vulnerabilities=self.were_vuln
+            )
+        if self._gprofs_exist:
+            gprof_loader = MultigprofLoader(
+                self.gprofs_path, processes=processes,
+                reverse=False,
+                defenses=self.designed_defenses,
+                vulnerabilities=self.were_vuln
+            )
+
+        if cflow_loader and gprof_loader:
+            call_graph = CallGraph.from_merge(
+                CallGraph.from_loader(
+                    cflow_loader, granularity=self.granularity
+                ),
+                CallGraph.from_loader(
+                    gprof_loader, granularity=self.granularity
+                )
+            )
+            self.debug('')
+        elif cflow_loader:
+            call_graph = CallGraph.from_loader(
+                cflow_loader, granularity=self.granularity
+            )
+        elif gprof_loader:
+            call_graph = CallGraph.from_loader(
+                gprof_loader, granularity=self.granularity
+            )
+
+        return call_graph
+
+    def _get_call_graph_key(self):
+        # gprof files are identified by their name, size, and modification
+        #   time rather than their content since there may be thousands of
+        #   them for a single release
+        gprofs = list()
+        for path in (self.gprofs_path or list()):
+            stat = os.stat(path)
+            gprofs.append(
+                (os.path.basename(path), stat.st_size, stat.st_mtime_ns)
+            )
+
+        parameters = dict(
+            gprofs=gprofs,
+            granularity=self.granularity,
+            defenses=sorted(
+                call.identity for call in (self.designed_defenses or list())
+            ),
+            were_vuln=sorted(
+                call.identity for call in (self.were_vuln or list())
+            )
+        )
+        # A contracted call graph differs from one loaded at file granularity
+        #   (see app.contraction.contract())
+        if self.is_contracted:
+            parameters['contracted'] = True
+
+        return CallGraphCache.get_key(
+            [self.cflow_path, self._defenses_path], **parameters
+        )
+
     def _get_parameters(self):
         with open(self._parameters_path, 'r') as file_:
             return json.load(file_)
@@ -460,18 +804,19 @@ class Subject(object):
     def _gprofs_exist(self):
         return bool(self.gprofs_path)
 
-    @property
-    def _pickle_path(self):
-        return os.path.join(
-            self.scratch_dir, 'call_graph.{}.pickle'.format(self.granularity)
-        )
-
-    @property
-    def _pickle_exists(self):
-        return os.path.exists(self._pickle_path)
-
     @property
     def _parameters_path(self):
         return helpers.get_absolute_path(
             'app/assets/data/{0}/parameters.json'.format(self.name)
         )
+
+
+def _get_files(calls):
+    # Calls, at file granularity, of the files that calls are defined in
+    files = dict()
+    for call in calls:
+        if call.function_signature not in files:
+            files[call.function_signature] = Call(
+                '', call.function_signature, Environments.C, Granularity.FILE
+            )
+    return list(files.values())
@@ -5,6 +5,11 @@ from app.subjects import subject
 
 
 class Wireshark(subject.Subject):
+    # Examples:
+    #   /home/rady/wireshark/wireshark.c     > ./wireshark.c
+    GPROF_PATH_RULES = [('{0}', '.')]
+    GPROF_BINARY = '.libs/wireshark'
+
     def __init__(self, name, remote, scratch_root):
         super().__init__(name, remote, scratch_root)
 
@@ -32,21 +37,7 @@ class Wireshark(subject.Subject):
             'Generating call graph for {0} using gprof with profile '
             'information from {1}'.format(self.name, gmon_path)
         )
-        cmd = 'gprof -q -b -l -c -L .libs/wireshark {0}'
-        cmd = cmd.format(gmon_path)
-
-        with open(gprof_path, 'w+') as _gprof_file:
-            returncode = self.execute(cmd, stdout=_gprof_file)
-
-        # gprof's -L is printing absolute path instead of relative path.
-        #   Fixing the paths using sed.
-        # Examples:
-        #   /home/rady/wireshark/wireshark.c     > ./wireshark.c
-
-        self.execute(
-            "sed -i 's;{0};.;g' {1}".format(
-                self.source_dir.replace('/', '\/'), gprof_path
-            )
-        )
+        cmd = 'gprof -q -b -l -c -L {0} {1}'
+        cmd = cmd.format(self.GPROF_BINARY, gmon_path)
 
-        return returncode
+        return self.execute_gprof(cmd, gprof_path)
@@ -1,11 +1,18 @@
 import os
+import pickle
 import subprocess
 import shutil
+import tempfile
 from django.test import TestCase
 from hashlib import md5
 
+import networkx as nx
+
 from app import errors
 from app.subjects.subject import Subject
+from attacksurfacemeter.call import Call
+from attacksurfacemeter.call_graph import CallGraph
+from attacksurfacemeter.environments import Environments
 
 
 class SubjectTestCase(TestCase):
@@ -508,3 +515,109 @@ class SubjectTestCase(TestCase):
 
     def tearDown(self):
         pass
+
+
+class GmonGroupTestCase(TestCase):
+    def setUp(self):
+        self.scratch_root = tempfile.mkdtemp()
+        self.subject = Subject('subject', '', self.scratch_root)
+        self.subject.gmon_group_size = 2
+        os.makedirs(self.subject.gmons_dir)
+        for index in range(5):
+            self._add_gmon('gmon.{0}.out'.format(index))
+
+    def tearDown(self):
+        shutil.rmtree(self.scratch_root)
+
+    def _add_gmon(self, name):
+        open(os.path.join(self.subject.gmons_dir, name), 'w').close()
+
+    def _profile(self, groups):
+        # Stands in for gprof_group(), which requires gprof
+        os.makedirs(self.subject.gprofs_dir, exist_ok=True)
+        os.makedirs(self.subject.gmon_sums_dir, exist_ok=True)
+        for (name, _) in groups:
+            open(self.subject.get_gprof_path(name), 'w').close()
+            open(os.path.join(self.subject.gmon_sums_dir, name), 'w').close()
+
+    def test_get_gmon_groups(self):
+        groups = self.subject.get_gmon_groups()
+        self.assertEqual(
+            [['gmon.0.out', 'gmon.1.out'], ['gmon.2.out', 'gmon.3.out'],
+             ['gmon.4.out']],
+            [gmons_name for (_, gmons_name) in groups]
+        )
+        self.assertEqual(groups, self.subject.get_gmon_groups())
+
+        # Only the groups that the new gmon file falls into are renamed
+        self._add_gmon('gmon.5.out')
+        names = [name for (name, _) in self.subject.get_gmon_groups()]
+        self.assertEqual(
+            [name for (name, _) in groups][:2], names[:2]
+        )
+        self.assertNotEqual(groups[2][0], names[2])
+
+    def test_remove_stale_gprofs(self):
+        self._profile(self.subject.get_gmon_groups())
+        os.remove(os.path.join(self.subject.gmons_dir, 'gmon.0.out'))
+        groups = self.subject.get_gmon_groups()
+
+        self.assertEqual(3, self.subject.remove_stale_gprofs())
+        self.assertEqual(0, self.subject.remove_stale_gprofs())
+        self._profile(groups)
+        self.assertEqual(
+            sorted(self.subject.get_gprof_path(name) for (name, _) in groups),
+            self.subject.gprofs_path
+        )
+        self.assertEqual(
+            sorted(name for (name, _) in groups),
+            sorted(os.listdir(self.subject.gmon_sums_dir))
+        )
+
+
+class ImportCallGraphTestCase(TestCase):
+    def setUp(self):
+        self.scratch_root = tempfile.mkdtemp()
+        self.subject = Subject('subject', '', self.scratch_root)
+        self.subject.call_graph_cache.directory = os.path.join(
+            self.scratch_root, 'cache'
+        )
+        self.subject.granularity = 'function'
+        self.subject.designed_defenses = list()
+        self.subject.is_initialized = True
+        self.subject.is_prepared = True
+        os.makedirs(self.subject.scratch_dir)
+
+        graph = nx.DiGraph()
+        graph.add_edge(
+            Call('main', './main.c', Environments.C),
+            Call('f', './f.c', Environments.C), call=None
+        )
+        with open(self.subject.legacy_pickle_path, 'wb') as file_:
+            pickle.dump(CallGraph('test', graph), file_)
+        with open(self.subject.cflow_path, 'w') as file_:
+            file_.write('main() <int main () at ./main.c:1>:\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.scratch_root)
+
+    def test_import_call_graph(self):
+        mtime = os.path.getmtime(self.subject.legacy_pickle_path)
+        os.utime(self.subject.cflow_path, (mtime + 60, mtime + 60))
+        self.assertRaises(
+            errors.StaleCallGraphError, self.subject.import_call_graph
+        )
+        key = self.subject._get_call_graph_key()
+        self.assertIsNone(self.subject.call_graph_cache.get(key))
+
+        self.subject.import_call_graph(force=True)
+        self.assertIsNotNone(self.subject.call_graph_cache.get(key))
+
+    def test_import_call_graph_current(self):
+        mtime = os.path.getmtime(self.subject.legacy_pickle_path)
+        os.utime(self.subject.cflow_path, (mtime - 60, mtime - 60))
+        self.subject.import_call_graph()
+
+        key = self.subject._get_call_graph_key()
+        call_graph = self.subject.call_graph_cache.get(key).to_call_graph()
+        self.assertEqual(2, len(call_graph.nodes))
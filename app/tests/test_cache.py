@@ -0,0 +1,87 @@
+import os
+import shutil
+import tempfile
+
+import networkx as nx
+
+from django.test import TestCase
+
+from app.cache import CallGraphCache
+from app.compact import CompactCallGraph
+from attacksurfacemeter.call import Call
+from attacksurfacemeter.call_graph import CallGraph
+from attacksurfacemeter.environments import Environments
+
+
+class CallGraphCacheTestCase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = CallGraphCache(os.path.join(self.directory, 'cache'))
+
+        self.path = os.path.join(self.directory, 'cflow.txt')
+        with open(self.path, 'w') as file_:
+            file_.write('main() <main.c:1>\n')
+
+        graph = nx.DiGraph()
+        graph.add_edge(
+            Call('main', './main.c', Environments.C),
+            Call('parse', './parse.c', Environments.C),
+            call=None
+        )
+        self.call_graph = CompactCallGraph.from_call_graph(
+            CallGraph('test', graph, list())
+        )
+
+    def test_get_key(self):
+        key = CallGraphCache.get_key([self.path], granularity='function')
+
+        # Scenario: Same inputs
+        self.assertEqual(
+            key, CallGraphCache.get_key([self.path], granularity='function')
+        )
+
+        # Scenario: Different parameters
+        self.assertNotEqual(
+            key, CallGraphCache.get_key([self.path], granularity='file')
+        )
+
+        # Scenario: Different content
+        with open(self.path, 'a') as file_:
+            file_.write('    printf()\n')
+        self.assertNotEqual(
+            key, CallGraphCache.get_key([self.path], granularity='function')
+        )
+
+    def test_get_put(self):
+        key = CallGraphCache.get_key([self.path])
+
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, self.call_graph)
+        actual = self.cache.get(key)
+
+        self.assertEqual(self.call_graph.strings, actual.strings)
+        self.assertEqual(
+            list(self.call_graph.indices), list(actual.indices)
+        )
+        self.assertEqual(1, self.cache.hits)
+        self.assertEqual(1, self.cache.misses)
+        self.assertEqual([key], os.listdir(self.cache.directory))
+
+    def test_evict(self):
+        self.cache.put('a', self.call_graph)
+        self.cache.put('b', self.call_graph)
+
+        # Scenario: Least recently used entry is evicted
+        os.utime(self.cache._get_path('a'), (0, 0))
+        self.cache.size = 1
+        self.assertEqual(['a'], self.cache.evict())
+        self.assertIsNone(self.cache.get('a'))
+        self.assertIsNotNone(self.cache.get('b'))
+
+        # Scenario: Most recently used entry is retained
+        self.cache.size = 0
+        self.assertEqual([], self.cache.evict())
+        self.assertIsNotNone(self.cache.get('b'))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
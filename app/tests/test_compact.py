@@ -0,0 +1,75 @@
+import shutil
+import tempfile
+
+import networkx as nx
+import numpy
+
+from django.test import TestCase
+
+from app.compact import CompactCallGraph
+from attacksurfacemeter.call import Call
+from attacksurfacemeter.call_graph import CallGraph
+from attacksurfacemeter.environments import Environments
+
+
+class CompactCallGraphTestCase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+        main = Call('main', './main.c', Environments.C)
+        parse = Call('parse', './parse.c', Environments.C)
+        validate = Call('validate', './parse.c', Environments.C)
+
+        graph = nx.DiGraph()
+        graph.add_node(main, entry=None, tested=None, frequency=3)
+        graph.add_node(parse, dangerous=None)
+        graph.add_node(validate, defense=None, vulnerable=None)
+        graph.add_edge(main, parse, cflow=None, call=None)
+        graph.add_edge(parse, main, gprof=None, **{'return': None})
+        graph.add_edge(parse, validate, cflow=None, call=None)
+
+        self.call_graph = CallGraph('test', graph, ['error'])
+        self.call_graph.num_fragments = 2
+        self.call_graph.monolithicity = 0.75
+
+    def test_from_call_graph(self):
+        compact = CompactCallGraph.from_call_graph(self.call_graph)
+
+        # Interned strings: 3 names and 2 signatures
+        self.assertEqual(5, len(compact.strings))
+        self.assertEqual(4, len(compact.indptr))
+        self.assertEqual(3, len(compact.indices))
+        self.assertEqual(3, compact.indptr[-1])
+
+    def test_save_load(self):
+        expected = CompactCallGraph.from_call_graph(self.call_graph)
+        expected.save(self.directory)
+
+        actual = CompactCallGraph.load(self.directory)
+
+        self.assertIsInstance(actual.indices, numpy.memmap)
+        self.assertEqual(expected.strings, actual.strings)
+        self.assertEqual(expected.meta, actual.meta)
+        for name in ['names', 'flags', 'frequency', 'indptr', 'edge_flags']:
+            self.assertTrue(numpy.array_equal(
+                getattr(expected, name), getattr(actual, name)
+            ))
+
+    def test_to_call_graph(self):
+        CompactCallGraph.from_call_graph(self.call_graph).save(self.directory)
+        actual = CompactCallGraph.load(self.directory).to_call_graph()
+
+        self.assertEqual(
+            {n: a for (n, a) in self.call_graph.nodes},
+            {n: a for (n, a) in actual.nodes}
+        )
+        self.assertEqual(
+            {(u, v): a for (u, v, a) in self.call_graph.edges},
+            {(u, v): a for (u, v, a) in actual.edges}
+        )
+        self.assertEqual(['error'], actual.load_errors)
+        self.assertEqual(2, actual.num_fragments)
+        self.assertEqual(0.75, actual.monolithicity)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
@@ -0,0 +1,81 @@
+import os
+
+import networkx as nx
+
+from django.test import TestCase
+
+from app import contraction
+from attacksurfacemeter.call import Call
+from attacksurfacemeter.call_graph import CallGraph
+from attacksurfacemeter.environments import Environments
+from attacksurfacemeter.granularity import Granularity
+from attacksurfacemeter.loaders.cflow_loader import CflowLoader
+
+
+class ContractionTestCase(TestCase):
+    def test_contract(self):
+        main = Call('main', './main.c', Environments.C)
+        parse = Call('parse', './parse.c', Environments.C)
+        validate = Call('validate', './parse.c', Environments.C)
+        unknown = Call('unknown', '', Environments.C)
+
+        graph = nx.DiGraph()
+        graph.add_node(main, entry=None, frequency=1)
+        graph.add_node(parse, tested=None, frequency=3)
+        graph.add_node(validate, dangerous=None, frequency=2)
+        graph.add_node(unknown)
+        graph.add_edge(main, parse, cflow=None, call=None)
+        graph.add_edge(parse, main, cflow=None, **{'return': None})
+        graph.add_edge(parse, validate, gprof=None, call=None)
+        graph.add_edge(main, unknown, cflow=None, call=None)
+
+        main_c = Call('', './main.c', Environments.C, Granularity.FILE)
+        parse_c = Call('', './parse.c', Environments.C, Granularity.FILE)
+
+        actual = contraction.contract(
+            CallGraph('test', graph), defenses=[parse_c],
+            vulnerabilities=[main_c]
+        )
+
+        self.assertEqual(2, actual.number_of_nodes())
+        self.assertEqual(
+            {'entry': None, 'vulnerable': None, 'frequency': 1},
+            actual.node[main_c]
+        )
+        self.assertEqual(
+            {
+                'tested': None, 'dangerous': None, 'defense': None,
+                'frequency': 3
+            },
+            actual.node[parse_c]
+        )
+        self.assertEqual(
+            {(main_c, parse_c), (parse_c, main_c), (parse_c, parse_c)},
+            set(actual.edges())
+        )
+        self.assertEqual(
+            {'gprof': None, 'call': None}, actual.edge[parse_c][parse_c]
+        )
+
+    def test_contract_cflow(self):
+        path = os.path.join(
+            os.path.dirname(os.path.realpath(__file__)),
+            'data/b_0.6.0_cflow.txt'
+        )
+
+        expected = CallGraph.from_loader(
+            CflowLoader(path, reverse=True), granularity=Granularity.FILE
+        )
+        actual = contraction.contract(CallGraph.from_loader(
+            CflowLoader(path, reverse=True), granularity=Granularity.FUNC
+        ))
+
+        expected = expected.call_graph
+        self.assertEqual(set(expected.nodes()), set(actual.nodes()))
+        self.assertEqual(set(expected.edges()), set(actual.edges()))
+        for node in expected.nodes():
+            self.assertEqual(expected.node[node], actual.node[node])
+        for (caller, callee) in expected.edges():
+            self.assertEqual(
+                expected.edge[caller][callee], actual.edge[caller][callee]
+            )
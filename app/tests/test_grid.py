@@ -0,0 +1,70 @@
+import csv
+import json
+import os
+import tempfile
+
+from django.test import TestCase
+
+from app import helpers
+from app.grid import AXES, ParameterGrid
+
+
+class ParameterGridTestCase(TestCase):
+    def setUp(self):
+        self.grid = ParameterGrid.default()
+
+    def test_default(self):
+        (_, filepath) = tempfile.mkstemp()
+        try:
+            helpers.generate_parameters(filepath)
+            with open(filepath) as file_:
+                expected = [
+                    tuple(float(p) for p in row) for row in csv.reader(file_)
+                ]
+        finally:
+            os.remove(filepath)
+
+        self.assertEqual(len(expected), len(self.grid))
+        for (index, parameters) in self.grid.iterate():
+            self.assertEqual(expected[index], parameters)
+
+    def test_getitem(self):
+        self.assertEqual((0.1, 10, 10, 1, 10, 10, 10, 10), self.grid[0])
+        self.assertEqual((0.1, 10, 10, 1, 10, 10, 10, 100), self.grid[1])
+        self.assertEqual((0.1, 10, 10, 1, 10, 10, 100, 10), self.grid[3])
+        self.assertEqual(
+            (0.9, 1000000, 1000000, 1, 10000, 10000, 1000, 1000),
+            self.grid[-1]
+        )
+        self.assertRaises(IndexError, self.grid.__getitem__, len(self.grid))
+
+    def test_index(self):
+        for index in [0, 1, 17, 12345, len(self.grid) - 1]:
+            self.assertEqual(index, self.grid.index(self.grid[index]))
+        self.assertIsNone(self.grid.index((0.15, 10, 10, 1, 10, 10, 10, 10)))
+
+    def test_iterate(self):
+        self.assertEqual(
+            [(5, self.grid[5]), (6, self.grid[6])],
+            list(self.grid.iterate(begin=5, end=7))
+        )
+        length = len(self.grid)
+        self.assertEqual(
+            [(length - 1, self.grid[-1])],
+            list(self.grid.iterate(begin=length - 1, end=length + 10))
+        )
+
+    def test_from_file(self):
+        axes = {axis: [1] for axis in AXES}
+        axes['damping'] = [0.5, 0.85]
+
+        (_, filepath) = tempfile.mkstemp()
+        try:
+            with open(filepath, 'w') as file_:
+                json.dump(axes, file_)
+            grid = ParameterGrid.from_file(filepath)
+        finally:
+            os.remove(filepath)
+
+        self.assertEqual(2, len(grid))
+        self.assertEqual((0.85, 1, 1, 1, 1, 1, 1, 1), grid[1])
@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 from django.conf import settings
 from django.test import TestCase
@@ -0,0 +1,58 @@
+import datetime
+
+from django.test import TestCase
+
+from app import ingest
+from app.models import Branch, File, Release, Subject
+
+
+class IngestTestCase(TestCase):
+    def setUp(self):
+        subject = Subject.objects.create(name='ffmpeg', remote='')
+        branch = Branch.objects.create(subject=subject, major=2)
+        self.release = Release.objects.create(
+            subject=subject, branch=branch, date=datetime.date(2014, 1, 1),
+            major=2
+        )
+        self.fields = [
+            'release', 'name', 'is_entry', 'sloc', 'fan_in', 'fan_out',
+            'page_rank'
+        ]
+        self.rows = [
+            (self.release.id, './f{0}.c'.format(i), i % 2 == 0,
+             None if i % 3 == 0 else i, i % 5, i % 7, 1.0 / (i + 1))
+            for i in range(250)
+        ]
+
+    def _test_save(self, backend):
+        self.assertEqual(
+            len(self.rows),
+            backend.save(File, self.fields, iter(self.rows), len(self.rows))
+        )
+
+        files = File.objects.filter(release=self.release).order_by('id')
+        self.assertEqual(
+            [row[1:] for row in self.rows],
+            list(files.values_list(*self.fields[1:]))
+        )
+        # Fields that are not saved have their default values
+        self.assertFalse(files.filter(is_exit=True).exists())
+        self.assertEqual(
+            {(False, None)},
+            set(files.values_list('is_defense', 'proximity_to_entry'))
+        )
+
+    def test_save(self):
+        self._test_save(ingest.Backend(size=30))
+
+    def test_save_sqlite(self):
+        self._test_save(ingest.SqliteBackend(size=100))
+
+    def test_get_backend(self):
+        self.assertIsInstance(
+            ingest.get_backend('sqlite'), ingest.SqliteBackend
+        )
+        self.assertIsInstance(
+            ingest.get_backend('postgresql'), ingest.CopyBackend
+        )
+        self.assertEqual(ingest.Backend, type(ingest.get_backend('mysql')))
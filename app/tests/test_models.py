@@ -0,0 +1,155 @@
+import datetime
+
+from django.test import TestCase
+
+from app import errors, models
+from app.models import (
+    Branch, Cve, CveRelease, Release, Subject, VulnerabilityFix
+)
+
+
+class ReleaseTestCase(TestCase):
+    def setUp(self):
+        models.clear_vulnerability_fixes()
+
+        subject = Subject.objects.create(name='ffmpeg', remote='')
+        self.releases = dict()
+        for (version, date) in [
+                ((1, 0, 0), (2013, 1, 1)), ((1, 0, 1), (2013, 6, 1)),
+                ((1, 1, 0), (2013, 9, 1)), ((1, 0, 2), (2014, 1, 1))]:
+            (major, minor, patch) = version
+            branch, _ = Branch.objects.get_or_create(
+                subject=subject, major=major, minor=minor
+            )
+            self.releases[version] = Release.objects.create(
+                subject=subject, branch=branch, date=datetime.date(*date),
+                major=major, minor=minor, patch=patch
+            )
+
+        self.fixes = dict()
+        for (index, (version, release)) in enumerate(
+                sorted(self.releases.items())):
+            cve = Cve.objects.create(
+                subject=subject, identifier='CVE-2013-{0:04d}'.format(index),
+                publish_dt=release.date
+            )
+            cve_release = CveRelease.objects.create(
+                cve=cve, release=release, fix_sha=''
+            )
+            self.fixes[version] = VulnerabilityFix.objects.create(
+                cve_release=cve_release, name='f{0}'.format(index),
+                file='f.c'
+            )
+
+    def tearDown(self):
+        models.clear_vulnerability_fixes()
+
+    def _assert_fixes(self, release):
+        releases = Release.objects.filter(subject=release.subject)
+        self.assertEqual(
+            {self.fixes[_get_version(r)] for r in releases if r <= release},
+            release.past_vulnerability_fixes
+        )
+        self.assertEqual(
+            {self.fixes[_get_version(r)] for r in releases if r > release},
+            release.future_vulnerability_fixes
+        )
+
+    def test_vulnerability_fixes(self):
+        for release in Release.objects.all():
+            self._assert_fixes(release)
+
+        release = Release.objects.get(major=1, minor=0, patch=1)
+        self.assertEqual(
+            {self.fixes[(1, 0, 0)], self.fixes[(1, 0, 1)]},
+            release.past_vulnerability_fixes
+        )
+        self.assertEqual(
+            {self.fixes[(1, 0, 2)]}, release.future_vulnerability_fixes
+        )
+
+    def test_number(self):
+        subject = Subject.objects.get(name='ffmpeg')
+        self.assertEqual(4, Release.objects.number(subject))
+        self.assertEqual(0, Release.objects.number(subject))
+        self.assertEqual(
+            [(1, 0, 0), (1, 0, 1), (1, 1, 0), (1, 0, 2)],
+            [_get_version(r) for r in Release.objects.order_by('ordinal')]
+        )
+
+    def test_before_after_between(self):
+        Release.objects.number(Subject.objects.get(name='ffmpeg'))
+        release = Release.objects.get(major=1, minor=0, patch=1)
+        self.assertEqual(
+            [(1, 0, 0)],
+            [_get_version(r) for r in Release.objects.before(release)]
+        )
+        self.assertEqual(
+            {(1, 1, 0), (1, 0, 2)},
+            {_get_version(r) for r in Release.objects.after(release)}
+        )
+        self.assertEqual(
+            [(1, 0, 1), (1, 1, 0), (1, 0, 2)],
+            [
+                _get_version(r) for r in Release.objects.between(
+                    release, Release.objects.get(major=1, minor=0, patch=2)
+                )
+            ]
+        )
+
+        first = Release.objects.get(major=1, minor=0, patch=0)
+        self.assertFalse(Release.objects.before(first).exists())
+        self.assertEqual(
+            [(1, 0, 0)],
+            [_get_version(r) for r in Release.objects.between(first, first)]
+        )
+
+        subject = Subject.objects.create(name='wireshark', remote='')
+        other = Release.objects.create(
+            subject=subject, branch=release.branch, date=release.date,
+            major=1
+        )
+        self.assertRaises(
+            errors.UnnumberedReleaseError, Release.objects.after, other
+        )
+        Release.objects.number(subject)
+        other.refresh_from_db()
+        self.assertFalse(Release.objects.after(other).exists())
+        self.assertRaises(
+            Exception, Release.objects.between, release, other
+        )
+
+    def test_vulnerability_fixes_queries(self):
+        releases = list(Release.objects.all())
+        with self.assertNumQueries(1):
+            for release in releases:
+                release.past_vulnerability_fixes
+                release.future_vulnerability_fixes
+
+    def test_vulnerability_fixes_cleared(self):
+        def _get_fixes():
+            release = Release.objects.get(major=1, minor=0, patch=0)
+            return release.future_vulnerability_fixes
+
+        fixes = _get_fixes()
+        release = Release.objects.get(major=1, minor=0, patch=0)
+
+        cve = Cve.objects.create(
+            subject=release.subject, identifier='CVE-2014-0001',
+            publish_dt=datetime.date(2014, 1, 1)
+        )
+        cve_release = CveRelease.objects.create(
+            cve=cve, release=Release.objects.get(major=1, minor=0, patch=2),
+            fix_sha=''
+        )
+        fix = VulnerabilityFix.objects.create(
+            cve_release=cve_release, name='new', file='new.c'
+        )
+        self.assertEqual(fixes | {fix}, _get_fixes())
+
+        fix.delete()
+        self.assertEqual(fixes, _get_fixes())
+
+
+def _get_version(release):
+    return (release.major, release.minor, release.patch)
@@ -0,0 +1,249 @@
+import os
+import random
+import shutil
+import tempfile
+
+import networkx as nx
+
+from django.test import TestCase
+
+from app import pagerank
+from app.compact import CompactCallGraph
+from app.pagerank import PageRank
+from attacksurfacemeter.call import Call
+from attacksurfacemeter.call_graph import CallGraph
+from attacksurfacemeter.environments import Environments
+
+# Page ranks computed by CallGraph.get_page_rank, with the default tolerance
+#   of networkx.pagerank, are accurate to about this
+TOLERANCE = 1.0e-5
+
+ATTRIBUTES = [
+    'entry', 'exit', 'dangerous', 'defense', 'tested', 'vulnerable'
+]
+
+
+class PageRankTestCase(TestCase):
+    def setUp(self):
+        rng = random.Random(0)
+
+        nodes = [
+            Call('f{0}'.format(i), './f{0}.c'.format(i % 7), Environments.C)
+            for i in range(60)
+        ]
+
+        graph = nx.DiGraph()
+        for node in nodes:
+            attrs = dict()
+            for attribute in ATTRIBUTES:
+                if rng.random() < 0.2:
+                    attrs[attribute] = None
+            graph.add_node(node, **attrs)
+        for _ in range(200):
+            (caller, callee) = rng.sample(nodes, 2)
+            graph.add_edge(caller, callee, call=None)
+            graph.add_edge(callee, caller, **{'return': None})
+        # A dangling node
+        graph.add_node(Call('dangling', './f.c', Environments.C), exit=None)
+
+        self.call_graph = CallGraph('test', graph)
+        self.weights = {
+            'base': {'call': 100, 'return': 10},
+            'dangerous': 50, 'vulnerable': 1000
+        }
+
+    def test_get_page_rank(self):
+        self.call_graph.assign_weights(self.weights)
+        page_rank = PageRank(self.call_graph)
+
+        for (damping, entry, exit, other) in [
+                (0.85, 10000, 10000, 1), (0.1, 10, 1000000, 1),
+                (0.9, 1000, 10, 1)]:
+            expected = self.call_graph.get_page_rank(
+                damping=damping, entry=entry, exit=exit, other=other
+            )
+            actual = page_rank.get_page_rank(
+                damping=damping, entry=entry, exit=exit, other=other
+            )
+
+            self.assertEqual(set(expected), set(actual))
+            for node in expected:
+                self.assertAlmostEqual(
+                    expected[node], actual[node], delta=TOLERANCE
+                )
+
+    def test_update_weights(self):
+        page_rank = PageRank(self.call_graph)
+
+        self.call_graph.assign_weights(self.weights)
+        page_rank.update_weights()
+
+        expected = self.call_graph.get_page_rank()
+        actual = page_rank.get_page_rank()
+        for node in expected:
+            self.assertAlmostEqual(
+                expected[node], actual[node], delta=TOLERANCE
+            )
+
+    def test_warm_start(self):
+        self.call_graph.assign_weights(self.weights)
+        page_rank = PageRank(self.call_graph, tolerance=1.0e-10)
+
+        page_rank.get_page_rank(damping=0.5)
+        cold = page_rank.get_page_rank(damping=0.6, warm=False)
+        page_rank.get_page_rank(damping=0.5)
+        warm = page_rank.get_page_rank(damping=0.6, warm=True)
+
+        for node in cold:
+            self.assertAlmostEqual(cold[node], warm[node], places=6)
+
+    def test_combine(self):
+        self.call_graph.assign_weights(self.weights)
+        page_rank = PageRank(self.call_graph, tolerance=1.0e-10)
+
+        for damping in [0.1, 0.5, 0.85]:
+            basis = page_rank.solve_basis(damping)
+            for (entry, exit, other) in [
+                    (10, 10, 1), (1000000, 10, 1), (10, 1000000, 1),
+                    (10000, 100, 1)]:
+                expected = page_rank.solve(
+                    damping,
+                    page_rank.get_personalization(entry, exit, other),
+                    warm=False
+                )
+                actual = page_rank.combine(basis, entry, exit, other)
+                for (e, a) in zip(expected, actual):
+                    self.assertAlmostEqual(e, a, places=8)
+
+    def test_assign_weights(self):
+        page_rank = PageRank(self.call_graph)
+
+        for weights in [
+                self.weights,
+                {'base': {'call': 1, 'return': 1}},
+                {
+                    'base': {'call': 10, 'return': 10000}, 'dangerous': 100,
+                    'defense': 5, 'tested': 7, 'vulnerable': 10
+                }]:
+            self.call_graph.assign_weights(weights)
+            expected = [
+                self.call_graph.call_graph.edge[caller][callee]['weight']
+                for (caller, callee) in page_rank.edges
+            ]
+            actual = page_rank.get_weights(weights)
+            self.assertEqual(expected, actual.tolist())
+
+            page_rank.assign_weights(weights)
+            matrix = page_rank.matrix.copy()
+            page_rank.update_weights()
+            self.assertEqual(0, (matrix != page_rank.matrix).nnz)
+
+    def test_compact(self):
+        compact_call_graph = CompactCallGraph.from_call_graph(self.call_graph)
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        compact_call_graph.save(directory)
+        compact_call_graph = CompactCallGraph.load(directory)
+
+        expected = PageRank(self.call_graph)
+        actual = PageRank(compact_call_graph)
+        self.assertEqual(expected.nodes, actual.nodes)
+        self.assertEqual(len(expected.rows), len(actual.rows))
+        self.assertEqual(0, (expected.matrix != actual.matrix).nnz)
+
+        for weights in [
+                self.weights,
+                {
+                    'base': {'call': 10, 'return': 10000}, 'dangerous': 100,
+                    'defense': 5, 'tested': 7, 'vulnerable': 10
+                }]:
+            expected.assign_weights(weights)
+            actual.assign_weights(weights)
+            self.assertEqual(0, (expected.matrix != actual.matrix).nnz)
+
+            expected_page_rank = expected.get_page_rank(0.85, 100, 10, 1)
+            actual_page_rank = actual.get_page_rank(0.85, 100, 10, 1)
+            for node in expected.nodes:
+                self.assertAlmostEqual(
+                    expected_page_rank[node], actual_page_rank[node]
+                )
+
+        self.assertRaises(Exception, actual.update_weights)
+
+    def test_estimate(self):
+        self.call_graph.assign_weights(self.weights)
+        page_rank = PageRank(self.call_graph)
+
+        for (damping, entry, exit, other) in [
+                (0.85, 10000, 10000, 1), (0.1, 10, 1000000, 1),
+                (0.5, 1000, 10, 1)]:
+            personalization = page_rank.get_personalization(
+                entry, exit, other
+            )
+            expected = page_rank.solve(damping, personalization, warm=False)
+            (actual, error) = page_rank.estimate(
+                damping, personalization, walks=200000, random_state=0
+            )
+
+            self.assertAlmostEqual(1.0, actual.sum())
+            self.assertLess(abs(expected - actual).max(), 0.005)
+            self.assertLess(abs(expected - actual).sum(), 0.02)
+            self.assertTrue((error < 0.005).all())
+
+            (again, _) = page_rank.estimate(
+                damping, personalization, walks=200000, random_state=0
+            )
+            self.assertEqual(actual.tolist(), again.tolist())
+
+    def test_log(self):
+        (_, log) = tempfile.mkstemp()
+        try:
+            page_rank = PageRank(
+                self.call_graph, max_iterations=5, log=log,
+                context={'release': 'test'}
+            )
+            page_rank.assign_weights(self.weights)
+            page_rank.get_page_rank(damping=0.1, entry=10, exit=100)
+            with self.assertRaises(Exception):
+                page_rank.get_page_rank(damping=0.9)
+            page_rank.solve_basis(0.1, warm=False)
+
+            records = pagerank.read_log(log)
+        finally:
+            os.remove(log)
+
+        self.assertEqual(5, len(records))
+        self.assertEqual(
+            [True, False, True, True, True],
+            [record['converged'] for record in records]
+        )
+        self.assertEqual(
+            [None, None, 'entry', 'exit', 'other'],
+            [record.get('basis') for record in records]
+        )
+        for record in records:
+            self.assertEqual('test', record['release'])
+            self.assertEqual(self.weights, record['weights'])
+            self.assertEqual(61, record['nodes'])
+            self.assertLessEqual(record['iterations'], 5)
+        self.assertEqual(
+            (0.1, 10, 100, 1),
+            tuple(
+                records[0][field]
+                for field in ['damping', 'entry', 'exit', 'other']
+            )
+        )
+        self.assertEqual(5, records[1]['iterations'])
+
+        summary = pagerank.summarize(records, slowest=2)
+        self.assertEqual({'solve': 5}, summary['methods'])
+        self.assertEqual(
+            [(0.1, 4, 0), (0.9, 1, 1)],
+            [
+                (row['damping'], row['solutions'], row['failures'])
+                for row in summary['dampings']
+            ]
+        )
+        self.assertEqual(1, len(summary['failures']))
+        self.assertEqual(1, summary['failures'][0][1])
+        self.assertEqual(2, len(summary['slowest']))
@@ -0,0 +1,50 @@
+import statistics as stat
+
+import networkx as nx
+
+from django.test import TestCase
+
+from app import proximity
+from attacksurfacemeter.call_graph import CallGraph
+
+
+class ProximityTestCase(TestCase):
+    def setUp(self):
+        graph = nx.DiGraph()
+        graph.add_node('main', entry='entry')
+        graph.add_node('read', entry='entry')
+        graph.add_node('write', exit='exit')
+        graph.add_node('parse')
+        graph.add_node('validate', defense='defense')
+        graph.add_node('strcpy', dangerous='dangerous')
+        graph.add_node('orphan')
+
+        graph.add_edges_from([
+            ('main', 'read'), ('main', 'parse'), ('read', 'parse'),
+            ('parse', 'validate'), ('parse', 'strcpy'),
+            ('validate', 'write'), ('strcpy', 'write'), ('write', 'parse'),
+        ])
+
+        self.call_graph = CallGraph('test', graph)
+
+    def test_get_proximity(self):
+        for attribute in proximity.ATTRIBUTES:
+            actual = proximity.get_proximity(self.call_graph, attribute)
+
+            for (node, _) in self.call_graph.nodes:
+                metrics = self.call_graph.get_shortest_path_length(
+                    node, attribute
+                )
+                expected = None
+                if metrics is not None:
+                    expected = stat.mean(metrics.values()) if metrics else 0.0
+
+                self.assertEqual(expected, actual[node], msg=node)
+
+    def test_get_proximities(self):
+        actual = proximity.get_proximities(self.call_graph)
+
+        self.assertEqual(set(proximity.ATTRIBUTES), set(actual.keys()))
+        self.assertEqual(0.0, actual['entry']['main'])
+        self.assertEqual(2.0, actual['exit']['parse'])
+        self.assertIsNone(actual['entry']['orphan'])
@@ -0,0 +1,87 @@
+import datetime
+
+from django.db import connection
+from django.test import TransactionTestCase
+
+from app import schema, utilities
+from app.models import Branch, Release, Sensitivity, Subject
+
+
+class SchemaTestCase(TransactionTestCase):
+    # The SQLite schema editor cannot alter tables in the transaction that
+    #   TestCase runs each test in
+
+    def _get_columns(self, model):
+        return schema._get_columns(connection, model._meta.db_table)
+
+    def test_add_release_ordinal(self):
+        self.assertFalse(schema.add_release_ordinal())
+
+        # Drops the column as a database that predates it would lack it
+        table = Release._meta.db_table
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, table
+            )
+            for (name, constraint) in constraints.items():
+                if 'ordinal' in constraint['columns']:
+                    cursor.execute('DROP INDEX {0}'.format(
+                        connection.ops.quote_name(name)
+                    ))
+            cursor.execute('ALTER TABLE {0} DROP COLUMN ordinal'.format(
+                connection.ops.quote_name(table)
+            ))
+        self.assertNotIn('ordinal', self._get_columns(Release))
+
+        self.assertTrue(schema.add_release_ordinal())
+        self.assertIn('ordinal', self._get_columns(Release))
+        self.assertTrue(schema._has_index(
+            connection, Release._meta.db_table, ['subject_id', 'ordinal']
+        ))
+
+        subject = Subject.objects.create(name='ffmpeg', remote='')
+        branch = Branch.objects.create(subject=subject, major=2)
+        release = Release.objects.create(
+            subject=subject, branch=branch, date=datetime.date(2014, 1, 1),
+            major=2
+        )
+        self.assertEqual(0, Release.objects.get(pk=release.pk).ordinal)
+        self.assertFalse(schema.add_release_ordinal())
+
+    def test_add_sensitivity_unique(self):
+        self.assertFalse(schema.add_sensitivity_unique())
+
+        # Drops the constraint as a database that predates it would lack it
+        with connection.schema_editor() as editor:
+            editor.alter_unique_together(
+                Sensitivity, Sensitivity._meta.unique_together, set()
+            )
+
+        subject = Subject.objects.create(name='ffmpeg', remote='')
+        branch = Branch.objects.create(subject=subject, major=2)
+        release = Release.objects.create(
+            subject=subject, branch=branch, date=datetime.date(2014, 1, 1),
+            major=2
+        )
+        parameters = [
+            (0.1, 10, 10, 1, 10, 10, 10, 10),
+            (0.1, 10, 10, 1, 10, 10, 10, 10),
+            (0.2, 10, 10, 1, 10, 10, 10, 100),
+        ]
+        Sensitivity.objects.bulk_create([
+            utilities._get_sensitivity(release, parameters_, index, 0.1)
+            for (index, parameters_) in enumerate(parameters)
+        ])
+        self.assertEqual(3, Sensitivity.objects.count())
+
+        self.assertTrue(schema.add_sensitivity_unique())
+        self.assertEqual(
+            [0, 2],
+            list(Sensitivity.objects.order_by('id').values_list(
+                'p', flat=True
+            ))
+        )
+        self.assertEqual(0, utilities._bulk_create_ignore([
+            utilities._get_sensitivity(release, parameters[0], 0.5, 0.1)
+        ]))
+        self.assertFalse(schema.add_sensitivity_unique())
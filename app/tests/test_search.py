@@ -0,0 +1,78 @@
+import numpy
+
+from django.test import TestCase
+
+from app.grid import ParameterGrid
+from app.search import CoarseToFineSearch
+
+
+class CoarseToFineSearchTestCase(TestCase):
+    def setUp(self):
+        self.grid = ParameterGrid.default()
+        self.shape = tuple(len(values) for (_, values) in self.grid.axes)
+
+    def _search(self, search, optimum):
+        # The p-value grows with the distance from the optimum and d is
+        #   constant, i.e. the optimum is the parameter set of smallest p
+        optimum = numpy.array(optimum)
+
+        def evaluate(index):
+            coordinates = numpy.array(numpy.unravel_index(index, self.shape))
+            return 1.0e-3 * float(((coordinates - optimum) ** 2).sum())
+
+        evaluations = 0
+        while True:
+            parameters = search.propose()
+            if not parameters:
+                break
+            evaluations += len(parameters)
+            search.update([
+                (index, parameters_, evaluate(index), 1.0)
+                for (index, parameters_) in parameters
+            ])
+        return evaluations
+
+    def test_search(self):
+        for optimum in [
+                (0, 0, 0, 0, 0, 0, 0, 0), (8, 5, 5, 0, 3, 3, 2, 2),
+                (3, 1, 4, 0, 1, 2, 1, 0), (6, 2, 3, 0, 2, 1, 0, 1)]:
+            search = CoarseToFineSearch(self.grid, len(self.grid))
+            evaluations = self._search(search, optimum)
+
+            (index, parameters, p, _) = search.best[0]
+            self.assertEqual(
+                int(numpy.ravel_multi_index(optimum, self.shape)), index
+            )
+            self.assertEqual(self.grid[index], parameters)
+            self.assertEqual(0.0, p)
+            self.assertLess(evaluations, len(self.grid) / 50)
+            self.assertEqual(evaluations, len(search.results))
+
+    def test_budget(self):
+        search = CoarseToFineSearch(self.grid, 200)
+        evaluations = self._search(search, (3, 1, 4, 0, 1, 2, 1, 0))
+
+        self.assertEqual(200, evaluations)
+        self.assertEqual([], search.propose())
+
+    def test_lattice(self):
+        search = CoarseToFineSearch(self.grid, len(self.grid), points=3)
+
+        self.assertEqual(
+            [[0, 4, 8], [0, 3, 5], [0, 3, 5], [0], [0, 2, 3], [0, 2, 3],
+             [0, 1, 2], [0, 1, 2]],
+            search.lattice
+        )
+        self.assertEqual(3 ** 7, len(search.propose()))
+
+    def test_best(self):
+        search = CoarseToFineSearch(self.grid, 10, width=2)
+        search.update([
+            (0, self.grid[0], 0.5, 0.1), (1, self.grid[1], 0.0, -0.2),
+            (2, self.grid[2], 0.0, 0.3), (3, self.grid[3], float('nan'), 1.0)
+        ])
+
+        self.assertEqual(
+            [(2, self.grid[2], 0.0, 0.3), (1, self.grid[1], 0.0, -0.2)],
+            search.best
+        )
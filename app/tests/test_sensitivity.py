@@ -0,0 +1,37 @@
+import datetime
+
+from django.test import TestCase
+
+from app import utilities
+from app.models import Branch, Release, Sensitivity, Subject
+
+
+class SensitivityTestCase(TestCase):
+    def setUp(self):
+        subject = Subject.objects.create(name='ffmpeg', remote='')
+        branch = Branch.objects.create(subject=subject, major=2)
+        self.release = Release.objects.create(
+            subject=subject, branch=branch, date=datetime.date(2014, 1, 1),
+            major=2
+        )
+
+    def test_bulk_create_ignore(self):
+        parameters = [
+            (0.1, 10, 10, 1, 10, 10, 10, 10),
+            (0.1, 10, 100, 1, 10, 10, 10, 10),
+            (0.2, 10, 10, 1, 10, 10, 10, 100),
+        ]
+
+        self.assertEqual(2, utilities._bulk_create_ignore([
+            utilities._get_sensitivity(self.release, parameters_, 0.5, 0.1)
+            for parameters_ in parameters[:2]
+        ]))
+        self.assertEqual(1, utilities._bulk_create_ignore([
+            utilities._get_sensitivity(self.release, parameters_, 0.5, 0.1)
+            for parameters_ in parameters
+        ]))
+        self.assertEqual(3, Sensitivity.objects.count())
+        self.assertEqual(
+            {utilities._get_key(parameters_) for parameters_ in parameters},
+            utilities._get_completed(self.release)
+        )
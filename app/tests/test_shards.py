@@ -0,0 +1,139 @@
+import datetime
+import os
+import tempfile
+
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+from app import shards
+from app.models import (
+    Branch, File, Function, Release, ReleaseStatistics, Sensitivity, Subject
+)
+
+
+class ShardRouterTestCase(TestCase):
+    def test_router(self):
+        router = shards.ShardRouter()
+        for model in [Function, Release]:
+            self.assertIsNone(router.db_for_read(model))
+            self.assertIsNone(router.db_for_write(model))
+
+        databases = dict(settings.DATABASES)
+        databases[shards.SHARD] = {
+            'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:',
+            'BULK': 50
+        }
+        with self.settings(DATABASES=databases):
+            self.assertTrue(shards.is_enabled())
+            for model in [Function, File, ReleaseStatistics, Sensitivity]:
+                self.assertEqual(shards.SHARD, router.db_for_read(model))
+                self.assertEqual(shards.SHARD, router.db_for_write(model))
+            for model in [Release, Subject]:
+                self.assertIsNone(router.db_for_read(model))
+                self.assertIsNone(router.db_for_write(model))
+
+    def test_get_databases(self):
+        self.assertEqual(['default'], shards.get_databases(Sensitivity))
+
+        databases = dict(settings.DATABASES)
+        databases[shards.SHARD] = {
+            'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:',
+            'BULK': 50
+        }
+        with self.settings(DATABASES=databases):
+            self.assertEqual(
+                ['default', shards.SHARD],
+                shards.get_databases(Sensitivity)
+            )
+            self.assertEqual(['default'], shards.get_databases(Release))
+
+
+class MergeTestCase(TransactionTestCase):
+    # A shard cannot be attached in the transaction that TestCase runs each
+    #   test in
+
+    def setUp(self):
+        subject = Subject.objects.create(name='ffmpeg', remote='')
+        branch = Branch.objects.create(subject=subject, major=2)
+        self.release = Release.objects.create(
+            subject=subject, branch=branch, date=datetime.date(2014, 1, 1),
+            major=2
+        )
+
+        (handle, self.path) = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def _create_shard(self):
+        # Moves the rows of the sharded models in the default database to the
+        #   shard, as loaddb and analyzesensitivity would have saved them
+        with connection.cursor() as cursor:
+            cursor.execute('ATTACH DATABASE %s AS shard', [self.path])
+            for model in [Function, File, ReleaseStatistics, Sensitivity]:
+                table = connection.ops.quote_name(model._meta.db_table)
+                cursor.execute(
+                    'CREATE TABLE shard.{0} AS SELECT * FROM main.{0}'.format(
+                        table
+                    )
+                )
+                cursor.execute('DELETE FROM main.{0}'.format(table))
+            cursor.execute('DETACH DATABASE shard')
+
+    def test_merge(self):
+        for name in ['a', 'b']:
+            Function.objects.create(
+                release=self.release, name=name, file='f.c', fan_in=0,
+                fan_out=0
+            )
+        File.objects.create(
+            release=self.release, name='f.c', fan_in=0, fan_out=0
+        )
+        for granularity in ['function', 'file']:
+            ReleaseStatistics.objects.create(
+                release=self.release, granularity=granularity
+            )
+        Sensitivity.objects.create(
+            release=self.release, damping=0.85, personalization_entry=1,
+            personalization_exit=1, personalization_other=1, weight_call=1,
+            weight_return=1, weight_dangerous=1, weight_defense=1,
+            weight_tested=1, weight_vulnerable=1, p=0.01, d=0.5
+        )
+        self._create_shard()
+        self.assertFalse(Function.objects.exists())
+        self.assertFalse(Release.objects.get().is_loaded)
+
+        counts = shards.merge(self.path)
+        self.assertEqual(
+            {'function': 2, 'file': 1, 'release_statistics': 2,
+             'sensitivity': 1},
+            counts
+        )
+        self.assertEqual(
+            ['a', 'b'],
+            sorted(Function.objects.values_list('name', flat=True))
+        )
+        self.assertEqual(1, File.objects.count())
+        self.assertEqual(2, ReleaseStatistics.objects.count())
+        self.assertEqual(1, Sensitivity.objects.count())
+        self.assertTrue(Release.objects.get().is_loaded)
+
+        # Merging a shard again copies nothing
+        counts = shards.merge(self.path)
+        self.assertEqual({0}, set(counts.values()))
+        self.assertEqual(2, Function.objects.count())
+
+    def test_merge_partial(self):
+        Function.objects.create(
+            release=self.release, name='a', file='f.c', fan_in=0, fan_out=0
+        )
+        ReleaseStatistics.objects.create(
+            release=self.release, granularity='function'
+        )
+        self._create_shard()
+
+        shards.merge(self.path)
+        self.assertEqual(1, Function.objects.count())
+        self.assertFalse(Release.objects.get().is_loaded)
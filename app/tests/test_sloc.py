@@ -0,0 +1,64 @@
+import os
+import sqlite3
+import tempfile
+
+from django.test import TestCase
+
+from app.sloc import SlocIndex
+
+
+class SlocIndexTestCase(TestCase):
+    def setUp(self):
+        (handle, self.path) = tempfile.mkstemp(suffix='.sqlite')
+        os.close(handle)
+
+        connection = sqlite3.connect(self.path)
+        connection.executescript('''
+            CREATE TABLE function (name TEXT, file TEXT, sloc INTEGER);
+            CREATE TABLE file (name TEXT, sloc INTEGER);
+
+            INSERT INTO function VALUES ('main', './ffmpeg.c', 120);
+            INSERT INTO function VALUES ('init', './libavcodec/a.c', 10);
+            INSERT INTO function VALUES ('init', './libavcodec/b.c', 20);
+            INSERT INTO function VALUES ('close', './libavcodec/a.c', 5);
+            INSERT INTO function VALUES ('close', './libavcodec/a.c', 6);
+
+            INSERT INTO file VALUES ('./ffmpeg.c', 4000);
+            INSERT INTO file VALUES ('./libavcodec/a.c', 300);
+            INSERT INTO file VALUES ('./libavcodec/a.c', 301);
+        ''')
+        connection.commit()
+        connection.close()
+
+        self.index = SlocIndex(self.path)
+
+    def test_get_function_sloc(self):
+        # Scenario: Unique name and file
+        self.assertEqual(
+            120, self.index.get_function_sloc('main', './ffmpeg.c')
+        )
+        self.assertEqual(
+            20, self.index.get_function_sloc('init', './libavcodec/b.c')
+        )
+
+        # Scenario: Unknown file, falling back to a unique name
+        self.assertEqual(120, self.index.get_function_sloc('main', './x.c'))
+
+        # Scenario: Unknown file, name is not unique
+        self.assertIsNone(self.index.get_function_sloc('init', './x.c'))
+
+        # Scenario: Name and file are not unique
+        self.assertIsNone(
+            self.index.get_function_sloc('close', './libavcodec/a.c')
+        )
+
+        # Scenario: Unknown function
+        self.assertIsNone(self.index.get_function_sloc('exit', './x.c'))
+
+    def test_get_file_sloc(self):
+        self.assertEqual(4000, self.index.get_file_sloc('./ffmpeg.c'))
+        self.assertIsNone(self.index.get_file_sloc('./libavcodec/a.c'))
+        self.assertIsNone(self.index.get_file_sloc('./x.c'))
+
+    def tearDown(self):
+        os.remove(self.path)
@@ -1,4 +1,5 @@
 import numpy
+import scipy.stats
 
 from django.test import TestCase
 
@@ -83,3 +84,54 @@ class StatsTestCase(TestCase):
 
         # Assert
         self.assertAlmostEqual(expected, actual)
+
+    def test_rankdata(self):
+        # Arrange
+        scores = numpy.array([
+            [3.0, 1.0], [1.0, 1.0], [2.0, 1.0], [3.0, 0.5], [0.5, 2.0]
+        ])
+        expected = numpy.array([
+            [4.5, 3.0], [2.0, 3.0], [3.0, 3.0], [4.5, 1.0], [1.0, 5.0]
+        ])
+
+        # Act
+        actual = stats.rankdata(scores)
+
+        # Assert
+        self.assertTrue(numpy.array_equal(expected, actual))
+
+    def test_batch_ranksums(self):
+        # Arrange
+        random = numpy.random.RandomState(0)
+        # Rounding introduces ties
+        scores = numpy.round(random.standard_normal((200, 10)), 1)
+        treatment = random.random_sample(200) < 0.2
+
+        # Act
+        (z, p) = stats.batch_ranksums(scores, treatment)
+
+        # Assert
+        for column in range(scores.shape[1]):
+            (expected_z, expected_p) = scipy.stats.ranksums(
+                scores[treatment, column], scores[~treatment, column]
+            )
+            self.assertAlmostEqual(expected_z, z[column])
+            self.assertAlmostEqual(expected_p, p[column])
+
+    def test_batch_cohensd(self):
+        # Arrange
+        random = numpy.random.RandomState(0)
+        scores = random.standard_normal((200, 10))
+        treatment = random.random_sample(200) < 0.2
+
+        for pooled in [True, False]:
+            # Act
+            actual = stats.batch_cohensd(scores, treatment, pooled=pooled)
+
+            # Assert
+            for column in range(scores.shape[1]):
+                expected = stats.cohensd(
+                    scores[treatment, column], scores[~treatment, column],
+                    pooled=pooled
+                )
+                self.assertAlmostEqual(expected, actual[column])
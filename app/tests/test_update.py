@@ -0,0 +1,83 @@
+import datetime
+
+from django.test import TestCase
+
+from app import utilities
+from app.models import Branch, Function, Release, Subject
+from attacksurfacemeter.call import Call
+from attacksurfacemeter.environments import Environments
+
+
+class UpdateTestCase(TestCase):
+    def setUp(self):
+        subject = Subject.objects.create(name='ffmpeg', remote='')
+        branch = Branch.objects.create(subject=subject, major=2)
+        release = Release.objects.create(
+            subject=subject, branch=branch, date=datetime.date(2014, 1, 1),
+            major=2
+        )
+        for (name, file_) in [
+                ('main', './main.c'), ('init', './a.c'), ('init', './b.c'),
+                ('free', './a.c')]:
+            Function.objects.create(
+                release=release, name=name, file=file_, fan_in=0, fan_out=0
+            )
+        self.functions = Function.objects.filter(
+            release=release
+        ).order_by('id')
+        self.rows = list(self.functions.values_list('id', 'name', 'file'))
+
+    def test_resolve(self):
+        keys = utilities._get_keys(Function, self.rows)
+
+        ids = [
+            utilities._resolve(keys, Function, Call(name, file_, env))
+            for (name, file_, env) in [
+                # Unique names resolve regardless of the file
+                ('main', './other.c', Environments.C),
+                ('free', './a.c', Environments.C),
+                # Duplicate names resolve only along with the file
+                ('init', './a.c', Environments.C),
+                ('init', './b.c', Environments.C),
+                ('init', './c.c', Environments.C),
+                ('exit', './a.c', Environments.C),
+            ]
+        ]
+        self.assertEqual(
+            [
+                self.rows[0][0], self.rows[3][0], self.rows[1][0],
+                self.rows[2][0], None, None
+            ],
+            ids
+        )
+
+    def test_bulk_update(self):
+        utilities._bulk_update(
+            Function, ['page_rank', 'sloc'],
+            [(self.rows[0][0], [0.25, 10]), (self.rows[2][0], [0.5, None])]
+        )
+        self.assertEqual(
+            [(0.25, 10), (None, None), (0.5, None), (None, None)],
+            list(self.functions.values_list('page_rank', 'sloc'))
+        )
+
+        utilities._bulk_update(
+            Function, ['is_entry', 'proximity_to_entry', 'fan_in'],
+            [
+                (self.rows[1][0], [True, 0.0, 3]),
+                (self.rows[2][0], [False, 1.5, 2]),
+                (self.rows[3][0], [True, None, 1]),
+            ]
+        )
+        self.assertEqual(
+            [
+                (False, None, 0, 0.25), (True, 0.0, 3, None),
+                (False, 1.5, 2, 0.5), (True, None, 1, None)
+            ],
+            list(self.functions.values_list(
+                'is_entry', 'proximity_to_entry', 'fan_in', 'page_rank'
+            ))
+        )
+
+        # Nothing to update
+        utilities._bulk_update(Function, ['page_rank'], [])
@@ -1,38 +1,102 @@
+import collections
 import datetime
 import csv
+import math
 import multiprocessing
 import os
-import statistics as stat
 import sys
 import threading
 
 import numpy
-import scipy.stats
 
 import app.stats
 
 from queue import Queue
 
 from django.conf import settings
-from django.db import connection, transaction
+from django.db import connections, router, transaction
 
-from app import constants
+from app import constants, ingest, shards
+from app.grid import ParameterGrid
 from app.helpers import debug
+from app.search import CoarseToFineSearch, get_score
 from app.models import *
 from attacksurfacemeter.call import Call
+from attacksurfacemeter.call_graph import CallGraph
 from attacksurfacemeter.environments import Environments
 from attacksurfacemeter.granularity import Granularity
-
-
-def load(subject, processes):
+from attacksurfacemeter.loaders.multigprof_loader import MultigprofLoader
+
+# Number of node index ranges to create per process in _load. More than one
+#   range per process evens out the load when some nodes take longer.
+TASKS_PER_PROCESS = 8
+
+# Columns of the shared memory buffers that _analyze writes the metrics
+#   collected from a node to, along with the ctypes type code of each column.
+#   A null value is represented by -1 in an integer column and by NaN in a
+#   floating point column.
+COLUMNS = (
+    ('is_entry', 'b'), ('is_exit', 'b'), ('is_tested', 'b'),
+    ('calls_dangerous', 'b'), ('is_defense', 'b'),
+    ('was_vulnerable', 'b'), ('becomes_vulnerable', 'b'),
+    ('sloc', 'l'), ('fan_in', 'l'), ('fan_out', 'l'), ('frequency', 'l'),
+    ('proximity_to_entry', 'd'), ('proximity_to_exit', 'd'),
+    ('proximity_to_defense', 'd'), ('proximity_to_dangerous', 'd'),
+    ('page_rank', 'd'),
+)
+NULL = {'b': 0, 'l': -1, 'd': float('nan')}
+
+# Read-only state that each process in the pool spawned by _load is
+#   initialized with (see _initialize)
+_subject = None
+_nodes = None
+_buffers = None
+# PageRank solver and boolean mask, over the nodes of the solver, of the
+#   vulnerable nodes that the processes spawned by analyze_sensitivity are
+#   initialized with
+_page_rank = None
+_treatment = None
+
+# Columns of Sensitivity that identify a parameter set, in the order of the
+#   elements of the key of a parameter set (see _get_key)
+PARAMETER_FIELDS = (
+    'damping', 'personalization_entry', 'personalization_exit',
+    'personalization_other', 'weight_call', 'weight_return',
+    'weight_dangerous', 'weight_defense', 'weight_tested', 'weight_vulnerable'
+)
+
+# Statements that insert rows while ignoring those that violate a uniqueness
+#   constraint, by database vendor (see _bulk_create_ignore)
+INSERT_IGNORE = {
+    'sqlite': 'INSERT OR IGNORE INTO {table} ({columns}) VALUES {values}',
+    'postgresql': (
+        'INSERT INTO {table} ({columns}) VALUES {values} '
+        'ON CONFLICT DO NOTHING'
+    ),
+    'mysql': 'INSERT IGNORE INTO {table} ({columns}) VALUES {values}',
+}
+
+
+def load(subject, processes, contract=False):
     begin = datetime.datetime.now()
 
     debug('Loading {0}'.format(subject.release))
     subject.prepare(processes)
-    subject.load_call_graph(processes)
-    subject.assign_page_rank()
+    subject.load_call_graph(processes, contract=contract)
+
+    # The file granularity call graph is contracted from the function
+    #   granularity call graph rather than loaded from the cflow and gprof
+    #   files again
+    subjects = [subject]
+    if contract:
+        subjects.append(subject.contract(processes))
 
-    _load(subject, processes)
+    for subject_ in subjects:
+        debug('Loading {0} granularity'.format(subject_.granularity))
+        subject_.assign_page_rank()
+        subject_.assign_proximity()
+
+        _load(subject_, processes)
 
     end = datetime.datetime.now()
     debug('Loading {0} completed in {1:.2f} minutes'.format(
@@ -43,36 +107,47 @@ def load(subject, processes):
 def _load(subject, processes):
     debug('Processing {0}'.format(subject.release))
 
-    manager = multiprocessing.Manager()
-
-    # Shared queue for communication between _analyze and _save
-    queue = manager.Queue(500)
-
-    # Consumer: Spawn a process to save function to the database
-    instance = Function
+    nodes = list(subject.call_graph.nodes)
+
+    # Shared memory buffers, indexed by the position of the node in nodes,
+    #   that the processes in the pool write the metrics to
+    buffers = {
+        column: multiprocessing.RawArray(typecode, len(nodes))
+        for (column, typecode) in COLUMNS
+    }
+
+    # Fan metrics are cached by the call graph on first access. Computing them
+    #   before the pool is spawned allows the processes to inherit the cache.
+    subject.call_graph.get_fan()
+
+    # The processes must not share the database connections of the parent
+    for connection in connections.all():
+        connection.close()
+
+    # Producers: Spawn a pool processes to collect the metrics. The subject
+    #   (and its call graph) is handed to each process once, when the process
+    #   is initialized, and the tasks are ranges of node indices.
+    with multiprocessing.Pool(
+            processes, initializer=_initialize,
+            initargs=(subject, nodes, buffers)
+         ) as pool:
+        ranges = _get_ranges(len(nodes), processes)
+        for (index, _) in enumerate(pool.imap_unordered(
+                _analyze_range, ranges)):
+            debug('Analyzed {0} ranges of nodes'.format(index + 1), line=True)
+
+    # Consumer: Save the metrics to the database with the fastest backend
+    #   for the database (see app.ingest)
+    model = Function
+    fields = ['release', 'name', 'file']
     if subject.granularity == Granularity.FILE:
-        instance = File
-
-    process = multiprocessing.Process(
-            target=_save, args=(instance, len(subject.call_graph.nodes), queue)
-        )
-    process.start()
-
-    # Producers: Spawn a pool processes to generate Function objects
-    with multiprocessing.Pool(processes) as pool:
-        pool.starmap(
-            _analyze,
-            [
-                (node, attrs, subject, queue)
-                for (node, attrs) in subject.call_graph.nodes
-            ],
-            chunksize=1
-        )
+        model = File
+        fields = ['release', 'name']
+    fields += [column for (column, _) in COLUMNS]
 
-    process.join()
-
-    # TODO: Review hack
-    connection.close()
+    ingest.get_backend(using=router.db_for_write(model)).save(
+        model, fields, _get_rows(subject, nodes, buffers), count=len(nodes)
+    )
 
     release = subject.release
 
@@ -88,225 +163,746 @@ def _load(subject, processes):
 
     release_statistics.save()
 
-    if ReleaseStatistics.objects.filter(release=release).count() == 2:
-        release.is_loaded = True
-    release.save()
-
-
-def _analyze(node, attrs, subject, queue):
-    instance = None
-    if subject.granularity == Granularity.FUNC:
-        instance = Function()
-        instance.name = node.function_name
-        instance.file = node.function_signature
-    elif subject.granularity == Granularity.FILE:
-        instance = File()
-        instance.name = node.function_signature
-
-    instance.release = subject.release
-    instance.is_entry = node in subject.call_graph.entry_points
-    instance.is_exit = node in subject.call_graph.exit_points
-    instance.was_vulnerable = node in subject.were_vuln
-    instance.becomes_vulnerable = node in subject.become_vuln
-    instance.is_tested = 'tested' in attrs
-    instance.calls_dangerous = 'dangerous' in attrs
-    instance.is_defense = 'defense' in attrs
-    instance.sloc = subject.get_sloc(
+    # With a shard, the release is marked as loaded in the default database
+    #   when the shard is merged (see app.shards.merge) such that a release
+    #   of a shard that is never merged is loaded again
+    if not shards.is_enabled():
+        if ReleaseStatistics.objects.filter(release=release).count() == 2:
+            release.is_loaded = True
+        release.save()
+
+
+def _initialize(subject, nodes, buffers):
+    global _subject, _nodes, _buffers
+
+    _subject = subject
+    _nodes = nodes
+    _buffers = buffers
+
+    # Sets for constant time membership tests in _analyze
+    _subject.were_vuln = set(_subject.were_vuln)
+    _subject.become_vuln = set(_subject.become_vuln)
+
+
+def _get_ranges(count, processes):
+    size = max(1, math.ceil(count / (processes * TASKS_PER_PROCESS)))
+    for begin in range(0, count, size):
+        yield (begin, min(begin + size, count))
+
+
+def _analyze_range(range_):
+    (begin, end) = range_
+    for index in range(begin, end):
+        (node, attrs) = _nodes[index]
+        _analyze(index, node, attrs, _subject, _buffers)
+
+
+def _analyze(index, node, attrs, subject, buffers):
+    metrics = dict()
+
+    metrics['is_entry'] = 'entry' in attrs
+    metrics['is_exit'] = 'exit' in attrs
+    metrics['was_vulnerable'] = node in subject.were_vuln
+    metrics['becomes_vulnerable'] = node in subject.become_vuln
+    metrics['is_tested'] = 'tested' in attrs
+    metrics['calls_dangerous'] = 'dangerous' in attrs
+    metrics['is_defense'] = 'defense' in attrs
+    metrics['sloc'] = subject.get_sloc(
             node.function_name, node.function_signature
         )
-    (instance.fan_in, instance.fan_out) = subject.call_graph.get_fan(node)
-    instance.frequency = attrs['frequency'] if 'frequency' in attrs else 0
+    (metrics['fan_in'], metrics['fan_out']) = subject.call_graph.get_fan(node)
+    metrics['frequency'] = attrs['frequency'] if 'frequency' in attrs else 0
+
+    metrics['page_rank'] = attrs['page_rank']
+
+    metrics['proximity_to_entry'] = attrs['proximity_to_entry']
+    metrics['proximity_to_exit'] = attrs['proximity_to_exit']
+    metrics['proximity_to_defense'] = attrs['proximity_to_defense']
+    metrics['proximity_to_dangerous'] = attrs['proximity_to_dangerous']
+
+    for (column, typecode) in COLUMNS:
+        value = metrics[column]
+        if value is None:
+            value = NULL[typecode]
+        buffers[column][index] = value
+
+
+def _get_rows(subject, nodes, buffers):
+    # Rows of values in the order of the fields that _load saves
+    for (index, (node, _)) in enumerate(nodes):
+        if subject.granularity == Granularity.FUNC:
+            row = [
+                subject.release.id, node.function_name,
+                node.function_signature
+            ]
+        elif subject.granularity == Granularity.FILE:
+            row = [subject.release.id, node.function_signature]
+
+        for (column, typecode) in COLUMNS:
+            value = buffers[column][index]
+            if typecode == 'b':
+                value = bool(value)
+            elif typecode == 'l' and value == NULL['l']:
+                value = None
+            elif typecode == 'd' and math.isnan(value):
+                value = None
+            row.append(value)
+
+        yield tuple(row)
+
+
+def profile(subject, processes):
+    begin = datetime.datetime.now()
 
-    instance.page_rank = attrs['page_rank']
+    debug('Profiling {0}'.format(subject.release))
 
-    # Entry points
-    metrics = subject.call_graph.get_shortest_path_length(node, 'entry')
-    if metrics is not None:
-        instance.proximity_to_entry = (
-            stat.mean(metrics.values()) if metrics else 0.0
-        )
+    os.makedirs(subject.gprofs_dir, exist_ok=True)
 
-    # Exit points
-    metrics = subject.call_graph.get_shortest_path_length(node, 'exit')
-    if metrics is not None:
-        instance.proximity_to_exit = (
-            stat.mean(metrics.values()) if metrics else 0.0
-        )
+    groups = subject.get_gmon_groups()
+    removed = subject.remove_stale_gprofs(groups)
+    if removed:
+        debug('Removed {0} stale gprof files'.format(removed))
+    pending = [
+        (name, gmons_name) for (name, gmons_name) in groups
+        if not subject.is_gprof_group_current(name, gmons_name)
+    ]
+    debug('{0} of {1} gprof files are up to date'.format(
+        len(groups) - len(pending), len(groups)
+    ))
 
-    # Designed defenses
-    metrics = subject.call_graph.get_shortest_path_length(node, 'defense')
-    if metrics is not None:
-        instance.proximity_to_defense = (
-            stat.mean(metrics.values()) if metrics else 0.0
-        )
+    failed = list()
+    with multiprocessing.Pool(
+            processes, initializer=_initialize_profile, initargs=(subject,)
+         ) as pool:
+        results = pool.imap_unordered(_profile, pending)
+        for (index, (name, returncode)) in enumerate(results, start=1):
+            if returncode != 0:
+                failed.append(name)
+            debug('Profiled {0}/{1} {2}'.format(
+                index, len(pending), name
+            ), line=True)
+    if pending:
+        debug('')
 
-    # Dangerous functions
-    metrics = subject.call_graph.get_shortest_path_length(node, 'dangerous')
-    if metrics is not None:
-        instance.proximity_to_dangerous = (
-            stat.mean(metrics.values()) if metrics else 0.0
+    end = datetime.datetime.now()
+    seconds = (end - begin).total_seconds()
+    count = sum(len(gmons_name) for (_, gmons_name) in pending)
+    debug(
+        'Profiled {0} gmon files into {1} gprof files in {2:.2f} minutes '
+        '({3:.2f} gmon files per second)'.format(
+            count, len(pending), seconds / 60,
+            (count / seconds) if seconds else 0
+        )
+    )
+    for name in failed:
+        debug('gprof failed for {0}'.format(name))
+
+    return failed
+
+
+def _initialize_profile(subject):
+    global _subject
+
+    _subject = subject
+
+
+def _profile(group):
+    (name, gmons_name) = group
+    returncode = _subject.gprof_group(name, gmons_name)
+    if returncode != 0:
+        # A partial gprof file must not be mistaken for an up to date one
+        gprof_path = _subject.get_gprof_path(name)
+        if os.path.exists(gprof_path):
+            os.remove(gprof_path)
+    return (name, returncode)
+
+
+def compare_profiles(subject, group_size, processes):
+    """Compare the call graphs loaded from individual and summed profiles.
+
+    The call graph is loaded, with the gprof loader alone, once from the gprof
+    files generated for each gmon file and once from those generated for the
+    gmon files summed in groups of group_size. Both sets of gprof files must
+    have been generated (see profile()).
+
+    Parameters
+    ----------
+    subject : app.subjects.subject.Subject
+        An initialized subject.
+    group_size : int
+        The number of gmon files summed into each gprof file.
+    processes : int
+        The number of processes that the gprof files are loaded with.
+
+    Returns
+    -------
+    comparison : dict
+        A dictionary with the keys 'individual' and 'summed', each mapping to
+        a dictionary of the number of gprof files, the load time in seconds,
+        and the number of nodes, edges, and tested nodes in the call graph
+        and the key 'differences' mapping to a dictionary of the number of
+        nodes, edges, tested nodes, and frequencies that differ between the
+        two call graphs.
+    """
+    if subject.designed_defenses is None:
+        subject.load_defenses()
+
+    _group_size = subject.gmon_group_size
+
+    call_graphs = dict()
+    comparison = dict()
+    for (key, size) in [('individual', None), ('summed', group_size)]:
+        subject.gmon_group_size = size
+        debug('Loading call graph from {0}'.format(subject.gprofs_dir))
+
+        begin = datetime.datetime.now()
+        loader = MultigprofLoader(
+            subject.gprofs_path, processes=processes, reverse=False,
+            defenses=subject.designed_defenses,
+            vulnerabilities=subject.were_vuln
         )
+        call_graph = CallGraph.from_loader(
+            loader, fragmentize=True, granularity=subject.granularity
+        )
+        end = datetime.datetime.now()
+
+        graph = call_graph.call_graph
+        call_graphs[key] = graph
+        comparison[key] = {
+            'gprofs': len(loader.sources),
+            'seconds': (end - begin).total_seconds(),
+            'nodes': graph.number_of_nodes(),
+            'edges': graph.number_of_edges(),
+            'tested': len(call_graph.get_nodes('tested')),
+        }
+    subject.gmon_group_size = _group_size
+
+    (individual, summed) = (call_graphs['individual'], call_graphs['summed'])
+    nodes = set(individual.nodes()) & set(summed.nodes())
+    comparison['differences'] = {
+        'nodes': len(set(individual.nodes()) ^ set(summed.nodes())),
+        'edges': len(set(individual.edges()) ^ set(summed.edges())),
+        'tested': sum(
+            1 for node in nodes
+            if ('tested' in individual.node[node]) !=
+            ('tested' in summed.node[node])
+        ),
+        'frequency': sum(
+            1 for node in nodes
+            if individual.node[node].get('frequency') !=
+            summed.node[node].get('frequency')
+        ),
+    }
+
+    return comparison
+
+
+def analyze_sensitivity(subject, parameters, processes=1, resume=False,
+                        shortlist=None):
+    begin = datetime.datetime.now()
 
-    queue.put(instance, block=True)
+    debug('Performing sensitivity analysis on {0}'.format(subject.release))
 
+    # parameters is a list of (index, parameters) tuples or a grid
+    if isinstance(parameters, ParameterGrid):
+        parameters = list(parameters.iterate())
+
+    # A resumed analysis skips the parameter sets that an earlier, possibly
+    #   interrupted, analysis of the release has saved
+    if resume:
+        completed = _get_completed(subject.release)
+        skipped = len(parameters)
+        parameters = [
+            (index, parameters_) for (index, parameters_) in parameters
+            if _get_key(parameters_) not in completed
+        ]
+        skipped -= len(parameters)
+        debug('Skipping {0} parameter sets analyzed earlier'.format(skipped))
+        if not parameters:
+            return
+
+    with _get_sensitivity_pool(subject, processes) as pool:
+        # Parameter sets are screened with estimated page ranks and only the
+        #   most significant are analyzed, and saved, with solved page ranks
+        if shortlist is not None and shortlist < len(parameters):
+            parameters = _screen_parameters(
+                pool, parameters, processes, shortlist
+            )
+        count = len(_analyze_parameters(
+            pool, subject.release, parameters, processes
+        ))
 
-def analyze_sensitivity(subject, parameters):
-    debug('Performing sensitivity analysis on {0}'.format(subject.release))
+    end = datetime.datetime.now()
+    seconds = (end - begin).total_seconds()
+    debug(
+        'Analyzed {0} parameter sets in {1:.2f} minutes ({2:.2f} per second)'
+        .format(count, seconds / 60, (count / seconds) if seconds else 0)
+    )
 
-    subject.load_call_graph()
-
-    # A dictionary the set of values for damping, personalization dictionary,
-    # and edge weights
-    parameters = {
-            'damping': parameters[0],
-            'personalization': {
-                'entry': parameters[1],
-                'exit': parameters[2],
-                'other': parameters[3]
-            },
-            'weights': {
-                'base': {'call': parameters[4], 'return': parameters[5]},
-                'dangerous': parameters[6],
-                'vulnerable': parameters[7]
-            }
-        }
 
-    subject.call_graph.assign_weights(parameters['weights'])
-    page_rank = subject.call_graph.get_page_rank(
-            damping=parameters['damping'],
-            entry=parameters['personalization']['entry'],
-            exit=parameters['personalization']['exit'],
-            other=parameters['personalization']['other'],
-        )
+def search_sensitivity(subject, grid, budget, processes=1):
+    begin = datetime.datetime.now()
+
+    debug('Searching {0} parameter sets of {1} for at most {2}'.format(
+        len(grid), subject.release, budget
+    ))
 
-    treatment = list()
-    control = list()
-    for (key, value) in page_rank.items():
-        if key in subject.were_vuln:
-            treatment.append(value)
+    # The parameter sets proposed in each round of the search are analyzed,
+    #   and saved, just as a range of the grid is
+    search = CoarseToFineSearch(grid, budget)
+    with _get_sensitivity_pool(subject, processes) as pool:
+        round_ = 0
+        while True:
+            parameters = search.propose()
+            if not parameters:
+                break
+            round_ += 1
+            debug('Round {0} with strides {1}'.format(
+                round_, search.strides
+            ))
+            search.update(_analyze_parameters(
+                pool, subject.release, parameters, processes
+            ))
+
+    for (index, parameters, p, d) in search.best:
+        debug('{0} {1} p={2} d={3}'.format(index, parameters, p, d))
+
+    count = len(search.results)
+    end = datetime.datetime.now()
+    seconds = (end - begin).total_seconds()
+    debug(
+        'Analyzed {0} parameter sets in {1:.2f} minutes ({2:.2f} per second)'
+        .format(count, seconds / 60, (count / seconds) if seconds else 0)
+    )
+
+    return search.best
+
+
+def _get_sensitivity_pool(subject, processes):
+    # The transition matrix of the call graph and the vulnerable functions
+    #   are loaded once and inherited by every process in the pool. The
+    #   matrix is constructed from the arrays of the compact call graph
+    #   rather than from a CallGraph, when the call graph is cached.
+    subject.load_call_graph(compact=True)
+    page_rank = subject.get_page_rank_solver()
+
+    were_vuln = set(subject.were_vuln)
+    treatment = numpy.array([node in were_vuln for node in page_rank.nodes])
+
+    # The processes must not share the database connections of the parent
+    for connection in connections.all():
+        connection.close()
+
+    return multiprocessing.Pool(
+        processes, initializer=_initialize_sensitivity,
+        initargs=(page_rank, treatment)
+    )
+
+
+def _screen_parameters(pool, parameters, processes, shortlist):
+    groups = _get_groups(parameters)
+    chunksize = max(1, len(groups) // (processes * TASKS_PER_PROCESS))
+
+    screened = list()
+    results = pool.imap_unordered(
+        _screen_sensitivity, groups, chunksize=chunksize
+    )
+    for group in results:
+        screened.extend(group)
+        debug('Screened {0}/{1} parameter sets'.format(
+            len(screened), len(parameters)
+        ), line=True)
+    if parameters:
+        debug('')
+
+    screened.sort(key=get_score)
+    return [
+        (index, parameters_)
+        for (index, parameters_, _, _) in screened[:shortlist]
+    ]
+
+
+def _analyze_parameters(pool, release, parameters, processes):
+    # Parameter sets that differ in personalization alone share the basis
+    #   vectors of the page rank (see app.pagerank.PageRank.solve_basis())
+    groups = _get_groups(parameters)
+    debug('{0} parameter sets in {1} groups of identical damping and weights'
+          .format(len(parameters), len(groups)))
+
+    size = settings.DATABASES[router.db_for_write(Sensitivity)]['BULK']
+    saved = 0
+    batch = list()
+    analyzed = list()
+    chunksize = max(1, len(groups) // (processes * TASKS_PER_PROCESS))
+    results = pool.imap_unordered(
+        _analyze_sensitivity, groups, chunksize=chunksize
+    )
+    for group in results:
+        for (index, parameters_, p, d) in group:
+            batch.append(_get_sensitivity(release, parameters_, p, d))
+            analyzed.append((index, parameters_, p, d))
+            debug('Analyzed {0}/{1} parameter sets ({2})'.format(
+                len(analyzed), len(parameters), index
+            ), line=True)
+
+            # Results are saved in batches such that an interrupted analysis
+            #   loses at most one batch
+            if len(batch) == size:
+                saved += _bulk_create_ignore(batch)
+                batch.clear()
+    if batch:
+        saved += _bulk_create_ignore(batch)
+    if parameters:
+        debug('')
+    if saved < len(analyzed):
+        debug('{0} parameter sets were saved by another analysis'.format(
+            len(analyzed) - saved
+        ))
+
+    return analyzed
+
+
+def _initialize_sensitivity(page_rank, treatment):
+    global _page_rank, _treatment
+
+    _page_rank = page_rank
+    _treatment = treatment
+
+
+def _get_groups(parameters):
+    # Groups of (index, parameters) tuples that differ in the personalization
+    #   (i.e. parameters[1:4]) alone
+    groups = collections.OrderedDict()
+    for (index, parameters_) in parameters:
+        key = (parameters_[0],) + tuple(parameters_[4:])
+        groups.setdefault(key, list()).append((index, parameters_))
+    return list(groups.values())
+
+
+def _analyze_sensitivity(group):
+    (_, parameters) = group[0]
+
+    # Each process has its own copy of the transition matrix, which is
+    #   reweighted for every group of parameter sets. The solutions for the
+    #   previous group are the starting vectors of the power iteration.
+    _assign_weights(parameters)
+
+    # Solving for the basis vectors costs three solutions, which pays off
+    #   for groups of more than three parameter sets
+    basis = None
+    if len(group) > 3:
+        basis = _page_rank.solve_basis(parameters[0])
+
+    # The page ranks for the group are the columns of a matrix that the
+    #   statistics are computed for at once
+    page_ranks = numpy.empty((len(_page_rank.nodes), len(group)))
+    for (column, (index, parameters)) in enumerate(group):
+        if basis is not None:
+            page_ranks[:, column] = _page_rank.combine(
+                basis, entry=parameters[1], exit=parameters[2],
+                other=parameters[3]
+            )
         else:
-            control.append(value)
+            page_ranks[:, column] = _page_rank.solve(
+                parameters[0],
+                _page_rank.get_personalization(
+                    entry=parameters[1], exit=parameters[2],
+                    other=parameters[3]
+                ),
+                record=_get_record(index, parameters)
+            )
+
+    return _get_statistics(group, page_ranks)
+
+
+def _screen_sensitivity(group):
+    (_, parameters) = group[0]
+
+    _assign_weights(parameters)
+
+    # The page ranks are estimated by random walks (see
+    #   app.pagerank.PageRank.estimate()) rather than solved for
+    page_ranks = numpy.empty((len(_page_rank.nodes), len(group)))
+    for (column, (index, parameters)) in enumerate(group):
+        (page_ranks[:, column], _) = _page_rank.estimate(
+            parameters[0],
+            _page_rank.get_personalization(
+                entry=parameters[1], exit=parameters[2], other=parameters[3]
+            ),
+            record=_get_record(index, parameters)
+        )
 
-    treatment = numpy.array(treatment)
-    control = numpy.array(control)
+    return _get_statistics(group, page_ranks)
 
-    (_, p) = scipy.stats.ranksums(treatment, control)
 
-    sensitivity = Sensitivity()
+def _assign_weights(parameters):
+    _page_rank.assign_weights({
+        'base': {'call': parameters[4], 'return': parameters[5]},
+        'dangerous': parameters[6],
+        'vulnerable': parameters[7]
+    })
 
-    sensitivity.release = subject.release
-    sensitivity.damping = parameters['damping']
 
-    sensitivity.personalization_entry = parameters['personalization']['entry']
-    sensitivity.personalization_exit = parameters['personalization']['exit']
-    sensitivity.personalization_other = parameters['personalization']['other']
+def _get_record(index, parameters):
+    # Fields of the record of a solution for a parameter set (see
+    #   app.pagerank.PageRank.solve())
+    return {
+        'index': index, 'entry': parameters[1], 'exit': parameters[2],
+        'other': parameters[3]
+    }
 
-    sensitivity.weight_call = parameters['weights']['base']['call']
-    sensitivity.weight_return = parameters['weights']['base']['return']
-    sensitivity.weight_dangerous = parameters['weights'].get('dangerous', 0)
-    sensitivity.weight_defense = parameters['weights'].get('defense', 0)
-    sensitivity.weight_tested = parameters['weights'].get('tested', 0)
-    sensitivity.weight_vulnerable = parameters['weights'].get('vulnerable', 0)
 
-    sensitivity.p = p
-    sensitivity.d = app.stats.cohensd(treatment, control)
+def _get_statistics(group, page_ranks):
+    (_, p) = app.stats.batch_ranksums(page_ranks, _treatment)
+    d = app.stats.batch_cohensd(page_ranks, _treatment)
 
-    sensitivity.save()
+    return [
+        (index, parameters, float(p[column]), float(d[column]))
+        for (column, (index, parameters)) in enumerate(group)
+    ]
 
 
-def update_pagerank(subject):
-    begin = datetime.datetime.now()
+def _get_sensitivity(release, parameters, p, d):
+    sensitivity = Sensitivity()
 
-    debug('Updating {0}'.format(subject.release))
-    subject.load_call_graph()
+    sensitivity.release = release
+    sensitivity.damping = parameters[0]
 
-    subject.assign_page_rank()
+    sensitivity.personalization_entry = parameters[1]
+    sensitivity.personalization_exit = parameters[2]
+    sensitivity.personalization_other = parameters[3]
 
-    count = 0
-    functions = Function.objects.filter(release=subject.release)
-    for (node, attrs) in subject.call_graph.nodes:
-        function = None
+    sensitivity.weight_call = parameters[4]
+    sensitivity.weight_return = parameters[5]
+    sensitivity.weight_dangerous = parameters[6]
+    sensitivity.weight_defense = 0
+    sensitivity.weight_tested = 0
+    sensitivity.weight_vulnerable = parameters[7]
 
-        _function = functions.filter(name=node.function_name)
-        if _function.count() == 1:
-            function = functions.get(name=node.function_name)
-        else:
-            _function = functions.filter(
-                    name=node.function_name, file=node.function_signature
-                )
-            if _function.exists():
-                function = functions.get(
-                        name=node.function_name, file=node.function_signature
-                    )
-
-        if function is not None:
-            count += 1
-
-            function.page_rank = attrs['page_rank']
-            function.save()
-        else:
-            debug('{0}@{1} not found'.format(
-                    node.function_name, node.function_signature
-                ))
+    sensitivity.p = p
+    sensitivity.d = d
+
+    return sensitivity
+
+
+def _get_key(parameters):
+    # The values of the columns in PARAMETER_FIELDS for a parameter set. The
+    #   weights of defenses and tested functions are not varied.
+    key = tuple(parameters[:7]) + (0, 0) + tuple(parameters[7:8])
+    return tuple(float(value) for value in key)
+
+
+def _get_completed(release):
+    # The keys of the parameter sets saved for a release, in one query over
+    #   the unique index on the release and the parameter columns of each
+    #   database that they may have been saved to (see app.shards)
+    completed = set()
+    for using in shards.get_databases(Sensitivity):
+        rows = Sensitivity.objects.using(using).filter(
+            release=release
+        ).values_list(*PARAMETER_FIELDS)
+        completed.update(tuple(float(value) for value in row) for row in rows)
+    return completed
+
+
+def _bulk_create_ignore(objects):
+    # Insert model instances in a single statement, ignoring those that
+    #   violate a uniqueness constraint (e.g. parameter sets saved by a
+    #   concurrent analysis of the same release), and return the number of
+    #   rows inserted. Django bulk_create has no such option.
+    if not objects:
+        return 0
+
+    model = type(objects[0])
+    using = router.db_for_write(model)
+    connection = connections[using]
+    statement = INSERT_IGNORE.get(connection.vendor)
+    if statement is None:
+        model.objects.using(using).bulk_create(objects)
+        return len(objects)
+
+    fields = [
+        field for field in model._meta.concrete_fields
+        if not field.auto_created
+    ]
+    values = list()
+    for object_ in objects:
+        values.extend(
+            field.get_db_prep_save(
+                field.pre_save(object_, add=True), connection=connection
+            )
+            for field in fields
+        )
 
-    end = datetime.datetime.now()
-    debug('Updated {0} records'.format(count))
-    debug('Updating {0} completed in {1:.2f} minutes'.format(
-        subject.release, ((end - begin).total_seconds() / 60)
-    ))
+    row = '({0})'.format(', '.join(['%s'] * len(fields)))
+    sql = statement.format(
+        table=connection.ops.quote_name(model._meta.db_table),
+        columns=', '.join(
+            connection.ops.quote_name(field.column) for field in fields
+        ),
+        values=', '.join([row] * len(objects))
+    )
+    with transaction.atomic(using=using):
+        cursor = connection.cursor()
+        cursor.execute(sql, values)
+        return cursor.rowcount
+
+
+def update(subject, fields):
+    begin = datetime.datetime.now()
 
+    debug('Updating {0} of {1}'.format(', '.join(fields), subject.release))
 
-def update_sloc(subject):
-    begin = datetime.datetime.now()
+    model = Function
+    if subject.granularity == Granularity.FILE:
+        model = File
+
+    # The key and the current value of the fields of every instance of the
+    #   release are loaded in one query and instances are resolved by a
+    #   lookup rather than a query
+    instances = model.objects.filter(release=subject.release)
+    rows = list(instances.values_list(
+        'id', *(_get_key_fields(model) + fields)
+    ))
+    keys = _get_keys(model, rows)
+    current = {row[0]: row[-len(fields):] for row in rows}
+    values = {id_: list(values_) for (id_, values_) in current.items()}
+
+    if 'page_rank' in fields:
+        column = fields.index('page_rank')
+        subject.load_call_graph()
+        subject.assign_page_rank()
+        for (node, attrs) in subject.call_graph.nodes:
+            id_ = _resolve(keys, model, node)
+            if id_ is not None:
+                values[id_][column] = attrs['page_rank']
+            else:
+                debug('{0}@{1} not found'.format(
+                    node.function_name, node.function_signature
+                ))
 
-    debug('Updating SLOC {0}'.format(subject.release))
-    subject.prepare()
-
-    count = 0
-    if subject.granularity == Granularity.FUNC:
-        functions = Function.objects.filter(release=subject.release)
-        for function in functions:
-            function.sloc = subject.get_sloc(function.name, function.file)
-            function.save()
-            count += 1
-    elif subject.granularity == Granularity.FILE:
-        files = File.objects.filter(release=subject.release)
-        for file_ in files:
-            file_.sloc = subject.get_sloc('', file_.name)
-            file_.save()
-            count += 1
+    if 'sloc' in fields:
+        column = fields.index('sloc')
+        subject.prepare()
+        for row in rows:
+            if model == Function:
+                sloc = subject.get_sloc(row[1], row[2])
+            else:
+                sloc = subject.get_sloc('', row[1])
+            values[row[0]][column] = sloc
+
+    # Only instances with a changed value are updated
+    changed = [
+        (id_, values_) for (id_, values_) in values.items()
+        if tuple(values_) != tuple(current[id_])
+    ]
+    using = router.db_for_write(model)
+    size = settings.DATABASES[using]['BULK']
+    with transaction.atomic(using=using):
+        for index in range(0, len(changed), size):
+            _bulk_update(model, fields, changed[index:index + size])
+            debug('Updated {0}/{1} records'.format(
+                min(index + size, len(changed)), len(changed)
+            ), line=True)
+    if changed:
+        debug('')
 
     end = datetime.datetime.now()
-    debug('Updated {0} records'.format(count))
+    debug('Updated {0} of {1} records'.format(len(changed), len(rows)))
     debug('Updating {0} completed in {1:.2f} minutes'.format(
         subject.release, ((end - begin).total_seconds() / 60)
     ))
 
 
-def _save(model, count, queue):
-    index = 1
-
-    size = settings.DATABASES['default']['BULK']
-    instances = list()
-    with transaction.atomic():
-        while index <= count:
-            instance = queue.get(block=True)
-
-            instance_str = str(instance)
-            instance_str = instance_str[:50] + (instance_str[50:] and '...')
-            debug('{0}/{1} {2}'.format(index, count, instance_str), line=True)
-
-            instances.append(instance)
-            if (index % size) == 0:
-                debug('Inserting {0} instances.'.format(size), line=True)
-                model.objects.bulk_create(instances, batch_size=size)
-                instances.clear()
-
-            index += 1
+def _get_key_fields(model):
+    if model == Function:
+        return ['name', 'file']
+    return ['name']
+
+
+def _get_keys(model, rows):
+    # A function is identified by its name when the name is unique in the
+    #   release and by its name and file otherwise. A file is identified by
+    #   its name.
+    keys = dict()
+    if model == Function:
+        names = collections.Counter(row[1] for row in rows)
+        for row in rows:
+            keys[(row[1], row[2])] = row[0]
+            if names[row[1]] == 1:
+                keys[row[1]] = row[0]
+    else:
+        for row in rows:
+            keys[row[1]] = row[0]
+    return keys
+
+
+def _resolve(keys, model, node):
+    if model == Function:
+        id_ = keys.get(node.function_name)
+        if id_ is None:
+            id_ = keys.get((node.function_name, node.function_signature))
+        return id_
+    return keys.get(node.function_signature)
+
+
+def _bulk_update(model, fields, rows):
+    # Update the fields of instances, given as a list of tuples of the
+    #   primary key and the list of the values of the fields, in a single
+    #   statement. Django bulk_update is not available in this version.
+    if not rows:
+        return
+
+    connection = connections[router.db_for_write(model)]
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    fields = [model._meta.get_field(field) for field in fields]
+
+    params = list()
+    if connection.vendor == 'postgresql':
+        # The values are joined to the table rather than matched in a CASE
+        #   expression for every column
+        row = '(%s, {0})'.format(', '.join(
+            '%s::{0}'.format(field.db_type(connection)) for field in fields
+        ))
+        for (id_, values) in rows:
+            params.append(id_)
+            params.extend(
+                field.get_db_prep_save(value, connection=connection)
+                for (field, value) in zip(fields, values)
+            )
+        sql = (
+            'UPDATE {table} SET {assignments} FROM (VALUES {values}) AS '
+            'v ({columns}) WHERE {table}.{pk} = v.{pk}'
+        ).format(
+            table=table,
+            assignments=', '.join(
+                '{0} = v.{0}'.format(quote(field.column)) for field in fields
+            ),
+            values=', '.join([row] * len(rows)),
+            columns=', '.join(
+                quote(field.column) for field in [model._meta.pk] + fields
+            ),
+            pk=quote(model._meta.pk.column)
+        )
+    else:
+        assignments = list()
+        for (column, field) in enumerate(fields):
+            assignments.append('{0} = CASE {1} {2} END'.format(
+                quote(field.column), quote(model._meta.pk.column),
+                ' '.join(['WHEN %s THEN %s'] * len(rows))
+            ))
+            for (id_, values) in rows:
+                params.append(id_)
+                params.append(field.get_db_prep_save(
+                    values[column], connection=connection
+                ))
+        params.extend(id_ for (id_, _) in rows)
+        sql = 'UPDATE {table} SET {assignments} WHERE {pk} IN ({ids})'.format(
+            table=table, assignments=', '.join(assignments),
+            pk=quote(model._meta.pk.column),
+            ids=', '.join(['%s'] * len(rows))
+        )
 
-        if instances:
-            debug(
-                    'Inserting the last {0} instances.'.format(len(instances)),
-                    line=True
-                )
-            model.objects.bulk_create(instances)
+    cursor = connection.cursor()
+    cursor.execute(sql, params)
@@ -7,15 +7,25 @@
 
 subject=$1
 version=$2
-offset=$3
-parameters=$4
+cpus=$3
+size=$4      # Number of parameter sets analyzed by each array task
+grid=$5      # Optional JSON grid specification (default grid if omitted)
+shards=$6    # Optional directory of per-task shard databases (see mergedb)
 
 module load gcc/4.6.4
 module load python/3.5.2
 source venv/bin/activate
 
+if [ -n "$shards" ]; then
+    mkdir -p $shards
+    export SHARD="$shards/${SLURM_ARRAY_JOB_ID}.${SLURM_ARRAY_TASK_ID}.sqlite3"
+fi
+
 DEBUG=1 python3 manage.py analyzesensitivity \
     -s $subject \
     -r $version \
-    -i $(($((offset*10000))+${SLURM_ARRAY_TASK_ID})) \
-    -f $parameters
+    -b $((SLURM_ARRAY_TASK_ID*size)) \
+    -e $(((SLURM_ARRAY_TASK_ID+1)*size)) \
+    -p $cpus \
+    -R \
+    ${grid:+-G $grid}
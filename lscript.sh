@@ -8,6 +8,7 @@
 subject=$1
 cpus=$2
 granularity=$3
+shards=$4    # Optional directory of per-task shard databases (see mergedb)
 
 if [ $subject == "ffmpeg"  ]; then
     declare -a releases=(
@@ -28,8 +29,14 @@ module load python/3.5.2
 module load cflow/1.4
 source venv/bin/activate
 
+if [ -n "$shards" ]; then
+    mkdir -p $shards
+    export SHARD="$shards/${SLURM_ARRAY_JOB_ID}.${SLURM_ARRAY_TASK_ID}.sqlite3"
+fi
+
+# Both granularities are loaded when granularity is not specified
 DEBUG=1 python manage.py loaddb \
     -s $subject \
     -r ${releases[${SLURM_ARRAY_TASK_ID}]} \
     -p $cpus \
-    -g $granularity
+    ${granularity:+-g $granularity}